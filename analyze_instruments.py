@@ -2,7 +2,7 @@ import os
 import pyRofex
 import json
 from dotenv import load_dotenv
-from collections import defaultdict
+from catalogo import obtener_catalogo
 
 load_dotenv()
 
@@ -15,32 +15,11 @@ def analyze():
             environment=pyRofex.Environment.REMARKET
         )
         print("Fetching all instruments...")
-        res = pyRofex.get_all_instruments()
-        
-        if res['status'] != 'OK':
-            print("Error:", res)
-            return
+        catalogo = obtener_catalogo()
+        print(f"Total: {len(catalogo.simbolos)}")
 
-        instruments = res['instruments']
-        print(f"Total: {len(instruments)}")
-        
-        categories = defaultdict(list)
-        for inst in instruments:
-            # Categorize by prefix or common logic
-            # Common symbols: AL30 (Bonos), GGAL (Acciones), DLR (Futuros), etc.
-            symbol = inst['instrumentId']['symbol']
-            
-            if '/' in symbol:
-                if symbol.startswith('DLR'):
-                    categories['Dólar Futuro'].append(symbol)
-                elif symbol.startswith('O'): # Simplified check for options like O-GGAL...
-                     categories['Opciones'].append(symbol)
-                else:
-                    categories['Otros Futuros/Opciones'].append(symbol)
-            elif any(c.isdigit() for c in symbol) and not symbol.startswith('RFX'):
-                categories['Bonos'].append(symbol)
-            else:
-                categories['Acciones/CEDEARs'].append(symbol)
+        # Categorías precalculadas en el catálogo (mismo criterio que la GUI)
+        categories = catalogo.categorias
 
         # Print summary
         for cat, items in categories.items():
@@ -0,0 +1,331 @@
+"""Backtesting de reglas simples sobre la historia de la curva DLR.
+
+Fuentes de historia (ambas terminan en una `HistoriaCurva`: arrays T x N de
+bid / offer / last, una fila por instante y una columna por contrato):
+
+  - `cargar_git`: cada versión de curva_dlr.json en el historial de git
+    (el workflow la commitea en cada corrida).
+  - `cargar_ticks`: el historial de ticks (historial_ticks.py) muestreado en
+    una grilla de `paso` segundos.
+
+Las estrategias son funciones vectorizadas que, a partir de la historia,
+devuelven la posición objetivo (T x N). La simulación ejecuta con la misma
+semántica que simulator.Portfolio: sin ventas en descubierto, compra a la
+punta vendedora y venta a la compradora, y una compra que no alcanza a pagar
+el saldo se rechaza entera. Además hay un límite de contratos por posición.
+Sólo se recorren en Python los instantes donde cambia la posición objetivo
+(y, si una operación quedó pendiente por falta de precio, los siguientes con
+precio hasta completarla); la valuación, el drawdown y el turnover salen de
+operaciones con arrays.
+
+Los barridos de parámetros corren en paralelo en un ProcessPoolExecutor:
+
+    python backtest.py --estrategia media_movil --ticker DLR/ENE27 --param rapida=3,5 --param lenta=10,20
+"""
+import os
+import sys
+import json
+import argparse
+import datetime
+import itertools
+import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from curvas import sort_key
+from historial_ticks import HistorialTicks, LADO_BID, LADO_OFFER, LADO_LAST
+from publicador import CURVA_FILE
+
+CASH_INICIAL = 20_000_000
+LIMITE_POSICION = 1000
+
+def _numero(valor):
+    return float(valor) if isinstance(valor, (int, float)) else np.nan
+
+def rellenar(a):
+    """Forward fill a lo largo del tiempo (eje 0); NaN hasta el primer dato."""
+    a = np.asarray(a, dtype=float)
+    filas = np.arange(len(a)).reshape(-1, *([1] * (a.ndim - 1)))
+    idx = np.where(np.isnan(a), 0, filas)
+    np.maximum.accumulate(idx, axis=0, out=idx)
+    if a.ndim == 1:
+        return a[idx]
+    return np.take_along_axis(a, idx, axis=0)
+
+class HistoriaCurva:
+    def __init__(self, tiempos, tickers, bid, offer, last):
+        self.tiempos = list(tiempos)
+        self.tickers = list(tickers)
+        self.indice = {t: j for j, t in enumerate(self.tickers)}
+        self.bid = rellenar(bid)
+        self.offer = rellenar(offer)
+        self.last = rellenar(last)
+        with np.errstate(invalid="ignore"):
+            mid = (self.bid + self.offer) / 2
+        self.mid = np.where(np.isnan(mid), self.last, mid)
+
+    def __len__(self):
+        return len(self.tiempos)
+
+    @classmethod
+    def desde_snapshots(cls, snapshots):
+        """`snapshots`: [(timestamp, [{"ticker", "bid", "offer", "last"}, ...])] en orden."""
+        tickers = sorted({fila["ticker"] for _, filas in snapshots for fila in filas}, key=sort_key)
+        indice = {t: j for j, t in enumerate(tickers)}
+        forma = (len(snapshots), len(tickers))
+        bid, offer, last = np.full(forma, np.nan), np.full(forma, np.nan), np.full(forma, np.nan)
+        for i, (_, filas) in enumerate(snapshots):
+            for fila in filas:
+                j = indice[fila["ticker"]]
+                bid[i, j] = _numero(fila.get("bid"))
+                offer[i, j] = _numero(fila.get("offer"))
+                last[i, j] = _numero(fila.get("last"))
+        return cls([ts for ts, _ in snapshots], tickers, bid, offer, last)
+
+def cargar_git(ruta=CURVA_FILE, repo="."):
+    """Historia a partir de cada commit que tocó `ruta` (del más viejo al más nuevo)."""
+    commits = subprocess.run(["git", "log", "--reverse", "--format=%H", "--", ruta],
+                             cwd=repo, capture_output=True, text=True, check=True).stdout.split()
+    snapshots = []
+    for sha in commits:
+        r = subprocess.run(["git", "show", f"{sha}:{ruta}"], cwd=repo, capture_output=True, text=True)
+        if r.returncode != 0:
+            continue
+        try:
+            filas = json.loads(r.stdout)
+        except ValueError:
+            continue
+        if filas:
+            snapshots.append((filas[0].get("timestamp"), filas))
+    return HistoriaCurva.desde_snapshots(snapshots)
+
+def cargar_ticks(dia, tickers=None, paso=60, historial=None):
+    """Historia de un día del historial de ticks, en una grilla de `paso` segundos."""
+    historial = historial or HistorialTicks()
+    if tickers is None:
+        tickers = sorted(historial.indice().get(dia, []), key=sort_key)
+    series = {}
+    inicio, fin = None, None
+    for t in tickers:
+        with historial.leer(t, dia) as serie:
+            ts = np.array(serie.ts, dtype=np.int64)
+            precio = np.array(serie.precio, dtype=np.float64)
+            lado = np.array(serie.lado, dtype=np.uint8)
+        series[t] = (ts, precio, lado)
+        if len(ts):
+            inicio = ts[0] if inicio is None else min(inicio, ts[0])
+            fin = ts[-1] if fin is None else max(fin, ts[-1])
+    if inicio is None:
+        return HistoriaCurva([], tickers, np.empty((0, len(tickers))), np.empty((0, len(tickers))), np.empty((0, len(tickers))))
+
+    grilla = np.arange(inicio, fin + 1, int(paso * 1e9), dtype=np.int64)
+    forma = (len(grilla), len(tickers))
+    columnas = {LADO_BID: np.full(forma, np.nan), LADO_OFFER: np.full(forma, np.nan), LADO_LAST: np.full(forma, np.nan)}
+    for j, t in enumerate(tickers):
+        ts, precio, lado = series[t]
+        for codigo, destino in columnas.items():
+            sel = lado == codigo
+            if not sel.any():
+                continue
+            # Último registro de ese lado en o antes de cada punto de la grilla
+            k = np.searchsorted(ts[sel], grilla, side="right") - 1
+            valores = precio[sel][np.maximum(k, 0)]
+            destino[:, j] = np.where(k >= 0, valores, np.nan)
+    tiempos = [datetime.datetime.fromtimestamp(g / 1e9).isoformat() for g in grilla]
+    return HistoriaCurva(tiempos, tickers, columnas[LADO_BID], columnas[LADO_OFFER], columnas[LADO_LAST])
+
+# --- Estrategias: (historia, **parámetros) -> posición objetivo T x N ---
+
+def _media_movil(x, n):
+    """Media móvil simple de ventana n (NaN mientras no hay n datos)."""
+    salida = np.full(len(x), np.nan)
+    if n <= 0 or len(x) < n:
+        return salida
+    acumulada = np.cumsum(np.insert(np.nan_to_num(x), 0, 0.0))
+    salida[n - 1:] = (acumulada[n:] - acumulada[:-n]) / n
+    validos = np.cumsum(np.insert(~np.isnan(x), 0, False))
+    salida[n - 1:][(validos[n:] - validos[:-n]) < n] = np.nan
+    return salida
+
+def media_movil(hist, ticker, rapida=5, lenta=20, cantidad=10):
+    """Comprado `cantidad` contratos mientras la media rápida del precio medio está sobre la lenta."""
+    objetivo = np.zeros((len(hist), len(hist.tickers)))
+    x = hist.mid[:, hist.indice[ticker]]
+    with np.errstate(invalid="ignore"):
+        comprado = _media_movil(x, rapida) > _media_movil(x, lenta)
+    objetivo[:, hist.indice[ticker]] = np.where(comprado, cantidad, 0)
+    return objetivo
+
+def reversion(hist, ticker, ventana=20, umbral=2.0, cantidad=10):
+    """Compra cuando el precio cae `umbral` desvíos bajo su media y sale al volver a la media."""
+    objetivo = np.zeros((len(hist), len(hist.tickers)))
+    x = hist.mid[:, hist.indice[ticker]]
+    media = _media_movil(x, ventana)
+    desvio = np.sqrt(np.maximum(_media_movil(x * x, ventana) - media * media, 0))
+    with np.errstate(invalid="ignore"):
+        entrada = x < media - umbral * desvio
+        salida = x >= media
+    # Estado: 1 desde una entrada hasta la siguiente salida (forward fill de eventos)
+    eventos = np.where(entrada, 1.0, np.where(salida, 0.0, np.nan))
+    estado = np.nan_to_num(rellenar(eventos))
+    objetivo[:, hist.indice[ticker]] = estado * cantidad
+    return objetivo
+
+ESTRATEGIAS = {"media_movil": media_movil, "reversion": reversion}
+
+# --- Simulación ---
+
+def simular(hist, objetivo, cash=CASH_INICIAL, limite=LIMITE_POSICION):
+    """Ejecuta la posición objetivo con la semántica de Portfolio y devuelve las métricas."""
+    objetivo = np.clip(np.nan_to_num(objetivo), 0, limite)
+    T, N = objetivo.shape
+    cash_inicial = cash
+    pos = np.zeros(N)
+    pos_hist = np.full((T, N), np.nan)
+    cash_hist = np.full(T, np.nan)
+    if T:
+        pos_hist[0], cash_hist[0] = pos, cash
+    operado = 0.0
+    operaciones = rechazadas = 0
+
+    # Instantes donde cambia la posición objetivo, más los que hagan falta para completar
+    # lo que quedó pendiente por falta de precio (puntas NaN): el único loop en Python
+    cambios = np.flatnonzero(np.any(np.diff(objetivo, axis=0, prepend=np.zeros((1, N))) != 0, axis=1))
+    pendiente = np.zeros(N, dtype=bool)
+    meta = pos.copy()
+    k = 0
+    t = cambios[0] if len(cambios) else T
+    while t < T:
+        if k < len(cambios) and cambios[k] == t:
+            k += 1
+            meta = objetivo[t]
+            pendiente = meta != pos
+        delta = np.where(pendiente, meta - pos, 0.0)
+        # Primero las ventas (liberan saldo), después las compras
+        for j in np.flatnonzero(delta < 0):
+            precio = hist.bid[t, j]
+            if np.isnan(precio):
+                continue  # se reintenta cuando haya bid
+            qty = -delta[j]
+            cash += qty * precio
+            pos[j] -= qty
+            operado += qty * precio
+            operaciones += 1
+            pendiente[j] = False
+        for j in np.flatnonzero(delta > 0):
+            precio = hist.offer[t, j]
+            if np.isnan(precio):
+                continue  # se reintenta cuando haya offer
+            pendiente[j] = False
+            if delta[j] * precio > cash:
+                rechazadas += 1  # "Saldo insuficiente": la orden se rechaza, no se reintenta
+                continue
+            cash -= delta[j] * precio
+            pos[j] += delta[j]
+            operado += delta[j] * precio
+            operaciones += 1
+        pos_hist[t], cash_hist[t] = pos, cash
+
+        siguiente = cambios[k] if k < len(cambios) else T
+        if pendiente.any() and t + 1 < siguiente:
+            # Próximo instante (antes del siguiente cambio) con precio para algo pendiente
+            ventas = pendiente & (meta < pos)
+            compras = pendiente & (meta > pos)
+            hay = (~np.isnan(hist.bid[t + 1:siguiente][:, ventas])).any(axis=1)
+            hay |= (~np.isnan(hist.offer[t + 1:siguiente][:, compras])).any(axis=1)
+            primero = np.flatnonzero(hay)
+            t = t + 1 + primero[0] if len(primero) else siguiente
+        else:
+            t = siguiente
+
+    pos_hist = rellenar(pos_hist)
+    cash_hist = rellenar(cash_hist)
+    equity = cash_hist + np.nansum(pos_hist * np.nan_to_num(hist.mid), axis=1)
+    pico = np.maximum.accumulate(equity) if T else equity
+    drawdown = (pico - equity) if T else equity
+    return {
+        "pnl": round(float(equity[-1] - cash_inicial), 2) if T else 0.0,
+        "pnl_pct": round(float(equity[-1] / cash_inicial - 1) * 100, 4) if T else 0.0,
+        "max_drawdown": round(float(drawdown.max()), 2) if T else 0.0,
+        "max_drawdown_pct": round(float((drawdown / pico).max()) * 100, 4) if T else 0.0,
+        "turnover": round(float(operado) / cash_inicial, 4),
+        "operaciones": operaciones,
+        "rechazadas": rechazadas,
+    }
+
+def correr(hist, estrategia, cash=CASH_INICIAL, limite=LIMITE_POSICION, **parametros):
+    objetivo = ESTRATEGIAS[estrategia](hist, **parametros)
+    return {"estrategia": estrategia, **parametros, **simular(hist, objetivo, cash, limite)}
+
+# --- Barridos en paralelo ---
+
+_hist_worker = None
+
+def _iniciar_worker(hist):
+    # Una copia de la historia por proceso (no una por corrida)
+    global _hist_worker
+    _hist_worker = hist
+
+def _correr_worker(args):
+    estrategia, cash, limite, parametros = args
+    return correr(_hist_worker, estrategia, cash, limite, **parametros)
+
+def barrido(hist, estrategia, grilla, fijos=None, cash=CASH_INICIAL, limite=LIMITE_POSICION, procesos=None):
+    """Corre `estrategia` para cada combinación de `grilla` ({param: [valores]}).
+
+    `procesos=1` corre todo en este proceso; si no, en un ProcessPoolExecutor.
+    Devuelve los resultados ordenados por P&L (mejor primero).
+    """
+    nombres = list(grilla)
+    tareas = [(estrategia, cash, limite, {**(fijos or {}), **dict(zip(nombres, valores))})
+              for valores in itertools.product(*(grilla[n] for n in nombres))]
+    if procesos == 1 or len(tareas) == 1:
+        resultados = [correr(hist, e, c, l, **p) for e, c, l, p in tareas]
+    else:
+        with ProcessPoolExecutor(max_workers=procesos, initializer=_iniciar_worker, initargs=(hist,)) as pool:
+            resultados = list(pool.map(_correr_worker, tareas, chunksize=max(len(tareas) // (4 * (procesos or os.cpu_count() or 1)), 1)))
+    return sorted(resultados, key=lambda r: r["pnl"], reverse=True)
+
+def _valor(texto):
+    for tipo in (int, float):
+        try:
+            return tipo(texto)
+        except ValueError:
+            pass
+    return texto
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtesting sobre la historia de la curva DLR")
+    parser.add_argument("--fuente", choices=["git", "ticks"], default="git")
+    parser.add_argument("--dia", help="AAAAMMDD (con --fuente ticks)")
+    parser.add_argument("--paso", type=float, default=60, help="segundos de la grilla (con --fuente ticks)")
+    parser.add_argument("--estrategia", choices=sorted(ESTRATEGIAS), default="media_movil")
+    parser.add_argument("--ticker", help="contrato a operar (por defecto, el primero de la curva)")
+    parser.add_argument("--param", action="append", default=[], help="nombre=v1,v2,... (se barren todas las combinaciones)")
+    parser.add_argument("--cash", type=float, default=CASH_INICIAL)
+    parser.add_argument("--limite", type=float, default=LIMITE_POSICION)
+    parser.add_argument("--procesos", type=int, default=None)
+    args = parser.parse_args()
+
+    if args.fuente == "git":
+        hist = cargar_git()
+    else:
+        if not args.dia:
+            parser.error("--fuente ticks requiere --dia")
+        hist = cargar_ticks(args.dia, paso=args.paso)
+    if not len(hist) or not hist.tickers:
+        print("❌ No hay historia para simular.", file=sys.stderr)
+        sys.exit(1)
+    ticker = args.ticker or hist.tickers[0]
+    grilla = {}
+    for p in args.param:
+        nombre, _, valores = p.partition("=")
+        grilla[nombre] = [_valor(v) for v in valores.split(",")]
+    print(f"📈 {len(hist)} instantes x {len(hist.tickers)} contratos; {args.estrategia} sobre {ticker}", file=sys.stderr)
+    resultados = barrido(hist, args.estrategia, grilla, fijos={"ticker": ticker},
+                         cash=args.cash, limite=args.limite, procesos=args.procesos)
+    print(json.dumps(resultados, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Microbenchmark del parser de Market Data (cotizaciones.LibroCotizaciones).
+
+Compara el handler anterior (un dict nuevo por mensaje, "S/D" como centinela)
+contra la actualización en el lugar de Cotizacion, y cuenta cuántos objetos
+nuevos deja cada tick en el libro una vez poblado.
+Uso: python benchmarks/bench_parser.py [--mensajes 200000] [--tickers 20]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from cotizaciones import LibroCotizaciones
+
+
+def generar_mensajes(n, tickers):
+    mensajes = []
+    for i in range(n):
+        t = tickers[i % len(tickers)]
+        p = 1500.0 + (i % 50) * 0.5
+        mensajes.append({
+            "type": "Md", "timestamp": 1700000000000 + i,
+            "instrumentId": {"marketId": "ROFX", "symbol": t},
+            "marketData": {
+                "BI": [{"price": p, "size": 10}],
+                "OF": [{"price": p + 0.5, "size": 7}],
+                "LA": {"price": p, "size": 1, "date": 1700000000000 + i} if i % 3 else None,
+            },
+        })
+    return mensajes
+
+
+def handler_anterior(current_data):
+    def market_data_handler(message):
+        instrumento = message["instrumentId"]["symbol"]
+        md = message["marketData"]
+        current_data[instrumento] = {
+            "bid": md["BI"][0]["price"] if md.get("BI") else "S/D",
+            "offer": md["OF"][0]["price"] if md.get("OF") else "S/D",
+            "last": md["LA"]["price"] if md.get("LA") and isinstance(md["LA"], dict) else "S/D"
+        }
+    return market_data_handler
+
+
+def medir(handler, mensajes, repeticiones=3):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        for m in mensajes:
+            handler(m)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor / len(mensajes) * 1e9
+
+
+def objetos_por_tick(handler, mensajes):
+    """Objetos de Python creados por el handler (contados por id) por cada tick."""
+    for m in mensajes[:1000]:
+        handler(m)  # poblar el libro
+    creados = 0
+    libro = handler.__self__ if hasattr(handler, "__self__") else handler.__closure__[0].cell_contents
+    for m in mensajes[:5000]:
+        antes = {id(v) for v in libro.values()}
+        handler(m)
+        creados += sum(1 for v in libro.values() if id(v) not in antes)
+    return round(creados / 5000, 3)
+
+
+def correr(mensajes=200000, tickers=20):
+    simbolos = [f"DLR/T{i:02d}" for i in range(tickers)]
+    lote = generar_mensajes(mensajes, simbolos)
+    return {
+        "mensajes": mensajes,
+        "ns_por_mensaje_anterior": round(medir(handler_anterior({}), lote), 1),
+        "ns_por_mensaje_cotizacion": round(medir(LibroCotizaciones().actualizar, lote), 1),
+        "objetos_por_tick_anterior": objetos_por_tick(handler_anterior({}), lote),
+        "objetos_por_tick_cotizacion": objetos_por_tick(LibroCotizaciones().actualizar, lote),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mensajes", type=int, default=200000)
+    parser.add_argument("--tickers", type=int, default=20)
+    args = parser.parse_args()
+    print(json.dumps({"benchmark": "parser_market_data", **correr(args.mensajes, args.tickers)}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Microbenchmark del libro L2 (profundidad.LibroProfundidad).
+
+Compara, por mensaje y para distintas profundidades, el libro (que guarda la
+referencia a los niveles ya parseados) contra dos alternativas: copiar los
+niveles en arrays preasignados y armar listas de tuplas nuevas. También mide
+una ejecución a mercado que recorre todo el libro.
+Uso: python benchmarks/bench_profundidad.py [--mensajes 100000] [--tickers 10]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+from array import array
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from profundidad import LibroProfundidad
+
+
+def generar_mensajes(n, tickers, profundidad):
+    mensajes = []
+    for i in range(n):
+        p = 1500.0 + (i % 50) * 0.5
+        mensajes.append({
+            "type": "Md", "timestamp": 1700000000000 + i,
+            "instrumentId": {"marketId": "ROFX", "symbol": tickers[i % len(tickers)]},
+            "marketData": {
+                "BI": [{"price": p - 0.5 * k, "size": 10 + k} for k in range(profundidad)],
+                "OF": [{"price": p + 0.5 * (k + 1), "size": 7 + k} for k in range(profundidad)],
+            },
+        })
+    return mensajes
+
+
+def handler_listas(libro):
+    def market_data_handler(message):
+        md = message["marketData"]
+        libro[message["instrumentId"]["symbol"]] = {
+            "bid": [(n["price"], n["size"]) for n in md["BI"]],
+            "offer": [(n["price"], n["size"]) for n in md["OF"]],
+        }
+    return market_data_handler
+
+
+def handler_arrays(libro, profundidad):
+    def market_data_handler(message):
+        symbol = message["instrumentId"]["symbol"]
+        arrays = libro.get(symbol)
+        if arrays is None:
+            arrays = libro[symbol] = [array("d", bytes(8 * profundidad)) for _ in range(4)]
+        md = message["marketData"]
+        for niveles, px, cant in ((md["BI"], arrays[0], arrays[1]), (md["OF"], arrays[2], arrays[3])):
+            for k in range(min(len(niveles), profundidad)):
+                px[k] = niveles[k]["price"]
+                cant[k] = niveles[k]["size"]
+    return market_data_handler
+
+
+def medir(handler, mensajes):
+    inicio = time.perf_counter()
+    for m in mensajes:
+        handler(m)
+    return round((time.perf_counter() - inicio) / len(mensajes) * 1e9, 1)
+
+
+def correr(mensajes=100000, tickers=10, profundidades=(1, 5, 20, 50)):
+    simbolos = [f"DLR/T{i:02d}" for i in range(tickers)]
+    resultados = {}
+    for profundidad in profundidades:
+        lote = generar_mensajes(max(mensajes // profundidad, 1000), simbolos, profundidad)
+        libro = LibroProfundidad(profundidad)
+        r = {
+            "mensajes": len(lote),
+            "ns_por_mensaje_libro": medir(libro.actualizar, lote),
+            "ns_por_mensaje_arrays": medir(handler_arrays({}, profundidad), lote),
+            "ns_por_mensaje_listas": medir(handler_listas({}), lote),
+        }
+        b = libro[simbolos[0]]
+        qty = sum(n["size"] for n in b.offers)  # barre todos los niveles
+        inicio = time.perf_counter()
+        for _ in range(1000):
+            b.ejecutar("buy", qty)
+        r["us_por_ejecucion"] = round((time.perf_counter() - inicio) / 1000 * 1e6, 2)
+        resultados[f"depth_{profundidad}"] = r
+    return resultados
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--mensajes", type=int, default=100000)
+    parser.add_argument("--tickers", type=int, default=10)
+    args = parser.parse_args()
+    print(json.dumps({"benchmark": "libro_profundidad", **correr(args.mensajes, args.tickers)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Benchmark del respaldo REST de get_prices_once contra un get_market_data falso.
+
+Compara el modo serie (1 worker, como antes) con el pool concurrente.
+Uso: python benchmarks/bench_rest_fallback.py [--tickers 12] [--latencia 0.25]
+"""
+import os
+import sys
+import time
+import json
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from get_prices_once import completar_con_snapshot
+
+
+def fake_get_market_data(latencia, jitter):
+    def get_market_data(ticker, entries=None, **kwargs):
+        time.sleep(latencia + random.uniform(0, jitter))
+        return {"status": "OK", "marketData": {"LA": {"price": 1500.0, "size": 1, "date": 0}}}
+    return get_market_data
+
+
+def medir(tickers, get_md, workers):
+    inicio = time.perf_counter()
+    res = completar_con_snapshot(tickers, get_market_data=get_md, max_workers=workers, timeout=10, deadline=60)
+    return time.perf_counter() - inicio, len(res)
+
+
+def correr(tickers=12, latencia=0.25, jitter=0.05, workers=8):
+    simbolos = [f"DLR/T{i:02d}" for i in range(tickers)]
+    get_md = fake_get_market_data(latencia, jitter)
+    serie, n1 = medir(simbolos, get_md, 1)
+    paralelo, n2 = medir(simbolos, get_md, workers)
+    return {
+        "tickers": tickers,
+        "latencia_s": latencia,
+        "serie_s": round(serie, 4),
+        "paralelo_s": round(paralelo, 4),
+        "workers": workers,
+        "speedup": round(serie / paralelo, 2),
+        "completos": [n1, n2],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tickers", type=int, default=12)
+    parser.add_argument("--latencia", type=float, default=0.25)
+    parser.add_argument("--jitter", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+    print(json.dumps({"benchmark": "rest_fallback", **correr(args.tickers, args.latencia, args.jitter, args.workers)}))
+
+
+if __name__ == "__main__":
+    main()
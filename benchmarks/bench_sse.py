@@ -0,0 +1,146 @@
+"""Prueba de carga local del servidor HTTP/SSE (servidor_http.ServidorCurva).
+
+El servidor corre en este proceso; los clientes SSE en otro (asyncio, una
+conexión por cliente), para no competir por el mismo GIL. Para cada cantidad
+de clientes se emiten eventos `cambios` a una tasa fija y cada cliente mide
+la latencia emisión -> recepción. También compara el costo de un poll de la
+curva completa (200) contra uno con ETag vigente (304).
+Uso: python benchmarks/bench_sse.py [--clientes 100,1000,5000] [--eventos 50] [--tasa 10]
+"""
+import os
+import sys
+import json
+import time
+import socket
+import asyncio
+import argparse
+import multiprocessing
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from servidor_http import ServidorCurva
+from benchmarks.fake_pyrofex import contratos_dlr
+
+
+def percentiles(muestras):
+    if not muestras:
+        return {}
+    ordenadas = sorted(muestras)
+    def p(q):
+        return ordenadas[min(int(q * len(ordenadas)), len(ordenadas) - 1)]
+    return {"p50_ms": round(p(0.5) * 1000, 2), "p99_ms": round(p(0.99) * 1000, 2), "max_ms": round(ordenadas[-1] * 1000, 2)}
+
+
+async def _clientes(puerto, n, eventos, conectados, listo):
+    latencias = []
+    recibidos = [0]
+
+    async def cliente():
+        reader, writer = await asyncio.open_connection("127.0.0.1", puerto)
+        writer.write(b"GET /eventos HTTP/1.1\r\nHost: bench\r\n\r\n")
+        await writer.drain()
+        await reader.readuntil(b"event: curva")
+        conectados.value += 1  # sólo lo toca este loop
+        vistos = 0
+        try:
+            while vistos < eventos:
+                linea = await reader.readline()
+                if not linea:
+                    break
+                if linea.startswith(b"data: {\"t\""):
+                    latencias.append(time.time() - json.loads(linea[6:])["t"])
+                    vistos += 1
+        finally:
+            recibidos[0] += vistos
+            writer.close()
+
+    tareas = []
+    for _ in range(n):
+        tareas.append(asyncio.ensure_future(cliente()))
+        await asyncio.sleep(0)
+    listo.set()
+    await asyncio.wait(tareas, timeout=eventos + 30)
+    return latencias, recibidos[0]
+
+
+def _proceso_clientes(puerto, n, eventos, conectados, listo, salida):
+    latencias, recibidos = asyncio.run(_clientes(puerto, n, eventos, conectados, listo))
+    salida.put((latencias, recibidos))
+
+
+def correr_sse(servidor, clientes, eventos, tasa):
+    ctx = multiprocessing.get_context("spawn")
+    conectados = ctx.Value("i", 0, lock=False)
+    listo = ctx.Event()
+    salida = ctx.Queue()
+    proceso = ctx.Process(target=_proceso_clientes, args=(servidor.puerto, clientes, eventos, conectados, listo, salida))
+    proceso.start()
+    listo.wait(60)
+    limite = time.monotonic() + 60
+    while conectados.value < clientes and time.monotonic() < limite:
+        time.sleep(0.05)
+    conectados_al_emitir = conectados.value
+    inicio = time.perf_counter()
+    for i in range(eventos):
+        servidor.emitir("cambios", {"t": time.time(), "i": i})
+        time.sleep(1 / tasa)
+    latencias, recibidos = salida.get(timeout=eventos / tasa + 60)
+    proceso.join(10)
+    return {"clientes": clientes, "conectados": conectados_al_emitir,
+            "entregados_pct": round(100 * recibidos / (clientes * eventos), 2),
+            "emision_s": round(time.perf_counter() - inicio, 2), **percentiles(latencias)}
+
+
+def correr_polls(servidor, pedidos):
+    """Pedidos secuenciales keep-alive: curva completa (200) vs. ETag vigente (304)."""
+    resultados = {}
+    with socket.create_connection(("127.0.0.1", servidor.puerto)) as s:
+        f = s.makefile("rb")
+        etag = None
+        for nombre, extra in (("200", ""), ("304", None)):
+            if extra is None:
+                extra = f"If-None-Match: {etag}\r\n"
+            bytes_total = 0
+            inicio = time.perf_counter()
+            for _ in range(pedidos):
+                s.sendall(f"GET /curva_dlr.json HTTP/1.1\r\nHost: bench\r\n{extra}\r\n".encode())
+                largo = 0
+                while True:
+                    linea = f.readline()
+                    bytes_total += len(linea)
+                    if linea.lower().startswith(b"etag:"):
+                        etag = linea.split(b":", 1)[1].strip().decode()
+                    if linea.lower().startswith(b"content-length:"):
+                        largo = int(linea.split(b":")[1])
+                    if linea == b"\r\n":
+                        break
+                bytes_total += len(f.read(largo)) if largo else 0
+            total = time.perf_counter() - inicio
+            resultados[nombre] = {"pedidos_por_s": round(pedidos / total), "bytes_por_pedido": bytes_total // pedidos}
+    return resultados
+
+
+def correr(clientes=(100, 1000), eventos=50, tasa=10, pedidos=2000):
+    servidor = ServidorCurva(puerto=0).iniciar()
+    curva = [{"ticker": t, "bid": 1500.0 + i, "offer": 1501.0 + i, "last": 1500.5 + i, "timestamp": "10:00:00"}
+             for i, t in enumerate(contratos_dlr(12))]
+    servidor.publicar("/curva_dlr.json", curva)
+    try:
+        return {"polls": correr_polls(servidor, pedidos),
+                "sse": [correr_sse(servidor, n, eventos, tasa) for n in clientes]}
+    finally:
+        servidor.detener()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clientes", default="100,1000,5000")
+    parser.add_argument("--eventos", type=int, default=50)
+    parser.add_argument("--tasa", type=float, default=10, help="eventos por segundo")
+    args = parser.parse_args()
+    clientes = [int(n) for n in args.clientes.split(",")]
+    print(json.dumps(correr(clientes, args.eventos, args.tasa), indent=2))
+
+
+if __name__ == "__main__":
+    main()
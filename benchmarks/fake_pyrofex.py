@@ -0,0 +1,186 @@
+"""Reemplazo local de pyRofex para correr benchmarks sin credenciales de REMARKET.
+
+Implementa lo que usan los scripts del repo: initialize, get_all_instruments,
+init_websocket_connection / market_data_subscription / close_websocket_connection
+(con un feed sintético que genera ticks a una tasa configurable) y
+get_market_data (con latencia simulada).
+
+Uso:
+    from benchmarks.fake_pyrofex import FakePyRofex
+    fake = FakePyRofex(instrumentos=2000, ticks_por_segundo=500).instalar()
+    import servicio_dlr   # ya ve el fake como `pyRofex`
+"""
+import sys
+import enum
+import time
+import types
+import random
+import datetime
+import threading
+
+MESES = ['ENE', 'FEB', 'MAR', 'ABR', 'MAY', 'JUN', 'JUL', 'AGO', 'SEP', 'OCT', 'NOV', 'DIC']
+
+class Environment(enum.Enum):
+    REMARKET = 1
+    LIVE = 2
+
+class MarketDataEntry(enum.Enum):
+    BIDS = 'BI'
+    OFFERS = 'OF'
+    LAST = 'LA'
+    OPENING_PRICE = 'OP'
+    CLOSING_PRICE = 'CL'
+    SETTLEMENT_PRICE = 'SE'
+    HIGH_PRICE = 'HI'
+    LOW_PRICE = 'LO'
+    TRADE_VOLUME = 'TV'
+    OPEN_INTEREST = 'OI'
+
+class Market(enum.Enum):
+    ROFEX = 'ROFX'
+
+def contratos_dlr(n=12, desde=None):
+    """Tickers DLR mensuales a partir del mes actual (ej: DLR/OCT26, DLR/NOV26, ...)."""
+    hoy = desde or datetime.date.today()
+    tickers = []
+    for i in range(n):
+        mes = (hoy.month - 1 + i) % 12
+        anio = hoy.year + (hoy.month - 1 + i) // 12
+        tickers.append(f"DLR/{MESES[mes]}{anio % 100:02d}")
+    return tickers
+
+class FakePyRofex(types.ModuleType):
+    Environment = Environment
+    MarketDataEntry = MarketDataEntry
+    Market = Market
+
+    def __init__(self, instrumentos=2000, contratos=12, ticks_por_segundo=0, profundidad=5,
+                 latencia_rest=0.0, mercado_abierto=True, semilla=1):
+        super().__init__("pyRofex")
+        self.random = random.Random(semilla)
+        self.dlr = contratos_dlr(contratos)
+        otros = [f"BONO{i:04d}" for i in range(max(instrumentos - contratos, 0) // 2)]
+        otros += [f"MERV - XMEV - ACC{i:04d} - 24hs" for i in range(max(instrumentos - contratos, 0) - len(otros))]
+        self.simbolos = self.dlr + otros
+        self.ticks_por_segundo = ticks_por_segundo
+        self.profundidad = profundidad
+        self.latencia_rest = latencia_rest
+        self.mercado_abierto = mercado_abierto
+        self.precios = {s: 1000.0 + 25 * i for i, s in enumerate(self.simbolos)}
+
+        self.md_handler = None
+        self.error_handler = None
+        self.exception_handler = None
+        self.suscriptos = []
+        self.mensajes_enviados = 0
+        self._feed = None
+        self._activo = threading.Event()
+        self._lock = threading.Lock()
+
+    def instalar(self):
+        """Registra el fake como `pyRofex` (y lo inyecta en módulos ya importados)."""
+        sys.modules["pyRofex"] = self
+        import catalogo
+        catalogo.desactivar_cache_disco()  # el catálogo simulado no va al cache real
+        for modulo in list(sys.modules.values()):
+            if getattr(modulo, "pyRofex", None) is not None and modulo is not self:
+                modulo.pyRofex = self
+        return self
+
+    # --- API REST ---
+    def initialize(self, user=None, password=None, account=None, environment=None, **kwargs):
+        return None
+
+    def get_all_instruments(self, environment=None):
+        return {"status": "OK", "instruments": [
+            {"instrumentId": {"marketId": "ROFX", "symbol": s}, "cficode": self.cfi(s)}
+            for s in self.simbolos
+        ]}
+
+    @staticmethod
+    def cfi(symbol):
+        if symbol.startswith("DLR/"):
+            return "FXXXSX"
+        return "ESXXXX" if symbol.startswith("MERV") else "DBXXXX"
+
+    def get_market_data(self, ticker, entries=None, depth=1, market=None, environment=None):
+        if self.latencia_rest:
+            time.sleep(self.latencia_rest)
+        p = self.precios.get(ticker, 1000.0)
+        return {"status": "OK", "marketData": {
+            "BI": [{"price": p - 0.5, "size": 10}], "OF": [{"price": p + 0.5, "size": 8}],
+            "LA": {"price": p, "size": 1, "date": int(time.time() * 1000)}}}
+
+    # --- WebSocket ---
+    def init_websocket_connection(self, market_data_handler=None, order_report_handler=None,
+                                  error_handler=None, exception_handler=None, environment=None):
+        self.md_handler = market_data_handler
+        self.error_handler = error_handler
+        self.exception_handler = exception_handler
+        self._activo.set()
+        if self.ticks_por_segundo and (self._feed is None or not self._feed.is_alive()):
+            self._feed = threading.Thread(target=self._generar, daemon=True)
+            self._feed.start()
+
+    def market_data_subscription(self, tickers, entries, depth=1, market=None, handler=None, environment=None):
+        with self._lock:
+            nuevos = [t for t in tickers if t not in self.suscriptos]
+            self.suscriptos.extend(nuevos)
+        # Como Primary: snapshot inicial de cada ticker al suscribirse; error si no existe
+        for t in nuevos:
+            if t in self.precios:
+                self.enviar(t)
+            elif self.error_handler is not None:
+                self.error_handler({"type": "error", "status": "ERROR",
+                                    "description": f"Instrument {t} don't exist"})
+
+    def close_websocket_connection(self, environment=None):
+        self._activo.clear()
+        with self._lock:
+            self.suscriptos = []
+
+    def add_websocket_market_data_handler(self, handler, environment=None):
+        self.md_handler = handler
+
+    # --- Feed sintético ---
+    def market_data(self, ticker, depth=None):
+        p = self.precios.get(ticker, 1000.0)
+        depth = depth or self.profundidad
+        if not self.mercado_abierto:
+            # Mercado cerrado: el WebSocket no trae puntas ni último
+            return {"type": "Md", "timestamp": int(time.time() * 1000),
+                    "instrumentId": {"marketId": "ROFX", "symbol": ticker},
+                    "marketData": {"BI": [], "OF": [], "LA": None}}
+        return {
+            "type": "Md",
+            "timestamp": int(time.time() * 1000),
+            "instrumentId": {"marketId": "ROFX", "symbol": ticker},
+            "marketData": {
+                "BI": [{"price": round(p - 0.5 * (k + 1), 1), "size": 10 + k} for k in range(depth)],
+                "OF": [{"price": round(p + 0.5 * (k + 1), 1), "size": 8 + k} for k in range(depth)],
+                "LA": {"price": p, "size": 1, "date": int(time.time() * 1000)},
+            },
+        }
+
+    def enviar(self, ticker, precio=None):
+        """Entrega un mensaje al handler (en el thread que llama). Devuelve el mensaje."""
+        if precio is not None:
+            self.precios[ticker] = precio
+        msg = self.market_data(ticker)
+        if self.md_handler is not None and self._activo.is_set():
+            self.md_handler(msg)
+            self.mensajes_enviados += 1
+        return msg
+
+    def _generar(self):
+        intervalo = 0.01
+        acumulado = 0.0
+        while self._activo.is_set():
+            acumulado += self.ticks_por_segundo * intervalo
+            with self._lock:
+                tickers = list(self.suscriptos)
+            while acumulado >= 1 and tickers:
+                t = self.random.choice(tickers)
+                self.enviar(t, round(self.precios[t] + self.random.choice((-0.5, 0.5)), 1))
+                acumulado -= 1
+            time.sleep(intervalo)
@@ -0,0 +1,180 @@
+"""Suite de benchmarks offline (sin credenciales de REMARKET).
+
+Instala `FakePyRofex` en lugar de pyRofex y mide:
+  - handler_servicio: throughput de servicio_dlr.market_data_handler
+  - publicacion_servicio: latencia mensaje -> curva_dlr.json en modo streaming
+  - get_prices_once: tiempo total de get_prices_once.main (mercado abierto y cerrado)
+  - gui_update_ui: costo de TradingApp.update_ui (se omite si no hay display)
+  - parser, libro_profundidad, rest_fallback y servidor_sse: los benchmarks de esta carpeta
+
+Todo corre en un directorio temporal (los scripts escriben en el cwd). El
+resultado es un JSON en stdout y, con --salida, en un archivo, para poder
+comparar corridas y detectar regresiones.
+Uso: python benchmarks/run_benchmarks.py [--rapido] [--salida resultados.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+import threading
+import contextlib
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from benchmarks.fake_pyrofex import FakePyRofex
+
+# El fake tiene que estar instalado antes de importar cualquier script del repo
+fake = FakePyRofex().instalar()
+
+
+def percentiles(muestras):
+    ordenadas = sorted(muestras)
+    def p(q):
+        return ordenadas[min(int(q * len(ordenadas)), len(ordenadas) - 1)]
+    return {"p50_ms": round(p(0.5) * 1000, 3), "p95_ms": round(p(0.95) * 1000, 3),
+            "max_ms": round(ordenadas[-1] * 1000, 3), "muestras": len(ordenadas)}
+
+
+def bench_handler_servicio(mensajes):
+    import servicio_dlr
+    lote = []
+    for i in range(mensajes):
+        t = fake.dlr[i % len(fake.dlr)]
+        fake.precios[t] += 0.5 if i % 2 else -0.5
+        lote.append(fake.market_data(t, depth=1))
+    inicio = time.perf_counter()
+    for m in lote:
+        servicio_dlr.market_data_handler(m)
+    total = time.perf_counter() - inicio
+    servicio_dlr.historial.flush()
+    return {"mensajes": mensajes, "mensajes_por_s": round(mensajes / total), "us_por_mensaje": round(total / mensajes * 1e6, 2)}
+
+
+def bench_get_prices_once(mercado_abierto, latencia_rest):
+    import get_prices_once
+    fake.mercado_abierto = mercado_abierto
+    fake.latencia_rest = latencia_rest
+    get_prices_once.current_data.clear()
+    get_prices_once.entradas_recibidas.clear()
+    inicio = time.perf_counter()
+    get_prices_once.main()
+    total = time.perf_counter() - inicio
+    fake.mercado_abierto = True
+    fake.latencia_rest = 0.0
+    return {"mercado_abierto": mercado_abierto, "latencia_rest_s": latencia_rest, "wall_s": round(total, 4)}
+
+
+def bench_publicacion_servicio(muestras):
+    import servicio_dlr
+    publicados = {}
+    evento = threading.Event()
+    publicar_original = servicio_dlr.publicador.publicar
+
+    def publicar_medido(filas, timestamp):
+        cambios = publicar_original(filas, timestamp)
+        for t in cambios:
+            publicados[t] = time.perf_counter()
+        if cambios:
+            evento.set()
+        return cambios
+
+    servicio_dlr.publicador.publicar = publicar_medido
+    threading.Thread(target=servicio_dlr.iniciar_servicio, daemon=True).start()
+    time.sleep(servicio_dlr.PUBLISH_MIN_INTERVAL + 0.5)
+
+    latencias = []
+    ticker = fake.dlr[0]
+    for i in range(muestras):
+        # Ticks espaciados más que PUBLISH_MIN_INTERVAL: mide el camino sin coalescencia
+        time.sleep(servicio_dlr.PUBLISH_MIN_INTERVAL + 0.05)
+        evento.clear()
+        publicados.pop(ticker, None)
+        inicio = time.perf_counter()
+        fake.enviar(ticker, fake.precios[ticker] + 1.0)
+        if evento.wait(timeout=5) and ticker in publicados:
+            latencias.append(publicados[ticker] - inicio)
+    servicio_dlr.publicador.publicar = publicar_original
+    return percentiles(latencias) if latencias else {"error": "sin publicaciones"}
+
+
+def bench_gui(posiciones, repeticiones):
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        return {"omitido": f"Tk no disponible: {e}"}
+    root.withdraw()
+    import gui_app
+    with open("portfolio.json", "w") as f:
+        json.dump({"cash": 1e9, "positions": {f"BONO{i:04d}": 10 for i in range(posiciones)}}, f)
+    app = gui_app.TradingApp(root)
+    for i in range(posiciones):
+        app.on_market_data(fake.market_data(f"BONO{i:04d}", depth=1))
+    root.after = lambda *a, **k: None  # que update_ui no se reprograme durante la medición
+    # Cuadro con todas las posiciones cambiadas vs. cuadro sin cambios (mercado quieto)
+    muestras, inactivo = [], []
+    for r in range(repeticiones):
+        for i in range(posiciones):
+            t = f"BONO{i:04d}"
+            fake.precios[t] += 0.5 if r % 2 else -0.5
+            app.on_market_data(fake.market_data(t, depth=1))
+        inicio = time.perf_counter()
+        app.update_ui()
+        muestras.append(time.perf_counter() - inicio)
+        inicio = time.perf_counter()
+        app.update_ui()
+        inactivo.append(time.perf_counter() - inicio)
+    root.destroy()
+    return {"posiciones": posiciones, **percentiles(muestras),
+            "sin_cambios_p50_ms": percentiles(inactivo)["p50_ms"]}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rapido", action="store_true", help="menos muestras (para CI)")
+    parser.add_argument("--salida", help="archivo JSON donde guardar los resultados")
+    args = parser.parse_args()
+
+    from benchmarks import bench_parser, bench_profundidad, bench_rest_fallback, bench_sse
+
+    salida = os.path.abspath(args.salida) if args.salida else None
+    n = 20000 if args.rapido else 200000
+    resultados = {}
+    cwd = os.getcwd()
+    # Los prints de los scripts van a stderr: stdout queda sólo con el JSON
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(sys.stderr):
+        os.chdir(tmp)
+        try:
+            resultados["parser"] = bench_parser.correr(mensajes=n)
+            resultados["libro_profundidad"] = bench_profundidad.correr(mensajes=n // 2)
+            resultados["rest_fallback"] = bench_rest_fallback.correr(latencia=0.05 if args.rapido else 0.25)
+            resultados["servidor_sse"] = bench_sse.correr(clientes=(100,) if args.rapido else (100, 1000),
+                                                          eventos=20 if args.rapido else 50)
+            resultados["handler_servicio"] = bench_handler_servicio(n // 4)
+            resultados["get_prices_once_abierto"] = bench_get_prices_once(True, 0.0)
+            resultados["get_prices_once_cerrado"] = bench_get_prices_once(False, 0.05)
+            resultados["gui_update_ui"] = bench_gui(posiciones=200, repeticiones=50 if args.rapido else 500)
+            # Último: deja corriendo el loop del servicio en un thread daemon
+            resultados["publicacion_servicio"] = bench_publicacion_servicio(5 if args.rapido else 20)
+        finally:
+            os.chdir(cwd)
+
+    informe = {
+        "fecha": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "resultados": resultados,
+    }
+    texto = json.dumps(informe, indent=2)
+    print(texto)
+    if salida:
+        with open(salida, "w") as f:
+            f.write(texto)
+
+
+if __name__ == "__main__":
+    main()
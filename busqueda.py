@@ -0,0 +1,63 @@
+"""Índice de búsqueda de tickers por subcadena (n-gramas).
+
+Se arma una sola vez por catálogo: para cada n-grama de 1 a `N` caracteres
+guarda la lista (ordenada) de instrumentos que lo contienen. Una consulta toma
+la lista más corta entre sus n-gramas y sólo verifica la subcadena sobre esos
+candidatos, en lugar de recorrer todo el catálogo.
+
+La búsqueda es incremental: si la consulta nueva contiene a la anterior
+(el usuario siguió escribiendo), se filtra el resultado previo.
+"""
+N = 3
+
+class IndiceBusqueda:
+    def __init__(self, categorias):
+        """`categorias`: {categoria: [simbolos en el orden a mostrar]}."""
+        self.simbolos = []
+        self.mayusculas = []
+        self.por_categoria = {}  # categoria -> ids, en el orden del catálogo
+        self.ngramas = {}        # ngrama -> ids crecientes
+        for cat, simbolos in categorias.items():
+            ids = []
+            for s in simbolos:
+                ids.append(len(self.simbolos))
+                self.simbolos.append(s)
+                self.mayusculas.append(s.upper())
+            self.por_categoria[cat] = ids
+        self._posicion = {}  # id -> posición dentro de su categoría (para ordenar resultados)
+        for ids in self.por_categoria.values():
+            for pos, i in enumerate(ids):
+                self._posicion[i] = pos
+        for i, texto in enumerate(self.mayusculas):
+            vistos = set()
+            for n in range(1, N + 1):
+                for k in range(len(texto) - n + 1):
+                    g = texto[k:k + n]
+                    if g not in vistos:
+                        vistos.add(g)
+                        self.ngramas.setdefault(g, []).append(i)
+        self._ultima = None  # (categoria, consulta, ids)
+
+    def _candidatos(self, consulta):
+        if len(consulta) <= N:
+            return self.ngramas.get(consulta, [])
+        listas = [self.ngramas.get(consulta[k:k + N], []) for k in range(len(consulta) - N + 1)]
+        return min(listas, key=len)
+
+    def buscar(self, consulta, categoria):
+        """Símbolos de `categoria` que contienen `consulta` (sin distinguir mayúsculas)."""
+        consulta = consulta.upper()
+        ids_cat = self.por_categoria.get(categoria, [])
+        if not consulta:
+            ids = ids_cat
+        elif self._ultima is not None and self._ultima[0] == categoria and self._ultima[1] in consulta:
+            # Consulta más restrictiva que la anterior: se filtra lo ya encontrado
+            mayusculas = self.mayusculas
+            ids = [i for i in self._ultima[2] if consulta in mayusculas[i]]
+        else:
+            en_categoria = set(ids_cat)
+            mayusculas = self.mayusculas
+            ids = [i for i in self._candidatos(consulta) if i in en_categoria and consulta in mayusculas[i]]
+            ids.sort(key=self._posicion.__getitem__)
+        self._ultima = (categoria, consulta, ids)
+        return [self.simbolos[i] for i in ids]
@@ -0,0 +1,130 @@
+import os
+import json
+import time
+import hashlib
+import threading
+import pyRofex
+import clasificador
+from curvas import es_mensual, armar_curvas
+
+# Catálogo de instrumentos compartido por todos los scripts.
+# get_all_instruments() devuelve miles de instrumentos: se descarga una vez,
+# se guarda en disco y se reutiliza mientras no venza el TTL.
+CACHE_DIR = ".cache"
+CATALOGO_FILE = os.path.join(CACHE_DIR, "catalogo_instrumentos.json")
+CLASIFICACION_FILE = os.path.join(CACHE_DIR, "clasificacion_instrumentos.json")
+CATALOGO_TTL = 12 * 3600  # 12 horas: los vencimientos nuevos aparecen de un día para otro
+
+def es_dlr_mensual(s):
+    """DLR/MMMAA exacto (sin sufijos A/M, pases, spot ni espacios)."""
+    return es_mensual(s, "DLR")
+
+class Catalogo:
+    """Listado de instrumentos con índices precalculados (curvas de futuros, bonos, categorías).
+
+    Las categorías se calculan recién cuando alguien las pide, y se leen del
+    cache en disco si el catálogo no cambió (ver clasificador.py).
+    """
+
+    def __init__(self, instrumentos, actualizado):
+        self.instrumentos = instrumentos
+        self.actualizado = actualizado
+        self.simbolos = [inst['instrumentId']['symbol'] for inst in instrumentos]
+        self.version = hashlib.sha1("\n".join(sorted(self.simbolos)).encode()).hexdigest()[:12]
+
+        self.curvas = armar_curvas(self.simbolos)  # {subyacente: [contratos mensuales]}
+        self.dlr_mensuales = self.curvas["DLR"]
+        self._categorias = None
+
+    @property
+    def categorias(self):
+        if self._categorias is None:
+            self._categorias = clasificador.indice_categorias(self.instrumentos, self.version, CLASIFICACION_FILE)
+        return self._categorias
+
+    @property
+    def bonos(self):
+        return self.por_categoria(clasificador.BONOS)
+
+    def vigente(self, ttl=CATALOGO_TTL):
+        return time.time() - self.actualizado < ttl
+
+    def por_categoria(self, categoria):
+        return self.categorias.get(categoria, [])
+
+    @classmethod
+    def descargar(cls):
+        res = pyRofex.get_all_instruments()
+        if res['status'] != 'OK':
+            raise RuntimeError(f"No se pudo obtener la lista de instrumentos: {res}")
+        return cls(res['instruments'], time.time())
+
+    @classmethod
+    def leer(cls, ruta=CATALOGO_FILE):
+        if not os.path.exists(ruta):
+            return None
+        try:
+            with open(ruta, "r") as f:
+                data = json.load(f)
+            return cls(data["instrumentos"], data["actualizado"])
+        except Exception as e:
+            print(f"⚠️ Cache de instrumentos inválido, se descarga de nuevo: {e}")
+            return None
+
+    def guardar(self, ruta=CATALOGO_FILE):
+        os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+        tmp = ruta + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"actualizado": self.actualizado, "instrumentos": self.instrumentos}, f)
+        os.replace(tmp, ruta)
+
+_catalogo = None
+_lock = threading.Lock()
+_refrescando = threading.Event()
+# Con una sesión reproducida (o un feed simulado) el catálogo trae sólo los símbolos
+# de esa sesión: no se lee ni se escribe el cache en disco que usan las corridas reales
+_cache_en_disco = True
+
+def desactivar_cache_disco():
+    global _cache_en_disco, _catalogo
+    _cache_en_disco = False
+    _catalogo = None
+
+def _refrescar():
+    global _catalogo
+    try:
+        nuevo = Catalogo.descargar()
+        if _cache_en_disco:
+            nuevo.guardar()
+        _catalogo = nuevo
+    except Exception as e:
+        print(f"⚠️ No se pudo refrescar el catálogo de instrumentos: {e}")
+    finally:
+        _refrescando.clear()
+
+def obtener_catalogo(ttl=CATALOGO_TTL, forzar=False, en_segundo_plano=False):
+    """Devuelve el catálogo compartido (requiere pyRofex inicializado si hay que descargarlo).
+
+    - Vigente en memoria o en disco: se usa sin tocar la API.
+    - Vencido: se descarga en el momento (si falla, se usa el vencido). Con
+      `en_segundo_plano` (procesos que siguen corriendo: servicio, GUI) se
+      devuelve el cache y se refresca en otro thread; un script corto
+      terminaría antes y el cache quedaría vencido para siempre.
+    - Sin cache (o `forzar`): se descarga en el momento.
+    """
+    global _catalogo
+    with _lock:
+        if _catalogo is None and not forzar and _cache_en_disco:
+            _catalogo = Catalogo.leer()
+
+        if _catalogo is None or forzar:
+            _catalogo = Catalogo.descargar()
+            if _cache_en_disco:
+                _catalogo.guardar()
+        elif not _catalogo.vigente(ttl) and not _refrescando.is_set():
+            _refrescando.set()
+            if en_segundo_plano:
+                threading.Thread(target=_refrescar, daemon=True).start()
+            else:
+                _refrescar()
+        return _catalogo
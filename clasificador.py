@@ -0,0 +1,138 @@
+"""Clasificación de instrumentos por categoría (la que muestran la GUI y los scripts).
+
+Usa lo que devuelve get_all_instruments: símbolo, mercado y código CFI (ese
+endpoint no informa segmento ni fecha de vencimiento; el vencimiento de los
+futuros mensuales sale del símbolo). Las reglas se compilan una vez y se
+evalúan en orden: gana la primera que coincide. Los instrumentos sin
+código CFI (caches viejos) se clasifican por el símbolo, como antes.
+
+El índice resultante se guarda en disco junto con la versión del catálogo y
+de las reglas: mientras ninguna cambie, se lee sin reclasificar nada.
+"""
+import os
+import re
+import json
+from collections import defaultdict
+
+from curvas import sort_key
+
+# Subir al cambiar REGLAS (o el orden): invalida los índices guardados
+REGLAS_VERSION = 2
+
+DOLAR_FUTURO = "Dólar Futuro"
+COMMODITIES = "Commodities (Futuros)"
+INDICES = "Índices (Futuros)"
+OPCIONES = "Opciones"
+OTROS_FUTUROS = "Otros Futuros"
+BONOS = "Bonos / TVPP"
+CEDEARS = "CEDEARs"
+ACCIONES = "Acciones"
+ACCIONES_OTROS = "Acciones/Otros"
+OTROS = "Otros"
+
+class Regla:
+    """Condiciones (regex) sobre los campos de un instrumento; todas deben cumplirse."""
+    __slots__ = ("categoria", "condiciones")
+
+    def __init__(self, categoria, cfi=None, simbolo=None, mercado=None):
+        self.categoria = categoria
+        self.condiciones = tuple((campo, re.compile(patron))
+                                 for campo, patron in (("cfi", cfi), ("simbolo", simbolo), ("mercado", mercado))
+                                 if patron is not None)
+
+    def aplica(self, campos):
+        for campo, regex in self.condiciones:
+            valor = campos.get(campo)
+            if valor is None or regex.search(valor) is None:
+                return False
+        return True
+
+# CFI (ISO 10962): F = futuros, O = opciones, D = deuda, ES = acciones, EM = CEDEARs
+REGLAS = (
+    Regla(DOLAR_FUTURO, simbolo=r"^DLR/"),
+    Regla(OPCIONES, cfi=r"^O"),
+    Regla(COMMODITIES, cfi=r"^F", simbolo=r"ORO|WTI|SOJ|MAI|TRI"),
+    Regla(INDICES, cfi=r"^F", simbolo=r"(?i)RFX20"),
+    Regla(OTROS_FUTUROS, cfi=r"^F"),
+    Regla(CEDEARS, cfi=r"^EM"),
+    Regla(ACCIONES, cfi=r"^E"),
+    Regla(BONOS, cfi=r"^D"),
+)
+
+_CEDEARS_CONOCIDOS = ('AAPL', 'TSLA', 'AMZN', 'BABA', 'KO')
+
+def categorizar_por_simbolo(symbol):
+    """Criterio anterior, sólo con el símbolo (para instrumentos sin código CFI)."""
+    if symbol.startswith('DLR/'):
+        return DOLAR_FUTURO
+    elif '/' in symbol:
+        if any(x in symbol for x in ['ORO', 'WTI', 'SOJ', 'MAI', 'TRI']):
+            return COMMODITIES
+        elif ' RFX20' in symbol or ' rfx20' in symbol:
+            return INDICES
+        elif ' C ' in symbol or ' P ' in symbol or symbol.startswith('O'):
+            return OPCIONES
+        else:
+            return OTROS_FUTUROS
+    elif any(c.isdigit() for c in symbol) and not symbol.startswith('RFX'):
+        return BONOS
+    elif 'MERV - XMEV -' in symbol:
+        if ' - CI' in symbol or ' - 24hs' in symbol:
+            if any(ced in symbol for ced in _CEDEARS_CONOCIDOS):
+                return CEDEARS
+            return ACCIONES
+        return ACCIONES_OTROS
+    return OTROS
+
+def campos(inst):
+    """Campos de un instrumento que usan las reglas (None si la API no los informa)."""
+    return {
+        "simbolo": inst["instrumentId"]["symbol"],
+        "mercado": inst["instrumentId"].get("marketId"),
+        "cfi": inst.get("cficode"),
+    }
+
+def categorizar(inst):
+    c = campos(inst)
+    if c["cfi"] is None:
+        return categorizar_por_simbolo(c["simbolo"])
+    for regla in REGLAS:
+        if regla.aplica(c):
+            return regla.categoria
+    return OTROS
+
+def clasificar(instrumentos):
+    """{categoria: [simbolos]}; los que tienen mes en el símbolo (/MMMAA) van por vencimiento, el resto alfabético."""
+    categorias = defaultdict(list)
+    for inst in instrumentos:
+        symbol = inst["instrumentId"]["symbol"]
+        categorias[categorizar(inst)].append((sort_key(symbol), symbol))
+    return {cat: [s for _, s in sorted(items)] for cat, items in categorias.items()}
+
+def leer_indice(ruta, version):
+    try:
+        with open(ruta, "r") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("catalogo") != version or data.get("reglas") != REGLAS_VERSION:
+        return None
+    return data["categorias"]
+
+def guardar_indice(ruta, version, categorias):
+    os.makedirs(os.path.dirname(ruta) or ".", exist_ok=True)
+    tmp = ruta + ".tmp"
+    with open(tmp, "w") as f:
+        json.dump({"catalogo": version, "reglas": REGLAS_VERSION, "categorias": categorias}, f)
+    os.replace(tmp, ruta)
+
+def indice_categorias(instrumentos, version, ruta):
+    """Índice de categorías del catálogo `version`: del disco si está, si no se calcula y se guarda."""
+    categorias = leer_indice(ruta, version)
+    if categorias is None:
+        categorias = clasificar(instrumentos)
+        try:
+            guardar_indice(ruta, version, categorias)
+        except OSError as e:
+            print(f"⚠️ No se pudo guardar la clasificación de instrumentos: {e}")
+    return categorias
@@ -0,0 +1,122 @@
+"""Modelo de cotización compartido y parser de mensajes de Market Data.
+
+Todos los handlers (WebSocket y REST) usan el mismo `LibroCotizaciones`: cada
+mensaje actualiza *en el lugar* la `Cotizacion` del ticker, sin crear dicts
+nuevos. El dato faltante es `SIN_DATO` (None), nunca un string; "S/D" queda
+sólo para mostrar en pantalla o escribir el JSON público (ver `a_json`).
+"""
+
+SIN_DATO = None
+TEXTO_SIN_DATO = "S/D"
+
+def a_json(valor):
+    """Valor para el JSON público: mantiene el "S/D" que esperan los consumidores."""
+    return TEXTO_SIN_DATO if valor is None else valor
+
+def a_texto(valor, fmt="{}"):
+    return TEXTO_SIN_DATO if valor is None else fmt.format(valor)
+
+class Cotizacion:
+    """Top of book de un instrumento. Precios numéricos o SIN_DATO."""
+    __slots__ = ("symbol", "bid", "bid_size", "offer", "offer_size", "last", "last_size", "timestamp")
+
+    def __init__(self, symbol):
+        self.symbol = symbol
+        self.bid = SIN_DATO
+        self.bid_size = SIN_DATO
+        self.offer = SIN_DATO
+        self.offer_size = SIN_DATO
+        self.last = SIN_DATO
+        self.last_size = SIN_DATO
+        self.timestamp = SIN_DATO  # ms epoch informado por el mercado
+
+    def aplicar(self, md):
+        """Actualiza con el bloque `marketData` de un mensaje (WS o REST).
+
+        Sólo se tocan las entradas presentes en el mensaje; una entrada
+        presente pero vacía (mercado sin puntas) pasa a SIN_DATO.
+        """
+        if "BI" in md:
+            puntas = md["BI"]
+            if puntas:
+                top = puntas[0]
+                self.bid = top["price"]
+                self.bid_size = top.get("size")
+            else:
+                self.bid = self.bid_size = SIN_DATO
+        if "OF" in md:
+            puntas = md["OF"]
+            if puntas:
+                top = puntas[0]
+                self.offer = top["price"]
+                self.offer_size = top.get("size")
+            else:
+                self.offer = self.offer_size = SIN_DATO
+        if "LA" in md:
+            last = md["LA"]
+            if last and last.__class__ is dict:
+                self.last = last["price"]
+                self.last_size = last.get("size")
+            else:
+                self.last = self.last_size = SIN_DATO
+
+    def a_dict(self):
+        """Formato del JSON público (curva_dlr.json)."""
+        return {"bid": a_json(self.bid), "offer": a_json(self.offer), "last": a_json(self.last)}
+
+    def __repr__(self):
+        return f"Cotizacion({self.symbol!r}, bid={self.bid}, offer={self.offer}, last={self.last})"
+
+class LibroCotizaciones(dict):
+    """Diccionario {ticker: Cotizacion} que se actualiza con mensajes de pyRofex."""
+
+    def cotizacion(self, symbol):
+        q = self.get(symbol)
+        if q is None:
+            q = self[symbol] = Cotizacion(symbol)
+        return q
+
+    def actualizar(self, message):
+        """Handler de WebSocket: parsea el mensaje y devuelve la Cotizacion actualizada.
+
+        Es el camino caliente: repite la lógica de `Cotizacion.aplicar` en
+        línea para ahorrar la llamada extra por mensaje.
+        """
+        symbol = message["instrumentId"]["symbol"]
+        q = self.get(symbol)
+        if q is None:
+            q = self[symbol] = Cotizacion(symbol)
+        md = message["marketData"]
+        puntas = md.get("BI", q)
+        if puntas is not q:
+            if puntas:
+                top = puntas[0]
+                q.bid = top["price"]
+                q.bid_size = top.get("size")
+            else:
+                q.bid = q.bid_size = SIN_DATO
+        puntas = md.get("OF", q)
+        if puntas is not q:
+            if puntas:
+                top = puntas[0]
+                q.offer = top["price"]
+                q.offer_size = top.get("size")
+            else:
+                q.offer = q.offer_size = SIN_DATO
+        last = md.get("LA", q)
+        if last is not q:
+            if last and last.__class__ is dict:
+                q.last = last["price"]
+                q.last_size = last.get("size")
+            else:
+                q.last = q.last_size = SIN_DATO
+        q.timestamp = message.get("timestamp")
+        return q
+
+    def actualizar_rest(self, symbol, respuesta):
+        """Aplica la respuesta de pyRofex.get_market_data. Devuelve la Cotizacion o None."""
+        if respuesta.get("status") != "OK":
+            return None
+        q = self.cotizacion(symbol)
+        q.aplicar(respuesta.get("marketData") or {})
+        return q
@@ -0,0 +1,73 @@
+"""Curvas de futuros mensuales por subyacente (DLR, ORO, WTI, SOJ, MAI, TRI, RFX20).
+
+Un contrato mensual es `<prefijo>/<MMM><AA>` (ej: DLR/ENE27, SOJ.ROS/MAY26,
+RFX20/MAR26). Todo lo demás queda afuera por construcción de la regex: las
+variantes con sufijo (DLR/NOV26A, DLR/NOV26M), los pases (DLR/NOV26/DIC26),
+los spot y los símbolos con espacios.
+
+Una sola regex compilada separa prefijo, mes y año de cualquier símbolo, así
+que todas las curvas se arman en una pasada sobre el catálogo. El vencimiento
+(año, mes) de cada ticker se parsea una vez y queda cacheado.
+"""
+import re
+from functools import lru_cache
+
+MESES = ("ENE", "FEB", "MAR", "ABR", "MAY", "JUN", "JUL", "AGO", "SEP", "OCT", "NOV", "DIC")
+MONTHS_MAP = {m: i for i, m in enumerate(MESES, 1)}
+
+# Subyacente -> prefijos de símbolo que lo representan (los agrícolas cotizan como SOJ.ROS, etc.)
+SUBYACENTES = {
+    "DLR": ("DLR",),
+    "ORO": ("ORO",),
+    "WTI": ("WTI",),
+    "SOJ": ("SOJ.ROS", "SOJ"),
+    "MAI": ("MAI.ROS", "MAI"),
+    "TRI": ("TRI.ROS", "TRI"),
+    "RFX20": ("RFX20",),
+}
+_POR_PREFIJO = {p: s for s, prefijos in SUBYACENTES.items() for p in prefijos}
+
+_MENSUAL = re.compile(r"^(?P<prefijo>[A-Z0-9.]+)/(?P<mes>" + "|".join(MESES) + r")(?P<anio>\d{2})$")
+_MES_ANIO = re.compile(r"/(" + "|".join(MESES) + r")(\d{2})")
+
+@lru_cache(maxsize=None)
+def vencimiento_mes(ticker):
+    """(año, mes) del primer tramo /MMMAA del ticker, o None (ej: DLR/ENE27 -> (2027, 1))."""
+    m = _MES_ANIO.search(ticker)
+    if m is None:
+        return None
+    return 2000 + int(m.group(2)), MONTHS_MAP[m.group(1)]
+
+def sort_key(ticker):
+    """Orden cronológico por vencimiento (AAMM); 0 si el ticker no tiene mes."""
+    v = vencimiento_mes(ticker)
+    return 0 if v is None else (v[0] - 2000) * 100 + v[1]
+
+@lru_cache(maxsize=None)
+def subyacente(simbolo):
+    """Subyacente de un contrato mensual (ej: "SOJ.ROS/MAY26" -> "SOJ"), o None si no lo es."""
+    m = _MENSUAL.match(simbolo)
+    return _POR_PREFIJO.get(m.group("prefijo")) if m else None
+
+def es_mensual(simbolo, nombre="DLR"):
+    return subyacente(simbolo) == nombre
+
+def armar_curvas(simbolos, nombres=None):
+    """{subyacente: [tickers mensuales ordenados por vencimiento]} en una pasada.
+
+    `nombres` limita los subyacentes (por defecto, todos los de SUBYACENTES);
+    los que no tienen contratos quedan con lista vacía.
+    """
+    nombres = tuple(nombres or SUBYACENTES)
+    curvas = {n: [] for n in nombres}
+    for s in simbolos:
+        n = subyacente(s)
+        if n in curvas:
+            curvas[n].append(s)
+    for tickers in curvas.values():
+        tickers.sort(key=lambda t: (sort_key(t), t))
+    return curvas
+
+def archivo_curva(nombre):
+    """Archivo publicado de cada curva: curva_dlr.json, curva_oro.json, ..."""
+    return f"curva_{nombre.lower()}.json"
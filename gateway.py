@@ -0,0 +1,503 @@
+"""Gateway local de Market Data: un solo login y un solo WebSocket por host.
+
+El proceso gateway es el único que llama a `pyRofex.initialize` y abre el
+WebSocket. Publica el top of book de cada instrumento suscripto en un bloque
+de `multiprocessing.shared_memory`:
+
+    encabezado  int64[4]          magic, capacidad, slots usados, -
+    seq         uint64[capacidad] versión de cada slot (seqlock)
+    datos       float64[capacidad, 7]  bid, bid_size, offer, offer_size, last, last_size, timestamp
+    nombres     S32[capacidad]    símbolo de cada slot (los slots no se reusan)
+
+Un símbolo recibe slot recién con su primer mensaje de market data: pedir un
+ticker inexistente o mal escrito no ocupa lugar en el bloque.
+
+Sin dato = NaN. Seqlock: el gateway (único escritor) pone `seq` impar, escribe
+la fila y la vuelve a poner par; un lector copia la fila y la descarta si
+`seq` era impar o cambió mientras leía. Los clientes leen directo de la
+memoria compartida, sin pasar por el socket ni serializar.
+
+Las suscripciones (y las llamadas REST, que también usan la sesión del
+gateway) se piden por un socket local de `multiprocessing.connection`. Cada
+cliente es una "fuente" del GestorSuscripciones: un ticker sigue suscripto
+mientras algún cliente lo use.
+
+    python gateway.py                          # levanta el gateway (credenciales del .env)
+    GATEWAY_MD=1 python gui_app.py             # cualquier script, vía el gateway
+    GATEWAY_MD=127.0.0.1:6061 python servicio_dlr.py
+
+El socket sólo escucha en loopback (o en un socket Unix) y exige clave: la de
+GATEWAY_CLAVE o, si no está definida, una aleatoria que el gateway genera al
+arrancar en CLAVE_ARCHIVO (permisos 0600, sólo la lee el mismo usuario).
+
+Con GATEWAY_MD los scripts no cambian: `FeedGateway` reemplaza las funciones
+de pyRofex que usan (como la reproducción de sesiones de sesiones.py). El
+feed compartido sólo tiene el mejor nivel de cada lado (depth=1).
+"""
+import os
+import time
+import secrets
+import tempfile
+import ipaddress
+import threading
+from multiprocessing import shared_memory
+from multiprocessing.connection import Listener, Client
+
+import numpy as np
+import pyRofex
+from dotenv import load_dotenv
+
+from cotizaciones import Cotizacion, LibroCotizaciones
+from suscripciones import GestorSuscripciones
+
+MAGIC = 0x444C5231  # "DLR1"
+CAPACIDAD = 1024
+ANCHO_NOMBRE = 32
+CAMPOS = ("bid", "bid_size", "offer", "offer_size", "last", "last_size", "timestamp")
+NOMBRE_SHM = os.getenv("GATEWAY_SHM", "precios_dlr_md")
+DIRECCION = ("127.0.0.1", 6061)
+CLAVE_ARCHIVO = os.getenv("GATEWAY_CLAVE_ARCHIVO", os.path.join(os.path.expanduser("~"), ".precios_dlr_gateway.clave"))
+INTERVALO_SONDEO = 0.02  # cada cuánto los clientes buscan slots con versión nueva
+ENTRIES = [pyRofex.MarketDataEntry.BIDS, pyRofex.MarketDataEntry.OFFERS, pyRofex.MarketDataEntry.LAST]
+# Llamadas REST que el gateway hace en nombre de los clientes
+REST_PERMITIDAS = {"get_all_instruments", "get_detailed_instruments", "get_market_data", "get_account_report"}
+
+_NAN = float("nan")
+_CREADOS = set()  # bloques creados por este proceso (ya registrados en su resource_tracker)
+
+def direccion_desde_texto(texto):
+    """"1" -> DIRECCION; "host:puerto" -> (host, puerto); una ruta -> socket Unix."""
+    if not texto or texto == "1":
+        return DIRECCION
+    if "/" in texto:
+        return texto
+    host, _, puerto = texto.rpartition(":")
+    return (host or DIRECCION[0], int(puerto))
+
+def clave_gateway(crear=False, archivo=CLAVE_ARCHIVO):
+    """Clave de autenticación del socket: GATEWAY_CLAVE, o la del archivo que escribe el gateway.
+
+    Con `crear` (el gateway) se genera una clave nueva y se escribe en `archivo`
+    con permisos 0600 (mkstemp + os.replace, nunca queda legible para otros).
+    """
+    clave = os.getenv("GATEWAY_CLAVE")
+    if clave:
+        return clave.encode()
+    if crear:
+        clave = secrets.token_hex(32)
+        fd, tmp = tempfile.mkstemp(prefix=".tmp_", dir=os.path.dirname(os.path.abspath(archivo)))
+        with os.fdopen(fd, "w") as f:
+            f.write(clave)
+        os.replace(tmp, archivo)
+        return clave.encode()
+    try:
+        with open(archivo) as f:
+            return f.read().strip().encode()
+    except FileNotFoundError:
+        raise RuntimeError(f"No hay clave del gateway en {archivo}: levantá gateway.py o definí GATEWAY_CLAVE") from None
+
+def validar_direccion(direccion):
+    """Sólo loopback o socket Unix: el gateway maneja la sesión del broker."""
+    if isinstance(direccion, str):
+        return direccion
+    host = direccion[0]
+    try:
+        local = host == "localhost" or ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        local = False
+    if not local:
+        raise ValueError(f"El gateway sólo escucha en loopback, no en {host}")
+    return direccion
+
+class MemoriaCotizaciones:
+    """Vista NumPy sobre el bloque compartido. Ver el layout en el docstring del módulo."""
+
+    def __init__(self, shm, duenio):
+        self.shm = shm
+        self.duenio = duenio
+        encabezado = np.ndarray((4,), dtype=np.int64, buffer=shm.buf)
+        if encabezado[0] != MAGIC:
+            raise RuntimeError(f"{shm.name} no es un bloque de cotizaciones del gateway")
+        self.capacidad = cap = int(encabezado[1])
+        self.encabezado = encabezado
+        offset = encabezado.nbytes
+        self.seq = np.ndarray((cap,), dtype=np.uint64, buffer=shm.buf, offset=offset)
+        offset += self.seq.nbytes
+        self.datos = np.ndarray((cap, len(CAMPOS)), dtype=np.float64, buffer=shm.buf, offset=offset)
+        offset += self.datos.nbytes
+        self.nombres = np.ndarray((cap,), dtype=f"S{ANCHO_NOMBRE}", buffer=shm.buf, offset=offset)
+        self.indice = {}  # símbolo -> slot
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def tamanio(capacidad):
+        return 4 * 8 + capacidad * (8 + 8 * len(CAMPOS) + ANCHO_NOMBRE)
+
+    @classmethod
+    def crear(cls, nombre=NOMBRE_SHM, capacidad=CAPACIDAD):
+        try:
+            shm = shared_memory.SharedMemory(name=nombre, create=True, size=cls.tamanio(capacidad))
+        except FileExistsError:
+            # Bloque de un gateway anterior que terminó mal
+            viejo = shared_memory.SharedMemory(name=nombre)
+            viejo.close()
+            viejo.unlink()
+            shm = shared_memory.SharedMemory(name=nombre, create=True, size=cls.tamanio(capacidad))
+        _CREADOS.add(nombre)
+        encabezado = np.ndarray((4,), dtype=np.int64, buffer=shm.buf)
+        encabezado[:] = (MAGIC, capacidad, 0, 0)
+        memoria = cls(shm, duenio=True)
+        memoria.datos[:] = np.nan
+        return memoria
+
+    @classmethod
+    def abrir(cls, nombre=NOMBRE_SHM):
+        try:
+            shm = shared_memory.SharedMemory(name=nombre, track=False)
+        except TypeError:
+            # Python < 3.13: el resource_tracker del cliente borraría el bloque al salir
+            from multiprocessing import resource_tracker
+            shm = shared_memory.SharedMemory(name=nombre)
+            if nombre not in _CREADOS:
+                resource_tracker.unregister(shm._name, "shared_memory")
+        return cls(shm, duenio=False)
+
+    # --- Escritor (gateway) ---
+    def slot(self, symbol):
+        """Slot de `symbol`, asignándolo si no tiene. El nombre se escribe antes de publicar el conteo."""
+        i = self.indice.get(symbol)
+        if i is not None:
+            return i
+        with self._lock:
+            i = self.indice.get(symbol)
+            if i is None:
+                i = int(self.encabezado[2])
+                if i == self.capacidad:
+                    raise RuntimeError(f"Gateway lleno ({self.capacidad} instrumentos)")
+                self.nombres[i] = symbol.encode()[:ANCHO_NOMBRE]
+                self.encabezado[2] = i + 1
+                self.indice[symbol] = i
+        return i
+
+    def escribir(self, i, q):
+        seq = self.seq
+        seq[i] += 1  # impar: escritura en curso
+        self.datos[i] = (_NAN if q.bid is None else q.bid, _NAN if q.bid_size is None else q.bid_size,
+                         _NAN if q.offer is None else q.offer, _NAN if q.offer_size is None else q.offer_size,
+                         _NAN if q.last is None else q.last, _NAN if q.last_size is None else q.last_size,
+                         _NAN if q.timestamp is None else q.timestamp)
+        seq[i] += 1
+
+    # --- Lectores (clientes) ---
+    def actualizar_indice(self):
+        n = int(self.encabezado[2])
+        if n != len(self.indice):
+            for i in range(len(self.indice), n):
+                self.indice[self.nombres[i].decode()] = i
+        return self.indice
+
+    def leer(self, i, intentos=1000):
+        """Fila del slot i como tupla de floats, o None si todavía no tiene datos."""
+        seq, datos = self.seq, self.datos
+        for _ in range(intentos):
+            antes = int(seq[i])
+            if antes & 1:
+                time.sleep(0)  # escritura en curso: ceder el turno
+                continue
+            fila = tuple(datos[i].tolist())
+            if int(seq[i]) == antes:
+                return fila if antes else None
+        raise RuntimeError(f"Slot {i}: no se pudo leer una versión estable")
+
+    def cotizacion(self, symbol):
+        """Cotizacion del símbolo (o None si no está en el gateway o no tiene datos)."""
+        i = self.indice.get(symbol)
+        if i is None:
+            i = self.actualizar_indice().get(symbol)
+            if i is None:
+                return None
+        fila = self.leer(i)
+        if fila is None:
+            return None
+        q = Cotizacion(symbol)
+        for campo, valor in zip(CAMPOS, fila):
+            if valor == valor:  # NaN = sin dato
+                setattr(q, campo, int(valor) if campo == "timestamp" else valor)
+        return q
+
+    def close(self):
+        # Las vistas NumPy apuntan al buffer: hay que soltarlas antes de cerrar
+        self.encabezado = self.seq = self.datos = self.nombres = None
+        self.shm.close()
+        if self.duenio:
+            self.shm.unlink()
+            _CREADOS.discard(self.shm.name)
+
+class Gateway:
+    def __init__(self, api=None, direccion=DIRECCION, clave=None, nombre_shm=NOMBRE_SHM,
+                 capacidad=CAPACIDAD, entries=ENTRIES):
+        validar_direccion(direccion)
+        clave = clave or clave_gateway(crear=True)
+        self.api = api or pyRofex
+        self.memoria = MemoriaCotizaciones.crear(nombre_shm, capacidad)
+        self.libro = LibroCotizaciones()
+        self.suscripciones = GestorSuscripciones(self.libro, entries, maximo=capacidad, api=self.api)
+        self.listener = Listener(direccion, authkey=clave)
+        self.direccion = self.listener.address
+        self.clientes = 0
+        self.mensajes = 0
+        self.sin_lugar = 0  # mensajes descartados con el bloque lleno
+        self._cerrado = threading.Event()
+
+    def on_market_data(self, message):
+        q = self.libro.actualizar(message)
+        try:
+            i = self.memoria.slot(q.symbol)
+        except RuntimeError as e:
+            # Corre en el thread del WebSocket: no puede propagar
+            if not self.sin_lugar:
+                print(f"❌ {e}: se descartan los instrumentos nuevos")
+            self.sin_lugar += 1
+            return
+        self.memoria.escribir(i, q)
+        self.mensajes += 1
+
+    def on_error(self, message):
+        print(f"❌ Error: {message}")
+
+    def on_exception(self, e):
+        print(f"⚠️ Conexión WebSocket interrumpida: {e}. Reconectando...")
+        threading.Thread(target=self.suscripciones.reconectar, daemon=True).start()
+
+    def iniciar(self):
+        self.suscripciones.conectar(market_data_handler=self.on_market_data,
+                                    error_handler=self.on_error, exception_handler=self.on_exception)
+        threading.Thread(target=self._aceptar, name="gateway-accept", daemon=True).start()
+        return self
+
+    def _aceptar(self):
+        while not self._cerrado.is_set():
+            try:
+                conn = self.listener.accept()
+            except Exception:
+                if self._cerrado.is_set():
+                    return
+                continue  # clave incorrecta o conexión cortada
+            self.clientes += 1
+            threading.Thread(target=self._atender, args=(conn, f"cliente-{self.clientes}"), daemon=True).start()
+
+    def _atender(self, conn, fuente):
+        try:
+            while True:
+                try:
+                    op, args = conn.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    conn.send(("ok", self._ejecutar(fuente, op, args)))
+                except Exception as e:
+                    conn.send(("error", str(e)))
+        finally:
+            self.suscripciones.fijar(fuente, [])
+            conn.close()
+
+    def _ejecutar(self, fuente, op, args):
+        if op == "hola":
+            return {"shm": self.memoria.shm.name}
+        if op == "suscribir":
+            tickers = list(args[0])
+            self.suscripciones.fijar(fuente, tickers)
+            # Los que todavía no tienen slot lo reciben con su primer dato
+            return {t: self.memoria.indice.get(t) for t in tickers}
+        if op == "rest":
+            nombre, posicionales, nombrados = args
+            if nombre not in REST_PERMITIDAS:
+                raise ValueError(f"{nombre} no está permitida por el gateway")
+            return getattr(self.api, nombre)(*posicionales, **nombrados)
+        raise ValueError(f"Operación desconocida: {op}")
+
+    def close(self):
+        self._cerrado.set()
+        self.listener.close()
+        try:
+            self.api.close_websocket_connection()
+        except Exception:
+            pass
+        self.memoria.close()
+
+class ClienteGateway:
+    """Conexión de un proceso cliente: pide suscripciones por el socket y lee de la memoria compartida."""
+
+    def __init__(self, direccion=DIRECCION, clave=None):
+        self._conn = Client(direccion, authkey=clave or clave_gateway())
+        self._lock = threading.Lock()  # un pedido a la vez por conexión
+        self.memoria = MemoriaCotizaciones.abrir(self._pedir("hola")["shm"])
+        self.suscriptos = {}  # ticker -> slot (None hasta que llega su primer dato)
+        self.cambios = 0      # se incrementa con cada cambio de suscripción
+
+    def _pedir(self, op, *args):
+        with self._lock:
+            self._conn.send((op, args))
+            estado, valor = self._conn.recv()
+        if estado == "error":
+            raise RuntimeError(valor)
+        return valor
+
+    def suscribir(self, tickers):
+        nuevos = [t for t in tickers if t not in self.suscriptos]
+        if nuevos:
+            self.suscriptos.update(self._pedir("suscribir", list(self.suscriptos) + nuevos))
+            self.cambios += 1
+        return self.suscriptos
+
+    def desuscribir(self):
+        self.suscriptos = {}
+        self.cambios += 1
+        self._pedir("suscribir", [])
+
+    def slot(self, ticker):
+        i = self.suscriptos.get(ticker)
+        if i is None and ticker in self.suscriptos:
+            i = self.suscriptos[ticker] = self.memoria.actualizar_indice().get(ticker)
+        return i
+
+    def rest(self, nombre, *args, **kwargs):
+        return self._pedir("rest", nombre, args, kwargs)
+
+    def cotizacion(self, ticker):
+        return self.memoria.cotizacion(ticker)
+
+    def esperar(self, tickers, timeout=5.0):
+        """Espera a que los tickers tengan un primer dato. Devuelve los que siguen sin datos."""
+        limite = time.monotonic() + timeout
+        pendientes = list(tickers)
+        while pendientes:
+            pendientes = [t for t in pendientes if self.slot(t) is None or self.memoria.seq[self.slot(t)] == 0]
+            if not pendientes or time.monotonic() >= limite:
+                break
+            time.sleep(INTERVALO_SONDEO)
+        return pendientes
+
+    def close(self):
+        try:
+            self._conn.close()
+        finally:
+            self.memoria.close()
+
+def _mensaje(q):
+    """Cotizacion -> mensaje con el formato del WebSocket de pyRofex (un nivel por lado)."""
+    return {"type": "Md", "timestamp": q.timestamp,
+            "instrumentId": {"marketId": "ROFX", "symbol": q.symbol},
+            "marketData": {"BI": [{"price": q.bid, "size": q.bid_size}] if q.bid is not None else [],
+                           "OF": [{"price": q.offer, "size": q.offer_size}] if q.offer is not None else [],
+                           "LA": {"price": q.last, "size": q.last_size} if q.last is not None else None}}
+
+class FeedGateway(ClienteGateway):
+    """Reemplaza las funciones de pyRofex que usan los scripts por el gateway.
+
+    Un thread compara las versiones (`seq`) de los slots suscriptos cada
+    INTERVALO_SONDEO y entrega al market_data_handler un mensaje por cada
+    slot que cambió (si hubo varias escrituras entre dos sondeos, llega la última).
+    """
+
+    def __init__(self, direccion=DIRECCION, clave=None):
+        super().__init__(direccion, clave)
+        self.handler = None
+        self.exception_handler = None
+        self._vistos = {}
+        self._thread = None
+        self._activo = threading.Event()
+
+    def _sondear(self):
+        slots = np.empty(0, dtype=np.int64)
+        tickers = []
+        vistos = np.empty(0, dtype=np.uint64)
+        version = None
+        while self._activo.is_set():
+            # Se rearma al cambiar la suscripción o al asignarse slots nuevos en el gateway
+            if version != (self.cambios, int(self.memoria.encabezado[2])):
+                version = (self.cambios, int(self.memoria.encabezado[2]))
+                tickers = [t for t in list(self.suscriptos) if self.slot(t) is not None]
+                slots = np.array([self.suscriptos[t] for t in tickers], dtype=np.int64)
+                vistos = np.array([self._vistos.get(t, 0) for t in tickers], dtype=np.uint64)
+            actuales = self.memoria.seq[slots]
+            for k in np.flatnonzero((actuales != vistos) & (actuales % 2 == 0)):
+                t = tickers[k]
+                q = self.memoria.cotizacion(t)
+                vistos[k] = self._vistos[t] = actuales[k]
+                handler = self.handler
+                if q is not None and handler is not None:
+                    try:
+                        handler(_mensaje(q))
+                    except Exception as e:
+                        print(f"❌ Error en market_data_handler: {e}")
+            time.sleep(INTERVALO_SONDEO)
+
+    # --- API compatible con pyRofex ---
+    def initialize(self, *args, **kwargs):
+        pass  # la sesión es la del gateway
+
+    def get_all_instruments(self, *args, **kwargs):
+        return self.rest("get_all_instruments", *args, **kwargs)
+
+    def get_detailed_instruments(self, *args, **kwargs):
+        return self.rest("get_detailed_instruments", *args, **kwargs)
+
+    def get_market_data(self, *args, **kwargs):
+        return self.rest("get_market_data", *args, **kwargs)
+
+    def get_account_report(self, *args, **kwargs):
+        return self.rest("get_account_report", *args, **kwargs)
+
+    def init_websocket_connection(self, market_data_handler=None, *args, exception_handler=None, **kwargs):
+        self.handler = market_data_handler
+        self.exception_handler = exception_handler
+        if self._thread is None or not self._thread.is_alive():
+            self._activo.set()
+            self._thread = threading.Thread(target=self._sondear, name="gateway-sondeo", daemon=True)
+            self._thread.start()
+
+    def market_data_subscription(self, tickers, *args, **kwargs):
+        self.suscribir(tickers)
+
+    def close_websocket_connection(self, *args, **kwargs):
+        self._activo.clear()
+        if self._thread is not None:
+            self._thread.join(1)
+        self._vistos.clear()
+        self.desuscribir()
+
+    def instalar(self, modulo):
+        for nombre in ("initialize", "get_all_instruments", "get_detailed_instruments", "get_market_data",
+                       "get_account_report", "init_websocket_connection", "market_data_subscription",
+                       "close_websocket_connection"):
+            setattr(modulo, nombre, getattr(self, nombre))
+        return self
+
+def main():
+    load_dotenv()
+    # El gateway escucha en GATEWAY_MD y usa la sesión real (o una reproducción)
+    direccion = direccion_desde_texto(os.environ.pop("GATEWAY_MD", None))
+    from sesiones import configurar_desde_entorno
+    configurar_desde_entorno()
+    pyRofex.initialize(
+        user=os.getenv("PRIMARY_USER"),
+        password=os.getenv("PRIMARY_PASSWORD"),
+        account=os.getenv("PRIMARY_ACCOUNT"),
+        environment=pyRofex.Environment.REMARKET
+    )
+    gateway = Gateway(direccion=direccion).iniciar()
+    print(f"🛰️ Gateway de Market Data en {gateway.direccion} (memoria compartida: {gateway.memoria.shm.name})")
+    if not os.getenv("GATEWAY_CLAVE"):
+        print(f"🔑 Clave de los clientes en {CLAVE_ARCHIVO}")
+    try:
+        while True:
+            time.sleep(60)
+            print(f"📊 {gateway.clientes} clientes, {len(gateway.suscripciones)} suscripciones, {gateway.mensajes} mensajes")
+    except KeyboardInterrupt:
+        print("\n🛑 Gateway detenido por el usuario.")
+    finally:
+        gateway.close()
+
+if __name__ == "__main__":
+    main()
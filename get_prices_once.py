@@ -1,42 +1,156 @@
 import os
 import pyRofex
 import time
-import json
 import datetime
+import queue
+import threading
 from dotenv import load_dotenv
+from catalogo import obtener_catalogo
+from cotizaciones import LibroCotizaciones
+from publicador import PublicadorCurva
+from historial_ticks import HistorialTicks
+from tasas_dlr import MotorTasas, precio_referencia
+from sesiones import configurar_desde_entorno
 
 load_dotenv()
 
+# Recolección por WebSocket: termina apenas todos los tickers reportaron
+# sus puntas, o si el feed queda en silencio, con un tope máximo.
+ENTRIES = [pyRofex.MarketDataEntry.BIDS, pyRofex.MarketDataEntry.OFFERS, pyRofex.MarketDataEntry.LAST]
+TIEMPO_MAXIMO = 15       # segundos, tope duro (comportamiento anterior)
+VENTANA_SILENCIO = 1.5   # segundos sin mensajes nuevos => damos por terminado
+
+# Respaldo REST (snapshot): pedidos en paralelo con timeouts
+REST_WORKERS = 8         # pedidos simultáneos como máximo
+REST_TIMEOUT = 3.0       # segundos por pedido individual
+REST_DEADLINE = 8.0      # segundos para todo el respaldo
+
+# Tasas implícitas (curva_dlr_tasas.json): spot de referencia fijo o un ticker a seguir
+SPOT = os.getenv("DLR_SPOT")
+SPOT_TICKER = os.getenv("DLR_SPOT_TICKER")
+
 def get_dlr_tickers():
-    months_map = {
-        'ENE': 1, 'FEB': 2, 'MAR': 3, 'ABR': 4, 'MAY': 5, 'JUN': 6,
-        'JUL': 7, 'AGO': 8, 'SEP': 9, 'OCT': 10, 'NOV': 11, 'DIC': 12
-    }
+    """Contratos mensuales de DLR/ ordenados cronológicamente (desde el catálogo cacheado)."""
     try:
-        instruments = pyRofex.get_all_instruments()
-        if instruments['status'] == 'OK':
-            all_symbols = [inst['instrumentId']['symbol'] for inst in instruments['instruments']]
-            dlr_tickers = [s for s in all_symbols if s.startswith("DLR/") and len(s) == 9 and not s.endswith("A") and not s.endswith("M") and "/" in s and s.count("/") == 1 and " " not in s]
-            
-            def sort_key(ticker):
-                month_str, year_str = ticker[4:7], ticker[7:9]
-                return (int(year_str) * 100) + months_map.get(month_str, 0)
-            
-            return sorted(dlr_tickers, key=sort_key)
-    except: return []
-    return []
+        return list(obtener_catalogo().dlr_mensuales)
+    except Exception: return []
 
 # Captura de datos
-current_data = {}
+current_data = LibroCotizaciones()
+historial = HistorialTicks()
+# Entradas (BI/OF/LA) ya recibidas por ticker, aunque vengan vacías (mercado cerrado)
+entradas_recibidas = {}
+ultimo_mensaje = 0.0
+nuevo_mensaje = threading.Condition()
 
 def market_data_handler(message):
-    instrumento = message["instrumentId"]["symbol"]
-    md = message["marketData"]
-    current_data[instrumento] = {
-        "bid": md["BI"][0]["price"] if md.get("BI") else "S/D",
-        "offer": md["OF"][0]["price"] if md.get("OF") else "S/D",
-        "last": md["LA"]["price"] if md.get("LA") and isinstance(md["LA"], dict) else "S/D"
-    }
+    global ultimo_mensaje
+    q = current_data.actualizar(message)
+    historial.registrar(q)
+    with nuevo_mensaje:
+        entradas_recibidas.setdefault(q.symbol, set()).update(message["marketData"].keys())
+        ultimo_mensaje = time.monotonic()
+        nuevo_mensaje.notify()
+
+def esperar_datos(tickers, entries=ENTRIES, tiempo_maximo=TIEMPO_MAXIMO, ventana_silencio=VENTANA_SILENCIO):
+    """Espera hasta que cada ticker haya recibido todas las entradas pedidas.
+
+    Corta antes si el feed no envía nada durante `ventana_silencio` segundos
+    (después del primer mensaje) y nunca espera más de `tiempo_maximo`.
+    Devuelve el motivo del corte: "completo", "silencio" o "timeout".
+    """
+    requeridas = {e.value for e in entries}
+    inicio = time.monotonic()
+    limite = inicio + tiempo_maximo
+    with nuevo_mensaje:
+        while True:
+            if all(requeridas <= entradas_recibidas.get(t, set()) for t in tickers):
+                return "completo"
+            ahora = time.monotonic()
+            if ahora >= limite:
+                return "timeout"
+            if ultimo_mensaje and ahora - ultimo_mensaje >= ventana_silencio:
+                return "silencio"
+            espera = limite - ahora
+            if ultimo_mensaje:
+                espera = min(espera, ventana_silencio - (ahora - ultimo_mensaje))
+            nuevo_mensaje.wait(timeout=espera)
+
+def pedir_ultimo(ticker, get_market_data=None):
+    """Pide por REST el último precio operado de un ticker. Devuelve el precio o None."""
+    get_market_data = get_market_data or pyRofex.get_market_data
+    res = get_market_data(ticker=ticker, entries=[pyRofex.MarketDataEntry.LAST])
+    q = LibroCotizaciones().actualizar_rest(ticker, res)
+    return q.last if q else None
+
+def completar_con_snapshot(tickers, get_market_data=None, max_workers=REST_WORKERS,
+                           timeout=REST_TIMEOUT, deadline=REST_DEADLINE):
+    """Pide el último precio de varios tickers en paralelo.
+
+    La API REST de Primary no acepta varios símbolos por pedido, así que se
+    reparte en un pool acotado de threads. Los pedidos que superan `timeout`
+    (o el `deadline` total) se abandonan. Devuelve {ticker: precio}.
+    """
+    resultados = {}
+    if not tickers:
+        return resultados
+
+    # Threads daemon: un pedido colgado (requests sin timeout) no impide que el script termine
+    cola = queue.Queue()
+    for t in tickers:
+        cola.put(t)
+    listos = queue.Queue()
+    en_curso = {}  # ticker -> inicio del pedido
+
+    def worker():
+        while True:
+            try:
+                t = cola.get_nowait()
+            except queue.Empty:
+                return
+            en_curso[t] = time.monotonic()
+            try:
+                listos.put((t, pedir_ultimo(t, get_market_data)))
+            except Exception:
+                listos.put((t, None))
+
+    for _ in range(min(max_workers, len(tickers))):
+        threading.Thread(target=worker, daemon=True).start()
+
+    limite = time.monotonic() + deadline
+    faltan = set(tickers)
+    while faltan:
+        ahora = time.monotonic()
+        # Abandonar los pedidos que superaron su timeout individual
+        for t in [t for t in faltan if t in en_curso and ahora - en_curso[t] >= timeout]:
+            faltan.discard(t)
+        if not faltan or ahora >= limite:
+            break
+        # Próximo vencimiento: el deadline total o el timeout del pedido más viejo en curso
+        vencimientos = [en_curso[t] + timeout for t in faltan if t in en_curso]
+        try:
+            t, precio = listos.get(timeout=max(min([limite] + vencimientos) - ahora, 0.001))
+        except queue.Empty:
+            continue
+        if t in faltan:
+            faltan.discard(t)
+            if precio is not None:
+                resultados[t] = precio
+    return resultados
+
+def publicar_tasas(tickers, timestamp):
+    """Calcula las tasas implícitas de toda la curva y las publica junto al JSON."""
+    if SPOT_TICKER:
+        q = current_data.cotizacion(SPOT_TICKER)
+        spot = precio_referencia(q.bid, q.offer, q.last)
+    else:
+        spot = float(SPOT) if SPOT else None
+    if spot is None:
+        return
+    motor = MotorTasas(tickers, spot)
+    motor.cargar({t: precio_referencia(q.bid, q.offer, q.last)
+                  for t, q in ((t, current_data.cotizacion(t)) for t in tickers)})
+    motor.publicar(timestamp)
 
 def main():
     try:
@@ -52,45 +166,40 @@ def main():
 
         # 1. Intentar por WebSocket (Tiempo Real)
         pyRofex.init_websocket_connection(market_data_handler=market_data_handler, error_handler=lambda m: None)
-        pyRofex.market_data_subscription(
-            tickers=tickers, 
-            entries=[pyRofex.MarketDataEntry.BIDS, pyRofex.MarketDataEntry.OFFERS, pyRofex.MarketDataEntry.LAST]
-        )
-        time.sleep(15) 
+        inicio = time.monotonic()
+        suscriptos = tickers + ([SPOT_TICKER] if SPOT_TICKER else [])
+        pyRofex.market_data_subscription(tickers=suscriptos, entries=ENTRIES)
+        motivo = esperar_datos(suscriptos)
         pyRofex.close_websocket_connection()
+        historial.close()
+        print(f"📡 WebSocket: {len(current_data)}/{len(tickers)} tickers en {time.monotonic() - inicio:.1f}s ({motivo})")
 
         # 2. Backup REST: Si algún ticker no tiene datos (mercado cerrado), pedir Snapshot histórico
         output = []
         ahora_iso = datetime.datetime.now().isoformat()
         
+        # Si no hay datos de Websocket, pedimos el Snapshot (petición REST simple) en paralelo
+        sin_last = [t for t in tickers if current_data.cotizacion(t).last is None]
+        snapshot = completar_con_snapshot(sin_last)
+
         for t in tickers:
-            d = current_data.get(t, {"bid": "S/D", "offer": "S/D", "last": "S/D"})
-            
-            # Si no hay datos de Websocket, intentamos pedir el Snapshot (petición REST simple)
-            if d["last"] == "S/D":
-                try:
-                    res = pyRofex.get_market_data(tickers=[t], entries=[pyRofex.MarketDataEntry.LAST])
-                    if res['status'] == 'OK':
-                        last_data = res['marketData'].get(t, {}).get('LA', {})
-                        if last_data:
-                            d["last"] = last_data.get('price', "S/D")
-                except:
-                    pass
-
-            output.append({
-                "ticker": t, 
-                "bid": d["bid"], 
-                "offer": d["offer"], 
-                "last": d["last"], 
-                "timestamp": ahora_iso
-            })
-
-        with open("curva_dlr.json", "w") as f:
-            json.dump(output, f, indent=4)
-        print("✅ JSON actualizado con Snapshot de cierre.")
+            q = current_data.cotizacion(t)
+            if t in snapshot:
+                q.last = snapshot[t]
+
+            output.append({"ticker": t, **q.a_dict()})
+
+        # 3. Publicar sólo si cambió algún precio (escritura atómica + delta)
+        cambios = PublicadorCurva().publicar(output, ahora_iso)
+        if cambios:
+            print(f"✅ JSON actualizado con Snapshot de cierre ({len(cambios)} contratos cambiaron).")
+            publicar_tasas(tickers, ahora_iso)
+        else:
+            print("ℹ️ Sin cambios de precios, curva_dlr.json no se modifica.")
 
     except Exception as e:
         print(f"❌ Error: {e}")
 
 if __name__ == "__main__":
+    configurar_desde_entorno()  # GRABAR_SESION / REPRODUCIR_SESION
     main()
@@ -5,12 +5,27 @@ import time
 import os
 import pyRofex
 from dotenv import load_dotenv
-from simulator import Portfolio
+from simulator import Portfolio, ejecutar_a_mercado
+from profundidad import LibroProfundidad
+from catalogo import obtener_catalogo
+from cotizaciones import LibroCotizaciones, a_texto
+from busqueda import IndiceBusqueda
+from suscripciones import GestorSuscripciones
+from traspaso import BufferTraspaso
 from collections import defaultdict
+from sesiones import configurar_desde_entorno
 
 # Cargar variables
 load_dotenv()
 
+# Cada cuánto se repinta (sólo si algo cambió desde el cuadro anterior)
+INTERVALO_REFRESCO_MS = 250
+# Espera después de la última tecla antes de filtrar
+DEBOUNCE_BUSQUEDA_MS = 150
+# Mensajes de Market Data en espera (los más viejos se descartan) y cuántos se aplican por cuadro
+MAXIMO_COLA_MD = 20000
+LOTE_MD = 5000
+
 class TradingApp:
     def __init__(self, root):
         self.root = root
@@ -22,13 +37,34 @@ class TradingApp:
         self.style.theme_use('clam')
         
         # Datos del Modelo
-        self.portfolio = Portfolio()
+        self.portfolio = Portfolio(journal=True)
         self.current_category = tk.StringVar()
         self.current_ticker = tk.StringVar()
-        self.market_data = {} # {ticker: {bid: ..., offer: ..., last: ...}}
+        self.market_data = LibroCotizaciones() # {ticker: Cotizacion}
+        self.depth_book = LibroProfundidad()   # {ticker: LibroTicker} (L2, PROFUNDIDAD_L2 niveles)
         self.all_instruments = defaultdict(list)
+        self.indice_busqueda = IndiceBusqueda({})
+        self._busqueda_pendiente = None
         self.connected = False
-        self.subscribed_ticker = None
+        # Selección + tenencias; los tickers que se dejaron de mirar se dan de baja por LRU
+        self.suscripciones = GestorSuscripciones(
+            self.market_data,
+            entries=[pyRofex.MarketDataEntry.BIDS, pyRofex.MarketDataEntry.OFFERS, pyRofex.MarketDataEntry.LAST],
+            depth=self.depth_book.profundidad, libros=[self.depth_book])
+
+        # Los threads de fondo no tocan ni el modelo ni los widgets: publican en
+        # estas colas y el loop de Tk las drena en lotes (ver refresh).
+        self.traspaso = BufferTraspaso(MAXIMO_COLA_MD)  # mensajes de Market Data
+        self._tareas = BufferTraspaso(None)              # callables a correr en Tk (log, setup)
+        self._feed_mostrado = None
+
+        # Repintado incremental: tickers con precios nuevos desde el último cuadro
+        self._sucios = set()
+        self._filas = {}  # ticker -> item del Treeview del portafolio
+        self._mostrados = {}  # ticker -> valores que muestra esa fila
+        self._ticker_mostrado = None
+        self._totales_mostrados = None
+        self._estado_mostrado = None
         
         # Layout Principal
         self.create_header()
@@ -39,6 +75,8 @@ class TradingApp:
         self.start_backend_thread()
         
         # Loop de Actualización GUI
+        self.update_portfolio_table()
+        self.sync_portfolio_subscriptions()
         self.root.after(1000, self.update_ui)
 
     def create_header(self):
@@ -49,10 +87,16 @@ class TradingApp:
         
         self.lbl_balance = ttk.Label(frame, text=f"Saldo Liquido: ${self.portfolio.cash:,.2f}", font=("Arial", 14, "bold"), foreground="green")
         self.lbl_balance.pack(side=tk.RIGHT)
+
+        self.lbl_equity = ttk.Label(frame, text="", font=("Arial", 11))
+        self.lbl_equity.pack(side=tk.RIGHT, padx=10)
         
         self.lbl_status = ttk.Label(frame, text="⏳ Conectando...", foreground="orange")
         self.lbl_status.pack(side=tk.RIGHT, padx=20)
 
+        self.lbl_feed = ttk.Label(frame, text="", foreground="gray")
+        self.lbl_feed.pack(side=tk.RIGHT, padx=10)
+
     def create_main_area(self):
         main_frame = ttk.Frame(self.root, padding="10")
         main_frame.pack(fill=tk.BOTH, expand=True)
@@ -112,7 +156,7 @@ class TradingApp:
         right_panel = ttk.LabelFrame(main_frame, text="Mi Portafolio", padding="10")
         right_panel.pack(side=tk.RIGHT, fill=tk.BOTH, expand=True, padx=5)
         
-        cols = ("Ticker", "Cantidad", "Val. Mercado", "Total")
+        cols = ("Ticker", "Cantidad", "PPP", "Val. Mercado", "Total", "Resultado")
         self.tree = ttk.Treeview(right_panel, columns=cols, show="headings")
         for col in cols:
             self.tree.heading(col, text=col)
@@ -124,9 +168,16 @@ class TradingApp:
         self.txt_log = tk.Text(self.root, height=6, state="disabled", bg="#1e1e1e", fg="#00ff00", font=("Consolas", 9))
         self.txt_log.pack(fill=tk.X, padx=10, pady=5)
 
+    def in_tk(self, fn, *args):
+        """Corre `fn(*args)` en el thread de Tk (se puede llamar desde cualquier thread)."""
+        self._tareas.publicar((fn, args))
+
     def log(self, msg):
+        self.in_tk(self._write_log, f"[{time.strftime('%H:%M:%S')}] {msg}\n")
+
+    def _write_log(self, linea):
         self.txt_log.config(state="normal")
-        self.txt_log.insert(tk.END, f"[{time.strftime('%H:%M:%S')}] {msg}\n")
+        self.txt_log.insert(tk.END, linea)
         self.txt_log.see(tk.END)
         self.txt_log.config(state="disabled")
 
@@ -147,63 +198,55 @@ class TradingApp:
             self.connected = True
             self.log("✅ Conexión establecida.")
 
-            # Cargar Instrumentos
+            # Cargar Instrumentos (catálogo cacheado en disco)
             self.log("Cargando listado de instrumentos...")
-            res = pyRofex.get_all_instruments()
-            if res['status'] == 'OK':
-                self.categorize_instruments(res['instruments'])
-                self.log(f"✅ {len(res['instruments'])} instrumentos cargados.")
-                self.root.after(0, self.setup_categories)
+            catalogo = obtener_catalogo(en_segundo_plano=True)
+            self.categorize_instruments(catalogo)
+            self.log(f"✅ {len(catalogo.simbolos)} instrumentos cargados.")
+            self.in_tk(self.setup_categories)
             
-            # WebSocket Handler
-            def md_handler(msg):
-                ticker = msg["instrumentId"]["symbol"]
-                md = msg["marketData"]
-                bid = md["BI"][0]["price"] if md.get("BI") else None
-                offer = md["OF"][0]["price"] if md.get("OF") else None
-                last = md["LA"]["price"] if md.get("LA") else None
-                self.market_data[ticker] = {"bid": bid, "offer": offer, "last": last}
-
-            pyRofex.init_websocket_connection(market_data_handler=md_handler)
+            # WebSocket Handler (suscribe la selección y las tenencias pedidas hasta ahora)
+            self.suscripciones.conectar(market_data_handler=self.on_market_data)
             
         except Exception as e:
             self.connected = False
             self.log(f"❌ Error Backend: {e}")
 
-    def categorize_instruments(self, instruments):
-        for inst in instruments:
-            symbol = inst['instrumentId']['symbol']
-            # Lógica de categorización refinada
-            if symbol.startswith('DLR/'):
-                cat = "Dólar Futuro"
-            elif '/' in symbol:
-                if any(x in symbol for x in ['ORO', 'WTI', 'SOJ', 'MAI', 'TRI']):
-                    cat = "Commodities (Futuros)"
-                elif ' RFX20' in symbol or ' rfx20' in symbol:
-                    cat = "Índices (Futuros)"
-                elif ' C ' in symbol or ' P ' in symbol or symbol.startswith('O'):
-                    cat = "Opciones"
-                else:
-                    cat = "Otros Futuros"
-            elif any(c.isdigit() for c in symbol) and not symbol.startswith('RFX'):
-                cat = "Bonos / TVPP"
-            elif 'MERV - XMEV -' in symbol:
-                if ' - CI' in symbol or ' - 24hs' in symbol:
-                    # Intentar detectar Cedears vs Acciones (simplificado)
-                    if any(ced in symbol for ced in ['AAPL', 'TSLA', 'AMZN', 'BABA', 'KO']):
-                        cat = "CEDEARs"
-                    else:
-                        cat = "Acciones"
-                else:
-                    cat = "Acciones/Otros"
-            else:
-                cat = "Otros"
-            
-            self.all_instruments[cat].append(symbol)
-        
-        # Sort each list
-        for cat in self.all_instruments:
-            self.all_instruments[cat].sort()
+    def on_market_data(self, message):
+        # Thread del WebSocket: sólo encola; el parseo y el modelo quedan del lado de Tk
+        self.traspaso.publicar(message)
+
+    def drain_market_data(self):
+        """Aplica al modelo un lote de mensajes encolados y marca sus tickers para repintar."""
+        lote = self.traspaso.drenar(LOTE_MD)
+        if not lote:
+            return
+        actualizar = self.market_data.actualizar
+        actualizar_l2 = self.depth_book.actualizar
+        suscriptos = self.suscripciones
+        tickers = set()
+        aplicados = 0
+        for message in lote:
+            # Encolados antes de una baja de suscripción: ya no interesan
+            if message["instrumentId"]["symbol"] in suscriptos:
+                tickers.add(actualizar(message).symbol)
+                actualizar_l2(message)
+                aplicados += 1
+        # Varios mensajes del mismo ticker en un lote se ven como un solo repintado
+        self.traspaso.agrupados += aplicados - len(tickers)
+        self._sucios |= tickers
+        # Revaloriza sólo las tenencias con precio nuevo (una vez por ticker y lote)
+        valuar = self.portfolio.valuar
+        market_data = self.market_data
+        for t in tickers:
+            valuar(t, market_data[t].last)
+
+    def categorize_instruments(self, catalogo):
+        # Las categorías ya vienen indexadas (y ordenadas) en el catálogo
+        self.all_instruments.clear()
+        for cat, symbols in catalogo.categorias.items():
+            self.all_instruments[cat] = list(symbols)
+        self.indice_busqueda = IndiceBusqueda(self.all_instruments)
 
     def setup_categories(self):
         cats = sorted(list(self.all_instruments.keys()))
@@ -224,10 +267,14 @@ class TradingApp:
             self.cb_ticker.set("")
 
     def filter_tickers(self, event):
-        search = self.ent_search.get().upper()
-        cat = self.current_category.get()
-        all_in_cat = self.all_instruments.get(cat, [])
-        filtered = [t for t in all_in_cat if search in t.upper()]
+        # Debounce: se filtra una sola vez cuando el usuario deja de tipear
+        if self._busqueda_pendiente is not None:
+            self.root.after_cancel(self._busqueda_pendiente)
+        self._busqueda_pendiente = self.root.after(DEBOUNCE_BUSQUEDA_MS, self.apply_filter)
+
+    def apply_filter(self):
+        self._busqueda_pendiente = None
+        filtered = self.indice_busqueda.buscar(self.ent_search.get(), self.current_category.get())
         self.cb_ticker['values'] = filtered
         if filtered:
             # No cambiamos el set a menos que no haya nada seleccionado o el actual no este en la lista
@@ -242,63 +289,106 @@ class TradingApp:
         self.lbl_ticker_name.config(text=ticker)
         
         # Cambiar suscripcion WebSocket
-        if self.connected:
-            if self.subscribed_ticker and self.subscribed_ticker != ticker:
-                # Nota: pyRofex no tiene "unsubscribe" directo facil en esta lib sin cerrar, 
-                # pero podemos simplemente suscribir al nuevo. El handler filtrará.
-                pass
-            
+        if ticker not in self.suscripciones:
             self.log(f"Suscribiendo a {ticker}...")
-            try:
-                pyRofex.market_data_subscription(
-                    tickers=[ticker],
-                    entries=[pyRofex.MarketDataEntry.BIDS, pyRofex.MarketDataEntry.OFFERS, pyRofex.MarketDataEntry.LAST]
-                )
-                self.subscribed_ticker = ticker
-            except Exception as e:
-                self.log(f"Error sub: {e}")
+        try:
+            bajas = self.suscripciones.fijar("seleccion", [ticker])
+            if bajas:
+                self.log(f"Baja de {len(bajas)} suscripciones sin uso ({len(self.suscripciones)} activas).")
+        except Exception as e:
+            self.log(f"Error sub: {e}")
+
+    def sync_portfolio_subscriptions(self):
+        try:
+            self.suscripciones.fijar("portafolio", list(self.portfolio.positions))
+        except Exception as e:
+            self.log(f"Error sub: {e}")
 
     def update_ui(self):
-        # Actualizar Status
-        if self.connected:
-            self.lbl_status.config(text="✅ Online (Remarket)", foreground="green")
-        else:
-            self.lbl_status.config(text="❌ Offline", foreground="red")
-        
-        # Precios
-        ticker = self.current_ticker.get()
-        data = self.market_data.get(ticker, {})
-        self.lbl_bid.config(text=f"COMPRA (Bid): ${data.get('bid', '-'):}")
-        self.lbl_ask.config(text=f"VENTA (Ask): ${data.get('offer', '-'):}")
-        self.lbl_last.config(text=f"ÚLTIMO: ${data.get('last', '-'):}")
-        
-        # Actualizar Tabla Portafolio
-        self.update_portfolio_table()
-        
-        self.root.after(500, self.update_ui)
+        try:
+            self.refresh()
+        finally:
+            self.root.after(INTERVALO_REFRESCO_MS, self.update_ui)
 
-    def update_portfolio_table(self):
-        # Limpiar y recargar (optimizable pero simple para este volumen)
-        current_items = {self.tree.set(k, "Ticker"): k for k in self.tree.get_children()}
-        
-        for ticker, qty in self.portfolio.positions.items():
-            md = self.market_data.get(ticker, {})
-            last_price = md.get('last', 0)
-            total = qty * (last_price if last_price else 0)
-            
-            vals = (ticker, qty, f"${last_price:,.2f}" if last_price else "S/D", f"${total:,.2f}")
-            
-            if ticker in current_items:
-                self.tree.item(current_items[ticker], values=vals)
-                del current_items[ticker]
+    def refresh(self):
+        """Repinta sólo lo que cambió desde el cuadro anterior; sin cambios no toca ningún widget."""
+        # Status
+        if self.connected != self._estado_mostrado:
+            self._estado_mostrado = self.connected
+            if self.connected:
+                self.lbl_status.config(text="✅ Online (Remarket)", foreground="green")
             else:
-                self.tree.insert("", "end", values=vals)
-        
+                self.lbl_status.config(text="❌ Offline", foreground="red")
+
+        for fn, args in self._tareas.drenar():
+            fn(*args)
+
+        self.drain_market_data()
+        sucios, self._sucios = self._sucios, set()
+
+        b = self.traspaso
+        feed = (b.profundidad, b.descartados, b.agrupados)
+        if feed != self._feed_mostrado:
+            self._feed_mostrado = feed
+            self.lbl_feed.config(text=f"Cola: {feed[0]} | Descartados: {feed[1]} | Agrupados: {feed[2]}")
+
+        # Precios del ticker seleccionado
+        ticker = self.current_ticker.get()
+        if ticker != self._ticker_mostrado or ticker in sucios:
+            self._ticker_mostrado = ticker
+            q = self.market_data.get(ticker)
+            self.lbl_bid.config(text=f"COMPRA (Bid): ${a_texto(q.bid) if q else '-'}")
+            self.lbl_ask.config(text=f"VENTA (Ask): ${a_texto(q.offer) if q else '-'}")
+            self.lbl_last.config(text=f"ÚLTIMO: ${a_texto(q.last) if q else '-'}")
+
+        # Filas del portafolio con precios nuevos
+        if sucios:
+            self.update_portfolio_table(sucios)
+        self.update_totals()
+
+    def update_totals(self):
+        # Totales precalculados por el motor de valuación: sólo se leen
+        v = self.portfolio.valuacion
+        totales = (self.portfolio.equity, v.total_no_realizado, v.realizado)
+        if totales != self._totales_mostrados:
+            self._totales_mostrados = totales
+            self.lbl_equity.config(text=f"Patrimonio: ${totales[0]:,.2f} | No realizado: ${totales[1]:,.2f} | Realizado: ${totales[2]:,.2f}")
+
+    def _valores_fila(self, ticker, qty):
+        _, costo, last_price, total, resultado = self.portfolio.valuacion.posicion(ticker)
+        return (ticker, qty, f"${costo:,.2f}" if costo is not None else "S/D",
+                f"${last_price:,.2f}" if last_price else "S/D", f"${total:,.2f}", f"${resultado:,.2f}")
+
+    def update_portfolio_table(self, tickers=None):
+        """Sin argumentos sincroniza toda la tabla (después de operar); con `tickers`
+        reescribe sólo esas filas."""
+        positions = self.portfolio.positions
+        if tickers is not None:
+            for ticker in tickers:
+                item = self._filas.get(ticker)
+                if item is not None:
+                    vals = self._valores_fila(ticker, positions[ticker])
+                    if vals != self._mostrados.get(ticker):
+                        self._mostrados[ticker] = vals
+                        self.tree.item(item, values=vals)
+            return
+
+        for ticker, qty in positions.items():
+            vals = self._valores_fila(ticker, qty)
+            item = self._filas.get(ticker)
+            if item is None:
+                self._filas[ticker] = self.tree.insert("", "end", values=vals)
+            elif vals != self._mostrados.get(ticker):
+                self.tree.item(item, values=vals)
+            self._mostrados[ticker] = vals
+
         # Borrar los que ya no están
-        for k in current_items.values():
-            self.tree.delete(k)
-            
+        for ticker in [t for t in self._filas if t not in positions]:
+            self.tree.delete(self._filas.pop(ticker))
+            self._mostrados.pop(ticker, None)
+
         self.lbl_balance.config(text=f"Saldo Liquido: ${self.portfolio.cash:,.2f}")
+        self.update_totals()
 
     def buy_action(self):
         ticker = self.current_ticker.get()
@@ -310,21 +400,22 @@ class TradingApp:
             messagebox.showerror("Error", "Cantidad inválida")
             return
             
-        data = self.market_data.get(ticker)
-        if not data or not data.get("offer"):
+        q = self.market_data.get(ticker)
+        if not q or q.offer is None:
             # Si el mercado está cerrado, preguntar si quiere simular un precio
             if messagebox.askyesno("Mercado Cerrado", f"No hay precio de venta para {ticker}.\n¿Desea simular una compra a $100.00 para probar?"):
-                price = 100.0
+                success, msg = self.portfolio.buy(ticker, qty, 100.0)
             else:
                 return
         else:
-            price = data["offer"]
-            
-        success, msg = self.portfolio.buy(ticker, qty, price)
+            # Recorre las ofertas del libro L2: ejecuta al VWAP
+            success, msg = ejecutar_a_mercado(self.portfolio, self.depth_book.get(ticker), "buy", ticker, qty)
+
         if success:
             self.log(f"ORDEN EXITOSA: {msg}")
             # Actualizar tabla inmediatamente
             self.update_portfolio_table()
+            self.sync_portfolio_subscriptions()
         else:
             messagebox.showwarning("Orden Rechazada", msg)
 
@@ -342,23 +433,24 @@ class TradingApp:
             messagebox.showerror("Error", "No tienes este activo en cartera.")
             return
 
-        data = self.market_data.get(ticker)
-        if not data or not data.get("bid"):
+        q = self.market_data.get(ticker)
+        if not q or q.bid is None:
             if messagebox.askyesno("Mercado Cerrado", f"No hay precio de compra para {ticker}.\n¿Desea simular una venta a $105.00 para probar?"):
-                price = 105.0
+                success, msg = self.portfolio.sell(ticker, qty, 105.0)
             else:
                 return
         else:
-            price = data["bid"]
+            success, msg = ejecutar_a_mercado(self.portfolio, self.depth_book.get(ticker), "sell", ticker, qty)
 
-        success, msg = self.portfolio.sell(ticker, qty, price)
         if success:
             self.log(f"ORDEN EXITOSA: {msg}")
             self.update_portfolio_table()
+            self.sync_portfolio_subscriptions()
         else:
             messagebox.showwarning("Orden Rechazada", msg)
 
 if __name__ == "__main__":
+    configurar_desde_entorno()  # GRABAR_SESION / REPRODUCIR_SESION
     root = tk.Tk()
     app = TradingApp(root)
     root.mainloop()
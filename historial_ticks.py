@@ -0,0 +1,168 @@
+"""Historial de ticks append-only en columnas binarias de ancho fijo.
+
+Cada actualización de bid/offer/last de un contrato se agrega como un registro
+en tres columnas (orden de bytes nativo):
+
+    ticks/<AAAAMMDD>/<ticker>/ts.i64      int64   timestamp en nanosegundos
+    ticks/<AAAAMMDD>/<ticker>/precio.f64  float64 precio
+    ticks/<AAAAMMDD>/<ticker>/lado.u8     uint8   LADO_BID / LADO_OFFER / LADO_LAST
+
+La estructura de carpetas es el índice por día y por ticker (el ticker va
+escapado con urllib.parse.quote, ej. DLR%2FENE27). Para leer, las columnas se
+mapean en memoria y se exponen como memoryview: no hay parseo de JSON ni
+recorridos completos, los rangos de tiempo se buscan por bisección.
+"""
+import os
+import mmap
+import time
+import bisect
+import struct
+import threading
+from urllib.parse import quote, unquote
+
+TICKS_DIR = "ticks"
+
+LADO_BID = 0
+LADO_OFFER = 1
+LADO_LAST = 2
+NOMBRES_LADO = {LADO_BID: "bid", LADO_OFFER: "offer", LADO_LAST: "last"}
+
+_COLUMNAS = (("ts.i64", "q", 8), ("precio.f64", "d", 8), ("lado.u8", "B", 1))
+_TS = struct.Struct("=q")
+_PRECIO = struct.Struct("=d")
+_LADO = [bytes([i]) for i in range(3)]
+
+def dia_de(ts_ns):
+    return time.strftime("%Y%m%d", time.localtime(ts_ns / 1e9))
+
+class HistorialTicks:
+    """Escritor (y lector) del historial de ticks. Seguro entre threads."""
+
+    def __init__(self, directorio=TICKS_DIR):
+        self.directorio = directorio
+        self._archivos = {}  # ticker -> (dia, f_ts, f_precio, f_lado)
+        self._ultimos = {}   # ticker -> [bid, offer, last] ya registrados
+        self._lock = threading.Lock()
+
+    # --- Escritura ---
+    def _columnas(self, ticker, dia):
+        abiertos = self._archivos.get(ticker)
+        if abiertos is not None and abiertos[0] == dia:
+            return abiertos
+        if abiertos is not None:
+            for f in abiertos[1:]:
+                f.close()
+        carpeta = os.path.join(self.directorio, dia, quote(ticker, safe=""))
+        os.makedirs(carpeta, exist_ok=True)
+        rutas = [os.path.join(carpeta, nombre) for nombre, _, _ in _COLUMNAS]
+        # Un corte sin flush (kill, SIGTERM) deja columnas de distinto largo: se recortan
+        # al registro completo más corto antes de agregar, para no desalinear lo nuevo
+        n = min((os.path.getsize(r) if os.path.exists(r) else 0) // ancho
+                for r, (_, _, ancho) in zip(rutas, _COLUMNAS))
+        for r, (_, _, ancho) in zip(rutas, _COLUMNAS):
+            if os.path.exists(r) and os.path.getsize(r) != n * ancho:
+                os.truncate(r, n * ancho)
+        abiertos = (dia,) + tuple(open(r, "ab") for r in rutas)
+        self._archivos[ticker] = abiertos
+        return abiertos
+
+    def agregar(self, ticker, ts_ns, precio, lado):
+        """Agrega un registro. `ts_ns` debe ser no decreciente por ticker."""
+        with self._lock:
+            _, f_ts, f_precio, f_lado = self._columnas(ticker, dia_de(ts_ns))
+            f_ts.write(_TS.pack(ts_ns))
+            f_precio.write(_PRECIO.pack(precio))
+            f_lado.write(_LADO[lado])
+
+    def registrar(self, q, ts_ns=None):
+        """Registra los lados de una Cotizacion que cambiaron desde el último registro."""
+        if ts_ns is None:
+            ts_ns = q.timestamp * 1_000_000 if q.timestamp else time.time_ns()
+        previos = self._ultimos.get(q.symbol)
+        if previos is None:
+            previos = self._ultimos[q.symbol] = [None, None, None]
+        for lado, precio in ((LADO_BID, q.bid), (LADO_OFFER, q.offer), (LADO_LAST, q.last)):
+            if precio is not None and precio != previos[lado]:
+                previos[lado] = precio
+                self.agregar(q.symbol, ts_ns, precio, lado)
+
+    def flush(self):
+        with self._lock:
+            for abiertos in self._archivos.values():
+                for f in abiertos[1:]:
+                    f.flush()
+
+    def close(self):
+        with self._lock:
+            for abiertos in self._archivos.values():
+                for f in abiertos[1:]:
+                    f.close()
+            self._archivos.clear()
+
+    # --- Lectura ---
+    def indice(self):
+        """{dia: [tickers]} según lo que hay en disco."""
+        resultado = {}
+        if not os.path.isdir(self.directorio):
+            return resultado
+        for dia in sorted(os.listdir(self.directorio)):
+            carpeta = os.path.join(self.directorio, dia)
+            if os.path.isdir(carpeta):
+                resultado[dia] = sorted(unquote(t) for t in os.listdir(carpeta))
+        return resultado
+
+    def leer(self, ticker, dia, desde_ns=None, hasta_ns=None):
+        """Ticks de un contrato en un día, opcionalmente en [desde_ns, hasta_ns)."""
+        return SerieTicks(os.path.join(self.directorio, dia, quote(ticker, safe="")), desde_ns, hasta_ns)
+
+class SerieTicks:
+    """Columnas mapeadas en memoria: `ts`, `precio` y `lado` son memoryview (sin copia).
+
+    Usar como context manager (o llamar a close) para liberar los mapeos.
+    """
+
+    def __init__(self, carpeta, desde_ns=None, hasta_ns=None):
+        self._mapas = []
+        vistas = []
+        for nombre, formato, ancho in _COLUMNAS:
+            ruta = os.path.join(carpeta, nombre)
+            tam = os.path.getsize(ruta) if os.path.exists(ruta) else 0
+            if tam == 0:
+                vistas.append((memoryview(b""), 0))
+                continue
+            with open(ruta, "rb") as f:
+                mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._mapas.append(mm)
+            vistas.append((memoryview(mm), tam // ancho))
+
+        # Un corte a mitad de escritura puede dejar columnas de distinto largo (el
+        # escritor las realinea al reabrir; mientras tanto se lee hasta la más corta)
+        n = min(cant for _, cant in vistas)
+        self._vistas = [vista[:n * ancho].cast(formato)
+                        for (vista, _), (_, formato, ancho) in zip(vistas, _COLUMNAS)]
+        ts, precio, lado = self._vistas
+
+        inicio = 0 if desde_ns is None else bisect.bisect_left(ts, desde_ns)
+        fin = n if hasta_ns is None else bisect.bisect_left(ts, hasta_ns)
+        self.ts = ts[inicio:fin]
+        self.precio = precio[inicio:fin]
+        self.lado = lado[inicio:fin]
+
+    def __len__(self):
+        return len(self.ts)
+
+    def __iter__(self):
+        return zip(self.ts, self.precio, self.lado)
+
+    def close(self):
+        for v in (self.ts, self.precio, self.lado, *self._vistas):
+            v.release()
+        for mm in self._mapas:
+            mm.close()
+        self._mapas = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -2,6 +2,7 @@ import os
 import pyRofex
 import json
 from dotenv import load_dotenv
+from catalogo import obtener_catalogo
 
 load_dotenv()
 
@@ -16,35 +17,14 @@ def listar_bonos():
         )
         print("Obteniendo todos los instrumentos del mercado...")
         
-        # Obtener todos los instrumentos
-        res = pyRofex.get_all_instruments()
-        
-        if res['status'] != 'OK':
-            print("Error al obtener instrumentos:", res)
-            return
-
-        instruments = res['instruments']
-        print(f"Total de instrumentos encontrados: {len(instruments)}")
-        
-        bonos = []
+        # Obtener todos los instrumentos (catálogo cacheado en disco)
+        catalogo = obtener_catalogo()
+        print(f"Total de instrumentos encontrados: {len(catalogo.simbolos)}")
         
         print("\nFiltrando instrumentos de Renta Fija (Bonos comuns)...")
         
-        for inst in instruments:
-            symbol = inst['instrumentId']['symbol']
-            
-            # Criterio simple para detectar Bonos:
-            # Generalmente tienen números (AL30, GD30, TX24) y NO son futuros de ROFEX o DLR
-            # Excluimos DLR, opciones, y futuros de índices
-            if (any(c.isdigit() for c in symbol) and 
-                not symbol.startswith('DLR') and 
-                not symbol.startswith('RFX') and
-                len(symbol) < 15): # Evitar nombres muy largos complejos
-                
-                bonos.append(symbol)
-
-        # Ordenar y mostrar
-        bonos_sorted = sorted(bonos)
+        # Ya ordenados en el índice de bonos del catálogo
+        bonos_sorted = catalogo.bonos
         
         print(f"\n--- Bonos Detectados ({len(bonos_sorted)}) ---")
         for i, bono in enumerate(bonos_sorted):
@@ -0,0 +1,266 @@
+"""Ingesta de Market Data con asyncio y reparto a varios consumidores.
+
+    thread del WebSocket --publicar()--> entrada acotada --> parser (una vez)
+        --> consumidor 1 (su cola y su política) --> thread propio
+        --> consumidor 2 ...
+
+El handler de pyRofex sólo hace `deque.append` y, si el loop está dormido,
+lo despierta: nunca espera a nadie. El parser corre en el loop de asyncio,
+aplica cada mensaje al `LibroCotizaciones` y reparte un `Tick` inmutable (la
+foto del ticker en ese mensaje) a la cola de cada consumidor. Cada consumidor
+tiene su propia tarea y, si su función es sincrónica (disco, Tk), su propio
+thread: uno lento sólo atrasa su propia cola.
+
+Políticas de cola por consumidor:
+  - TODOS: cada tick en orden; si la cola llega a `maximo` se descartan los
+    más viejos (y se cuentan). Para el historial de ticks.
+  - ULTIMO: sólo el último tick de cada ticker (lo viejo se pisa). Para lo
+    que muestra o publica el estado actual: curva JSON, GUI.
+
+`estadisticas()` da, por etapa, profundidad de cola, descartados y el lag
+(desde que llegó el mensaje hasta que la etapa terminó de procesarlo).
+"""
+import asyncio
+import inspect
+import threading
+import time
+from collections import deque, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+from cotizaciones import LibroCotizaciones
+
+TODOS = "todos"
+ULTIMO = "ultimo"
+
+MAXIMO_ENTRADA = 20000
+LOTE_PARSER = 1000
+
+# Foto de un ticker después de aplicar un mensaje. `recibido`: time.perf_counter() al llegar.
+# Tiene los mismos atributos que Cotizacion que usan historial/publicador.
+Tick = namedtuple("Tick", "symbol bid offer last timestamp recibido")
+
+class _Lag:
+    def __init__(self):
+        self.ultimo = 0.0
+        self.maximo = 0.0
+
+    def medir(self, recibido, ahora):
+        lag = ahora - recibido
+        self.ultimo = lag
+        if lag > self.maximo:
+            self.maximo = lag
+
+    def a_dict(self, reiniciar):
+        d = {"lag_ms": round(self.ultimo * 1000, 3), "lag_max_ms": round(self.maximo * 1000, 3)}
+        if reiniciar:
+            self.maximo = 0.0
+        return d
+
+class Consumidor:
+    def __init__(self, nombre, funcion, politica=TODOS, maximo=10000, lote=1000):
+        """`funcion(lote)` recibe una lista de Tick. Puede ser una corrutina."""
+        if politica not in (TODOS, ULTIMO):
+            raise ValueError(f"Política desconocida: {politica}")
+        self.nombre = nombre
+        self.funcion = funcion
+        self.politica = politica
+        self.maximo = maximo
+        self.lote = lote
+        self.es_async = inspect.iscoroutinefunction(funcion)
+        self._cola = deque(maxlen=maximo) if politica == TODOS else {}
+        self._hay = None       # se crea en el loop (Python 3.9 liga el Event al loop al crearlo)
+        self._executor = None
+        self.recibidos = 0
+        self.procesados = 0
+        self.descartados = 0   # TODOS: desbordes de la cola
+        self.agrupados = 0     # ULTIMO: ticks pisados por uno más nuevo del mismo ticker
+        self.errores = 0
+        self.lag = _Lag()
+
+    def ofrecer(self, tick):
+        """Lado del parser (loop de asyncio). Nunca espera."""
+        self.recibidos += 1
+        cola = self._cola
+        if self.politica == TODOS:
+            if len(cola) == self.maximo:
+                self.descartados += 1
+            cola.append(tick)
+        else:
+            if tick.symbol in cola:
+                # Se conserva el `recibido` más viejo: el lag mide cuánto esperó el dato
+                self.agrupados += 1
+                tick = tick._replace(recibido=cola.pop(tick.symbol).recibido)
+            cola[tick.symbol] = tick
+        if self._hay is not None:
+            self._hay.set()
+
+    def _sacar(self):
+        cola = self._cola
+        if self.politica == TODOS:
+            return [cola.popleft() for _ in range(min(len(cola), self.lote))]
+        lote = list(cola.values())
+        cola.clear()
+        return lote
+
+    async def correr(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            await self._hay.wait()
+            self._hay.clear()
+            while self._cola:
+                lote = self._sacar()
+                try:
+                    if self.es_async:
+                        await self.funcion(lote)
+                    else:
+                        await loop.run_in_executor(self._executor, self.funcion, lote)
+                except Exception as e:
+                    self.errores += 1
+                    print(f"❌ Consumidor {self.nombre}: {e}")
+                self.procesados += len(lote)
+                self.lag.medir(min(t.recibido for t in lote), time.perf_counter())
+
+    def estadisticas(self, reiniciar=False):
+        return {"politica": self.politica, "profundidad": len(self._cola), "recibidos": self.recibidos,
+                "procesados": self.procesados, "descartados": self.descartados,
+                "agrupados": self.agrupados, "errores": self.errores, **self.lag.a_dict(reiniciar)}
+
+class PipelineMarketData:
+    def __init__(self, libro=None, maximo=MAXIMO_ENTRADA):
+        self.libro = libro if libro is not None else LibroCotizaciones()
+        self.consumidores = []
+        self.maximo = maximo
+        self._entrada = deque(maxlen=maximo)
+        self._despierto = False
+        self._hay = None
+        self._loop = None
+        self._thread = None
+        self._tareas = []
+        self.recibidos = 0        # sólo lo incrementa el productor
+        self.descartados = 0
+        self.parseados = 0
+        self.errores = 0          # mensajes que el parser no pudo aplicar (se saltean)
+        self.lag = _Lag()
+
+    def agregar(self, nombre, funcion, politica=TODOS, maximo=10000, lote=1000):
+        consumidor = Consumidor(nombre, funcion, politica, maximo, lote)
+        self.consumidores.append(consumidor)
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._arrancar, consumidor)
+        return consumidor
+
+    # --- Lado productor (thread del WebSocket) ---
+    def publicar(self, message):
+        """market_data_handler para pyRofex: encola y vuelve, sin parsear."""
+        entrada = self._entrada
+        if len(entrada) == self.maximo:
+            self.descartados += 1
+        entrada.append((time.perf_counter(), message))
+        self.recibidos += 1
+        if not self._despierto and self._loop is not None:
+            self._despierto = True
+            try:
+                self._loop.call_soon_threadsafe(self._hay.set)
+            except RuntimeError:
+                pass  # loop cerrado
+
+    # --- Loop de asyncio ---
+    def _arrancar(self, consumidor):
+        consumidor._hay = asyncio.Event()
+        if consumidor._cola:
+            consumidor._hay.set()
+        if not consumidor.es_async:
+            consumidor._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"md-{consumidor.nombre}")
+        self._tareas.append(asyncio.ensure_future(consumidor.correr()))
+
+    async def correr(self):
+        """Corre el parser y los consumidores en el loop actual (hasta cancelar)."""
+        self._loop = asyncio.get_running_loop()
+        self._hay = asyncio.Event()
+        if self._entrada:
+            self._hay.set()  # lo publicado antes de arrancar
+        for consumidor in self.consumidores:
+            self._arrancar(consumidor)
+        entrada = self._entrada
+        actualizar = self.libro.actualizar
+        try:
+            while True:
+                await self._hay.wait()
+                self._hay.clear()
+                self._despierto = False
+                while entrada:
+                    for _ in range(min(len(entrada), LOTE_PARSER)):
+                        recibido, message = entrada.popleft()
+                        try:
+                            q = actualizar(message)
+                        except Exception as e:
+                            # Un mensaje mal formado no puede frenar al resto del feed
+                            self.errores += 1
+                            print(f"❌ Parser: {e} en {message!r:.200}")
+                            continue
+                        tick = Tick(q.symbol, q.bid, q.offer, q.last, q.timestamp, recibido)
+                        for consumidor in self.consumidores:
+                            consumidor.ofrecer(tick)
+                        self.parseados += 1
+                    self.lag.medir(recibido, time.perf_counter())
+                    await asyncio.sleep(0)  # deja correr a los consumidores async entre lotes
+        finally:
+            for tarea in self._tareas:
+                tarea.cancel()
+            for consumidor in self.consumidores:
+                if consumidor._executor is not None:
+                    consumidor._executor.shutdown(wait=False)
+
+    def iniciar(self):
+        """Corre el pipeline en un loop propio, en un thread daemon. Devuelve cuando está listo."""
+        listo = threading.Event()
+
+        def principal():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            tarea = loop.create_task(self.correr())
+            loop.call_soon(listo.set)
+            try:
+                loop.run_until_complete(tarea)
+            except asyncio.CancelledError:
+                pass
+            finally:
+                loop.close()
+
+        self._thread = threading.Thread(target=principal, name="pipeline-md", daemon=True)
+        self._thread.start()
+        listo.wait()
+        return self
+
+    def detener(self, timeout=5):
+        """Espera a que se vacíen las colas (hasta `timeout`) y detiene el loop."""
+        limite = time.monotonic() + timeout
+        while time.monotonic() < limite and (self._entrada or any(
+                c._cola or c.procesados + c.agrupados + c.descartados < c.recibidos for c in self.consumidores)):
+            time.sleep(0.01)
+        if self._loop is not None and self._thread is not None:
+            def cancelar():
+                for tarea in asyncio.all_tasks(self._loop):
+                    tarea.cancel()
+            self._loop.call_soon_threadsafe(cancelar)
+            self._thread.join(timeout)
+            self._loop = None
+
+    def estadisticas(self, reiniciar=False):
+        """{"entrada": {...}, consumidor: {...}}. `reiniciar` vuelve a cero los lag máximos."""
+        resultado = {"entrada": {"profundidad": len(self._entrada), "recibidos": self.recibidos,
+                                 "parseados": self.parseados, "descartados": self.descartados,
+                                 "errores": self.errores,
+                                 **self.lag.a_dict(reiniciar)}}
+        for consumidor in self.consumidores:
+            resultado[consumidor.nombre] = consumidor.estadisticas(reiniciar)
+        return resultado
+
+    def resumen(self):
+        """Una línea para el log: profundidad y lag máximo por etapa."""
+        partes = []
+        for nombre, e in self.estadisticas(reiniciar=True).items():
+            perdidos = f" desc={e['descartados']}" if e["descartados"] else ""
+            perdidos += f" err={e['errores']}" if e["errores"] else ""
+            partes.append(f"{nombre}: cola={e['profundidad']} lag_max={e['lag_max_ms']:.1f}ms{perdidos}")
+        return " | ".join(partes)
@@ -0,0 +1,100 @@
+"""Libro de profundidad (L2) por ticker y ejecución simulada contra el libro.
+
+Cada ticker tiene un `LibroTicker` con slots que se actualiza en el lugar.
+Los niveles no se copian: el libro guarda la referencia a las listas `BI`/`OF`
+que ya armó el parser de JSON de pyRofex (WS o REST, mismo formato), así que
+actualizar cuesta lo mismo con 1 o con 50 niveles y no crea objetos por
+mensaje. La profundidad configurada limita lo que se pide a la API y lo que
+se recorre al ejecutar (ver benchmarks/bench_profundidad.py).
+
+Una orden de mercado recorre los niveles del lado opuesto y se ejecuta al
+VWAP resultante; el slippage es la diferencia contra el mejor precio.
+"""
+import os
+
+PROFUNDIDAD = int(os.getenv("PROFUNDIDAD_L2", "5"))
+INFINITO = float("inf")
+_VACIO = ()
+
+class LibroTicker:
+    __slots__ = ("symbol", "capacidad", "bids", "offers", "timestamp")
+
+    def __init__(self, symbol, capacidad=PROFUNDIDAD):
+        self.symbol = symbol
+        self.capacidad = capacidad
+        self.bids = _VACIO    # [{"price", "size"}, ...] tal como llegó, mejor precio primero
+        self.offers = _VACIO
+        self.timestamp = None
+
+    def aplicar(self, md):
+        """Toma los lados presentes en `md`; un lado ausente no se toca, uno vacío queda sin niveles."""
+        niveles = md.get("BI", self)
+        if niveles is not self:
+            self.bids = niveles or _VACIO
+        niveles = md.get("OF", self)
+        if niveles is not self:
+            self.offers = niveles or _VACIO
+
+    def niveles(self, lado):
+        """[(precio, cantidad)] de "bid" u "offer", hasta la profundidad configurada."""
+        niveles = self.bids if lado == "bid" else self.offers
+        return [(n["price"], n.get("size")) for n in niveles[:self.capacidad]]
+
+    def ejecutar(self, op, qty):
+        """Simula una orden de mercado sin modificar el libro.
+
+        Compra recorre las ofertas, venta las puntas compradoras. Devuelve
+        (cantidad ejecutada, VWAP, slippage) o (0, None, None) si no hay
+        niveles. Si la profundidad no alcanza, la ejecución es parcial; un
+        nivel sin cantidad informada se considera ilimitado.
+        """
+        niveles = self.offers if op == "buy" else self.bids
+        n = min(len(niveles), self.capacidad)
+        restante = qty
+        monto = 0.0
+        for k in range(n):
+            if restante <= 0:
+                break
+            nivel = niveles[k]
+            size = nivel.get("size")
+            tomado = min(restante, INFINITO if size is None else size)
+            monto += tomado * nivel["price"]
+            restante -= tomado
+        ejecutado = qty - restante
+        if ejecutado <= 0:
+            return 0, None, None
+        vwap = monto / ejecutado
+        mejor = niveles[0]["price"]
+        slippage = vwap - mejor if op == "buy" else mejor - vwap
+        return ejecutado, vwap, slippage
+
+class LibroProfundidad(dict):
+    """{ticker: LibroTicker} que se actualiza con mensajes de pyRofex."""
+
+    def __init__(self, profundidad=PROFUNDIDAD):
+        super().__init__()
+        self.profundidad = profundidad
+
+    def libro(self, symbol):
+        b = self.get(symbol)
+        if b is None:
+            b = self[symbol] = LibroTicker(symbol, self.profundidad)
+        return b
+
+    def actualizar(self, message):
+        """Handler de WebSocket. Devuelve el LibroTicker actualizado."""
+        symbol = message["instrumentId"]["symbol"]
+        b = self.get(symbol)
+        if b is None:
+            b = self[symbol] = LibroTicker(symbol, self.profundidad)
+        b.aplicar(message["marketData"])
+        b.timestamp = message.get("timestamp")
+        return b
+
+    def actualizar_rest(self, symbol, respuesta):
+        """Aplica la respuesta de pyRofex.get_market_data (pedida con depth). Devuelve el LibroTicker o None."""
+        if respuesta.get("status") != "OK":
+            return None
+        b = self.libro(symbol)
+        b.aplicar(respuesta.get("marketData") or {})
+        return b
@@ -0,0 +1,111 @@
+import os
+import json
+import tempfile
+
+CURVA_FILE = "curva_dlr.json"
+
+# mkstemp crea con 0600; los archivos publicados llevan los permisos de un open() común.
+# La umask se lee una sola vez al importar: cambiarla y restaurarla no es seguro entre threads.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+def escribir_json_atomico(ruta, data, indent=None):
+    """Escribe a un archivo temporal en el mismo directorio y lo renombra.
+
+    os.replace es atómico: quien lea `ruta` ve el archivo anterior completo
+    o el nuevo completo, nunca uno a medio escribir.
+    """
+    directorio = os.path.dirname(os.path.abspath(ruta))
+    fd, tmp = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=directorio)
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, 0o666 & ~_UMASK)
+        os.replace(tmp, ruta)
+    except BaseException:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        raise
+
+def _precios(filas):
+    return {f["ticker"]: (f["bid"], f["offer"], f["last"]) for f in filas}
+
+class PublicadorCurva:
+    """Publica la curva sólo cuando cambia algún precio.
+
+    Escribe el archivo completo (mismo formato de siempre) y, al lado, un
+    documento delta con los contratos que cambiaron respecto de la
+    publicación anterior (`curva_dlr_delta.json`).
+    """
+
+    def __init__(self, ruta=CURVA_FILE, ruta_delta=None, servidor=None):
+        self.ruta = ruta
+        self.ruta_delta = ruta_delta or os.path.splitext(ruta)[0] + "_delta.json"
+        self.ultima = {}
+        self.ultimo_orden = []
+        self.ultimo_timestamp = None
+        self.ultimo_completo = []
+        self.servidor = None
+        self._leer_publicada()
+        if servidor is not None:
+            self.conectar_servidor(servidor)
+
+    def conectar_servidor(self, servidor):
+        """Publica también por HTTP/SSE (servidor_http.ServidorCurva), empezando por lo ya publicado."""
+        self.servidor = servidor
+        if self.ultimo_completo:
+            servidor.publicar("/" + os.path.basename(self.ruta), self.ultimo_completo)
+
+    def _leer_publicada(self):
+        # Comparamos contra lo que ya está publicado (ej: el último commit del workflow)
+        try:
+            with open(self.ruta, "r") as f:
+                filas = json.load(f)
+            self.ultima = _precios(filas)
+            self.ultimo_orden = [f["ticker"] for f in filas]
+            self.ultimo_timestamp = filas[0]["timestamp"] if filas else None
+            self.ultimo_completo = filas
+        except (OSError, ValueError, KeyError, TypeError, IndexError):
+            pass
+
+    def publicar(self, filas, timestamp):
+        """Publica las filas [{"ticker", "bid", "offer", "last"}] si cambió algo.
+
+        Devuelve la lista de contratos que cambiaron (vacía si no se escribió nada).
+        """
+        precios = _precios(filas)
+        orden = [f["ticker"] for f in filas]
+        if precios == self.ultima and orden == self.ultimo_orden:
+            return []
+
+        cambios = [f for f in filas if self.ultima.get(f["ticker"]) != precios[f["ticker"]]]
+        eliminados = [t for t in self.ultimo_orden if t not in precios]
+
+        completo = [{"ticker": f["ticker"], "bid": f["bid"], "offer": f["offer"], "last": f["last"],
+                     "timestamp": timestamp} for f in filas]
+        delta = {
+            "timestamp": timestamp,
+            "base": self.ultimo_timestamp,  # publicación sobre la que aplica el delta
+            "cambios": [{"ticker": f["ticker"], "bid": f["bid"], "offer": f["offer"], "last": f["last"]}
+                        for f in cambios],
+            "eliminados": eliminados,
+        }
+        escribir_json_atomico(self.ruta, completo, indent=4)
+        escribir_json_atomico(self.ruta_delta, delta)
+        if self.servidor is not None:
+            documento = "/" + os.path.basename(self.ruta)
+            self.servidor.publicar(documento, completo)
+            # Por SSE sólo va la curva cuya base se manda al conectarse: de las otras
+            # un cliente no tendría sobre qué aplicar los deltas
+            if documento == self.servidor.ruta_curva:
+                self.servidor.emitir("cambios", {"curva": documento, **delta})
+
+        self.ultima = precios
+        self.ultimo_orden = orden
+        self.ultimo_timestamp = timestamp
+        self.ultimo_completo = completo
+        return [f["ticker"] for f in cambios] + eliminados
@@ -1,66 +1,103 @@
 import os
+import sys
 import pyRofex
 import time
+import signal
 import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from catalogo import obtener_catalogo
+from curvas import SUBYACENTES, archivo_curva, sort_key
+from cotizaciones import LibroCotizaciones, a_json, a_texto
+from publicador import PublicadorCurva
+from historial_ticks import HistorialTicks
+from tasas_dlr import MotorTasas, precio_referencia, TASAS_FILE
+from sesiones import configurar_desde_entorno
+from suscripciones import websocket_vivo, esperar_cierre
+from pipeline import PipelineMarketData, TODOS, ULTIMO
+from servidor_http import ServidorCurva, host_puerto
+from velas import AgregadorVelas, archivo_velas
 
 load_dotenv()
 
 # Configuración
-REFRESH_INTERVAL = 60  # 1 minuto
-
-def get_dlr_tickers():
-    """Obtiene contratos mensuales de DLR/ ordenados cronológicamente."""
-    months_map = {
-        'ENE': 1, 'FEB': 2, 'MAR': 3, 'ABR': 4, 'MAY': 5, 'JUN': 6,
-        'JUL': 7, 'AGO': 8, 'SEP': 9, 'OCT': 10, 'NOV': 11, 'DIC': 12
-    }
+REFRESH_INTERVAL = 60  # 1 minuto (modo polling)
+
+# Modo streaming: una sola conexión WebSocket que queda abierta
+PUBLISH_MIN_INTERVAL = 0.5   # Agrupa ráfagas de ticks en una sola publicación (segundos)
+PUBLISH_MAX_INTERVAL = 60    # Publica igual cada este intervalo aunque no haya cambios
+TICKERS_REFRESH_INTERVAL = 3600  # Cada cuánto se buscan contratos nuevos (vencimientos)
+WEBSOCKET_CHECK_INTERVAL = 5  # Cada cuánto se verifica que el WebSocket siga vivo (un cierre limpio no avisa)
+RECONNECT_MAX_WAIT = 60      # Tope del backoff entre reintentos de reconexión
+VELAS_INTERVAL = 5           # Como mucho cada este intervalo se reescriben las velas (curva_*_velas.json)
+
+# Tasas implícitas (curva_dlr_tasas.json): spot de referencia fijo o un ticker a seguir
+SPOT = os.getenv("DLR_SPOT")                # ej: 1480.5 (Com. A3500)
+SPOT_TICKER = os.getenv("DLR_SPOT_TICKER")  # ej: un ticker spot disponible en la cuenta
+
+# Curvas a publicar (una sola suscripción para todas): CURVAS=DLR,ORO,WTI,SOJ,MAI,TRI,RFX20
+# La de DLR va a curva_dlr.json (con tasas implícitas); el resto a curva_<subyacente>.json
+CURVAS = [c.strip().upper() for c in os.getenv("CURVAS", "DLR").split(",") if c.strip()]
+
+ENTRIES = [pyRofex.MarketDataEntry.BIDS, pyRofex.MarketDataEntry.OFFERS, pyRofex.MarketDataEntry.LAST]
+
+def get_curvas():
+    """{subyacente: [contratos mensuales ordenados]} para cada curva de CURVAS.
+
+    Usa el catálogo cacheado en disco: sólo se descarga la lista completa de
+    instrumentos cuando vence el TTL (y en ese caso en segundo plano).
+    """
+    desconocidas = [c for c in CURVAS if c not in SUBYACENTES]
+    if desconocidas:
+        print(f"⚠️ Curvas desconocidas (se ignoran): {', '.join(desconocidas)}")
     try:
-        instruments = pyRofex.get_all_instruments()
-        if instruments['status'] == 'OK':
-            all_symbols = [inst['instrumentId']['symbol'] for inst in instruments['instruments']]
-            
-            dlr_tickers = []
-            for s in all_symbols:
-                # 1. Filtro base: DLR/ y longitud exacta (ej: DLR/NOV26 es 9 caracteres)
-                if not s.startswith("DLR/") or len(s) != 9:
-                    continue
-                
-                # 2. Excluir A, M, Spreads (tienen / extra) y Spots
-                if s.endswith("A") or s.endswith("M") or s.count("/") > 1 or "SPOT" in s:
-                    continue
-                
-                dlr_tickers.append(s)
-
-            # 3. Función de ordenamiento cronológico
-            def sort_key(ticker):
-                # Ticker: DLR/MMM YY
-                month_str = ticker[4:7]
-                year_str = ticker[7:9]
-                month_val = months_map.get(month_str, 0)
-                year_val = int(year_str) if year_str.isdigit() else 0
-                return (year_val * 100) + month_val
-
-            return sorted(dlr_tickers, key=sort_key)
+        catalogo = obtener_catalogo(en_segundo_plano=True)
     except Exception as e:
         print(f"❌ Error al obtener instrumentos: {e}")
-    return []
+        return {}
+    return {c: list(catalogo.curvas[c]) for c in CURVAS if c in SUBYACENTES and catalogo.curvas[c]}
+
+def todos_los_tickers(curvas):
+    return [t for tickers in curvas.values() for t in tickers]
 
 # Diccionario global para guardar los datos momentáneamente
-current_data = {}
+current_data = LibroCotizaciones()
+# Protege current_data entre quien la actualiza (WebSocket o pipeline) y el loop de publicación
+data_lock = threading.Lock()
+# Se activa cada vez que llega un tick (modo streaming)
+cambios = threading.Event()
+# Se activa si la conexión WebSocket se cae (modo streaming); también despierta al loop vía `cambios`
+reconectar = threading.Event()
 
 def market_data_handler(message):
-    instrumento = message["instrumentId"]["symbol"]
-    md = message["marketData"]
-    bid = md["BI"][0]["price"] if md.get("BI") else "S/D"
-    offer = md["OF"][0]["price"] if md.get("OF") else "S/D"
-    last = md["LA"]["price"] if md.get("LA") and isinstance(md["LA"], dict) else "S/D"
-    
-    current_data[instrumento] = {
-        "bid": bid,
-        "offer": offer,
-        "last": last
-    }
+    with data_lock:
+        q = current_data.actualizar(message)
+    historial.registrar(q)
+    velas.registrar(q)
+    cambios.set()
+
+# Modo streaming: el thread del WebSocket sólo encola; el parseo y los consumidores
+# (curva JSON, historial de ticks, velas) corren en el pipeline, cada uno a su ritmo.
+pipeline = PipelineMarketData()
+
+def actualizar_curva(lote):
+    # Sólo el último tick de cada ticker (política ULTIMO)
+    with data_lock:
+        for tick in lote:
+            current_data[tick.symbol] = tick
+    cambios.set()
+
+def registrar_ticks(lote):
+    for tick in lote:
+        historial.registrar(tick)
+
+def registrar_velas(lote):
+    velas.registrar_lote(lote)
+
+pipeline.agregar("curva", actualizar_curva, ULTIMO)
+pipeline.agregar("historial", registrar_ticks, TODOS, maximo=100000)
+pipeline.agregar("velas", registrar_velas, TODOS, maximo=100000)
 
 def error_handler(message):
     if "don't exist" in str(message):
@@ -68,9 +105,227 @@ def error_handler(message):
     else:
         print(f"❌ Error: {message}")
 
-def iniciar_servicio():
-    global current_data
+def exception_handler(e):
+    print(f"⚠️ Conexión WebSocket interrumpida: {e}")
+    reconectar.set()
+    cambios.set()  # que el loop no espere al heartbeat para reconectar
+
+publicador = PublicadorCurva()
+publicadores = {"DLR": publicador}
+historial = HistorialTicks()
+velas = AgregadorVelas()  # OHLCV 1m/5m/1h por contrato, en buffers de tamaño fijo
+motor_tasas = None
+servidor = None  # ServidorCurva con --http
+# Las curvas se escriben en paralelo (cada publicación hace fsync)
+pool_publicacion = ThreadPoolExecutor(max_workers=4, thread_name_prefix="publicar")
+
+def publicador_de(nombre):
+    p = publicadores.get(nombre)
+    if p is None:
+        p = publicadores[nombre] = PublicadorCurva(archivo_curva(nombre), servidor=servidor)
+    return p
+
+def actualizar_tasas(tickers, snapshot, cambiados, ahora):
+    """Recalcula las tasas implícitas sólo de los contratos que cambiaron."""
+    global motor_tasas
+    spot = snapshot.get(SPOT_TICKER, (None, None, None)) if SPOT_TICKER else None
+    spot = precio_referencia(*spot) if spot else (float(SPOT) if SPOT else None)
+    if spot is None:
+        return
+
+    if motor_tasas is None or motor_tasas.tickers != tickers:
+        motor_tasas = MotorTasas(tickers, spot)
+        motor_tasas.cargar({t: precio_referencia(*snapshot[t]) for t in tickers if t in snapshot})
+    else:
+        if not cambiados and spot == motor_tasas.spot:
+            return
+        if spot != motor_tasas.spot:
+            motor_tasas.actualizar_spot(spot)
+        for t in cambiados:
+            if t in snapshot:
+                motor_tasas.actualizar(t, precio_referencia(*snapshot[t]))
+    data = motor_tasas.publicar(ahora)
+    if servidor is not None:
+        servidor.publicar("/" + TASAS_FILE, data)
+
+def foto_libro():
+    with data_lock:
+        return {t: (q.bid, q.offer, q.last) for t, q in current_data.items()}
+
+def publicar_curva(tickers, ahora, verbose=True, nombre="DLR", snapshot=None):
+    """Imprime la curva y la guarda en curva_<subyacente>.json para otros consumidores (ej: Java)."""
+    if snapshot is None:
+        snapshot = foto_libro()
+        historial.flush()
+
+    lineas = [f"\n--- Curva {nombre} Futuro [{ahora}] ---"] if verbose else []
+    tickers = sorted(tickers, key=sort_key)
+    output_data = []
+    for ticker in tickers:
+        bid, offer, last = snapshot.get(ticker, (None, None, None))
+        if verbose:
+            lineas.append(f"📈 {ticker.ljust(12)} | Compra: {a_texto(bid).ljust(8)} | Venta: {a_texto(offer).ljust(8)} | Último: {a_texto(last).ljust(8)}")
+        output_data.append({"ticker": ticker, "bid": a_json(bid), "offer": a_json(offer), "last": a_json(last)})
+    if lineas:
+        print("\n".join(lineas))  # de una vez: varias curvas se publican en paralelo
+
+    # Guardar para integración con otros lenguajes (ej: Java), sólo si cambió algún precio
     try:
+        p = publicador_de(nombre)
+        cambiados = p.publicar(output_data, ahora)
+        velas.publicar(archivo_velas(p.ruta), tickers, ahora, servidor, VELAS_INTERVAL)
+        if cambiados and not verbose:
+            print(f"[{ahora}] 📈 {', '.join(cambiados)}")
+        if nombre == "DLR":
+            actualizar_tasas(tickers, snapshot, cambiados, ahora)
+    except Exception as e:
+        print(f"❌ Error al guardar JSON: {e}")
+
+def publicar_curvas(curvas, ahora, verbose=True):
+    """Publica todas las curvas a partir de una sola foto del libro, escribiendo en paralelo."""
+    snapshot = foto_libro()
+    historial.flush()
+    for nombre in curvas:
+        publicador_de(nombre)  # se crean acá, no desde los threads del pool
+    if len(curvas) == 1:
+        for nombre, tickers in curvas.items():
+            publicar_curva(tickers, ahora, verbose, nombre, snapshot)
+        return
+    futuros = [pool_publicacion.submit(publicar_curva, tickers, ahora, verbose, nombre, snapshot)
+               for nombre, tickers in curvas.items()]
+    for f in futuros:
+        f.result()
+
+def conectar_websocket(tickers):
+    pyRofex.init_websocket_connection(
+        market_data_handler=pipeline.publicar,
+        error_handler=error_handler,
+        exception_handler=exception_handler
+    )
+    pyRofex.market_data_subscription(tickers=tickers + ([SPOT_TICKER] if SPOT_TICKER else []), entries=ENTRIES)
+
+def iniciar_servicio_polling():
+    """Modo original: abre, suscribe, espera 5s y cierra el WebSocket en cada ciclo."""
+    while True:
+        ahora = datetime.datetime.now().strftime("%H:%M:%S")
+        with data_lock:
+            current_data.clear() # Reset data for this snapshot
+        
+        curvas = get_curvas()
+        tickers = todos_los_tickers(curvas)
+        
+        if not tickers:
+            print(f"[{ahora}] ⚠️ No se encontraron contratos vigentes.")
+        else:
+            pyRofex.init_websocket_connection(
+                market_data_handler=market_data_handler,
+                error_handler=error_handler
+            )
+            
+            pyRofex.market_data_subscription(tickers=tickers + ([SPOT_TICKER] if SPOT_TICKER else []), entries=ENTRIES)
+            
+            time.sleep(5)
+            pyRofex.close_websocket_connection()
+
+            publicar_curvas(curvas, ahora)
+        
+        print(f"\nEsperando {REFRESH_INTERVAL}s...")
+        time.sleep(REFRESH_INTERVAL - 5)
+
+def iniciar_servicio_streaming():
+    """Mantiene una única conexión y suscripción; publica al haber cambios (o por heartbeat)."""
+    curvas = get_curvas()
+    while not curvas:
+        print(f"[{datetime.datetime.now():%H:%M:%S}] ⚠️ No se encontraron contratos vigentes.")
+        time.sleep(REFRESH_INTERVAL)
+        curvas = get_curvas()
+    tickers = todos_los_tickers(curvas)
+
+    pipeline.iniciar()
+    conectar_websocket(tickers)
+    print(f"📡 Streaming de {len(tickers)} contratos ({', '.join(f'{n}: {len(t)}' for n, t in curvas.items())}) (Ctrl+C para detener)")
+
+    ultima_publicacion = 0.0
+    ultimo_refresh_tickers = time.monotonic()
+    espera_reconexion = 1
+    proxima_reconexion = 0.0
+    while True:
+        # Espera el próximo tick; cada WEBSOCKET_CHECK_INTERVAL revisa la conexión
+        hubo_cambios = cambios.wait(timeout=WEBSOCKET_CHECK_INTERVAL)
+
+        # pyRofex no llama a exception_handler si el servidor cierra el socket limpiamente
+        if not reconectar.is_set() and websocket_vivo(pyRofex) is False:
+            print("⚠️ El WebSocket se cerró.")
+            reconectar.set()
+
+        if reconectar.is_set() and time.monotonic() >= proxima_reconexion:
+            reconectar.clear()
+            print("🔄 Reconectando WebSocket...")
+            try:
+                pyRofex.close_websocket_connection()
+            except Exception:
+                pass
+            esperar_cierre(pyRofex)
+            try:
+                conectar_websocket(tickers)
+            except Exception as e:
+                print(f"⚠️ No se pudo reconectar: {e}")
+                reconectar.set()
+            if websocket_vivo(pyRofex) is False:
+                reconectar.set()
+            if reconectar.is_set():
+                # Backoff: no reintentar en cada vuelta mientras la red no vuelva
+                proxima_reconexion = time.monotonic() + espera_reconexion
+                espera_reconexion = min(espera_reconexion * 2, RECONNECT_MAX_WAIT)
+            else:
+                espera_reconexion = 1
+
+        # Nuevos vencimientos: suscribir solo los contratos que no teníamos
+        if time.monotonic() - ultimo_refresh_tickers >= TICKERS_REFRESH_INTERVAL:
+            ultimo_refresh_tickers = time.monotonic()
+            nuevas = get_curvas()
+            if nuevas:
+                suscriptos = set(tickers)
+                agregados = [t for t in todos_los_tickers(nuevas) if t not in suscriptos]
+                if agregados:
+                    pyRofex.market_data_subscription(tickers=agregados, entries=ENTRIES)
+                    print(f"➕ Suscriptos nuevos contratos: {', '.join(agregados)}")
+                curvas = nuevas
+                tickers = todos_los_tickers(curvas)
+                hubo_cambios = True
+
+        heartbeat = time.monotonic() - ultima_publicacion >= PUBLISH_MAX_INTERVAL
+        if not hubo_cambios and not heartbeat:
+            continue
+
+        # Coalescer ráfagas: no publicar más seguido que PUBLISH_MIN_INTERVAL
+        espera = PUBLISH_MIN_INTERVAL - (time.monotonic() - ultima_publicacion)
+        if hubo_cambios and espera > 0:
+            time.sleep(espera)
+
+        cambios.clear()
+        ultima_publicacion = time.monotonic()
+        publicar_curvas(curvas, datetime.datetime.now().strftime("%H:%M:%S"), verbose=not hubo_cambios)
+        if not hubo_cambios:
+            print(f"📊 {pipeline.resumen()}")
+
+def opcion_http(argv):
+    """--http [host:puerto] => (host, puerto), o None si no se pidió."""
+    if "--http" not in argv:
+        return None
+    i = argv.index("--http")
+    valor = argv[i + 1] if i + 1 < len(argv) and not argv[i + 1].startswith("--") else ""
+    return host_puerto(valor)
+
+def iniciar_servicio(streaming=True, http=None):
+    global servidor
+    try:
+        if http:
+            servidor = ServidorCurva(*http).iniciar()
+            for p in publicadores.values():
+                p.conectar_servidor(servidor)
+            print(f"🌐 Curva en http://{servidor.host}:{servidor.puerto}/curva_dlr.json (SSE en /eventos)")
+
         pyRofex.initialize(
             user=os.getenv("PRIMARY_USER"),
             password=os.getenv("PRIMARY_PASSWORD"),
@@ -78,57 +333,30 @@ def iniciar_servicio():
             environment=pyRofex.Environment.REMARKET
         )
         
-        while True:
-            ahora = datetime.datetime.now().strftime("%H:%M:%S")
-            current_data = {} # Reset data for this snapshot
-            
-            tickers = get_dlr_tickers()
-            
-            if not tickers:
-                print(f"[{ahora}] ⚠️ No se encontraron contratos vigentes.")
-            else:
-                pyRofex.init_websocket_connection(
-                    market_data_handler=market_data_handler,
-                    error_handler=error_handler
-                )
-                
-                pyRofex.market_data_subscription(
-                    tickers=tickers,
-                    entries=[pyRofex.MarketDataEntry.BIDS, pyRofex.MarketDataEntry.OFFERS, pyRofex.MarketDataEntry.LAST]
-                )
-                
-                time.sleep(5)
-                pyRofex.close_websocket_connection()
-
-                # Imprimir tabla ordenada alfabéticamente e imprimir a JSON
-                print(f"\n--- Curva DLR Futuro [{ahora}] ---")
-                output_data = []
-                for ticker in sorted(tickers, key=sort_key):
-                    d = current_data.get(ticker, {"bid": "S/D", "offer": "S/D", "last": "S/D"})
-                    print(f"📈 {ticker.ljust(12)} | Compra: {str(d['bid']).ljust(8)} | Venta: {str(d['offer']).ljust(8)} | Último: {str(d['last']).ljust(8)}")
-                    output_data.append({
-                        "ticker": ticker,
-                        "bid": d['bid'],
-                        "offer": d['offer'],
-                        "last": d['last'],
-                        "timestamp": ahora
-                    })
-                
-                # Guardar para integración con otros lenguajes (ej: Java)
-                try:
-                    import json
-                    with open("curva_dlr.json", "w") as f:
-                        json.dump(output_data, f, indent=4)
-                except Exception as e:
-                    print(f"❌ Error al guardar JSON: {e}")
-            
-            print(f"\nEsperando {REFRESH_INTERVAL}s...")
-            time.sleep(REFRESH_INTERVAL - 5)
+        if streaming:
+            iniciar_servicio_streaming()
+        else:
+            iniciar_servicio_polling()
 
     except KeyboardInterrupt:
         print("\n🛑 Servicio detenido por el usuario.")
     except Exception as e:
         print(f"⚠️ Error crítico: {e}")
+    finally:
+        try:
+            pyRofex.close_websocket_connection()
+        except Exception:
+            pass
+        pipeline.detener()
+        historial.close()
+        if servidor is not None:
+            servidor.detener()
 
 if __name__ == "__main__":
-    iniciar_servicio()
+    configurar_desde_entorno()  # GRABAR_SESION / REPRODUCIR_SESION
+    # SIGTERM (systemd, docker stop) sale por el finally de iniciar_servicio: el historial
+    # de ticks se cierra con las tres columnas escritas hasta el mismo registro
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    # python servicio_dlr.py --polling  => modo anterior (reconecta cada ciclo)
+    # python servicio_dlr.py --http [host:puerto]  => además sirve la curva por HTTP/SSE
+    iniciar_servicio(streaming="--polling" not in sys.argv, http=opcion_http(sys.argv))
@@ -0,0 +1,266 @@
+"""Servidor HTTP de la curva en vivo (ETag, gzip y Server-Sent Events).
+
+    GET /curva_dlr.json        la curva completa (mismo formato que el archivo)
+    GET /curva_dlr_tasas.json  tasas implícitas (si el servicio las calcula)
+    GET /curva_<subyacente>.json  las otras curvas que publique el servicio (CURVAS)
+    GET /eventos               stream SSE: un evento `curva` con la curva DLR completa
+                               al conectarse y después un evento `cambios` (el mismo
+                               documento que curva_dlr_delta.json, con `curva` indicando
+                               de qué documento es) por publicación de la curva DLR;
+                               las otras curvas sólo se sirven por GET
+    GET /estado                contadores del servidor
+
+Cada documento se serializa y comprime una sola vez por versión; los pedidos
+sólo eligen la representación. Con `If-None-Match` igual al ETag vigente la
+respuesta es un 304 sin cuerpo. Los eventos SSE también se serializan una vez
+y se comparten entre todos los clientes: cada cliente tiene su cola acotada y
+si se atrasa más de MAXIMO_PENDIENTES eventos se le descartan y recibe la
+curva completa de nuevo (no se puede "saltear" un delta).
+
+Corre en un loop de asyncio propio (un thread), así que cientos de clientes
+SSE no son cientos de threads (ver benchmarks/bench_sse.py).
+
+    python servicio_dlr.py --http              # 127.0.0.1:8080
+    python servicio_dlr.py --http 0.0.0.0:8080
+"""
+import gzip
+import json
+import zlib
+import asyncio
+import threading
+from collections import deque
+
+HOST = "127.0.0.1"
+PUERTO = 8080
+MAXIMO_PENDIENTES = 64
+INTERVALO_PING = 15        # comentario SSE para que proxies no corten la conexión
+MAXIMO_ENCABEZADOS = 16384
+MINIMO_GZIP = 256          # debajo de esto comprimir no vale la pena
+
+_RAZONES = {200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed"}
+
+def host_puerto(texto):
+    """"" -> (HOST, PUERTO); "8081" -> (HOST, 8081); "0.0.0.0:8080" -> ("0.0.0.0", 8080)."""
+    if not texto:
+        return HOST, PUERTO
+    host, _, puerto = texto.rpartition(":")
+    return host or HOST, int(puerto)
+
+class Documento:
+    """Una versión de un documento: cuerpo, cuerpo comprimido y ETags (uno por representación)."""
+    __slots__ = ("cuerpo", "gzip", "etag", "etag_gzip")
+
+    def __init__(self, data, version):
+        self.cuerpo = json.dumps(data, separators=(",", ":")).encode()
+        self.gzip = gzip.compress(self.cuerpo, compresslevel=6, mtime=0) if len(self.cuerpo) >= MINIMO_GZIP else None
+        base = f"{version}-{zlib.crc32(self.cuerpo):08x}"
+        self.etag = f'"{base}"'
+        self.etag_gzip = f'"{base}-gz"'
+
+class _ClienteSSE:
+    __slots__ = ("pendientes", "hay", "resincronizar")
+
+    def __init__(self):
+        self.pendientes = deque()
+        self.hay = asyncio.Event()
+        self.resincronizar = False
+
+class ServidorCurva:
+    def __init__(self, host=HOST, puerto=PUERTO, curva="/curva_dlr.json"):
+        self.host = host
+        self.puerto = puerto
+        self.ruta_curva = curva
+        self.documentos = {}   # ruta -> Documento
+        self.version = 0
+        self.clientes = set()
+        self.contadores = {"200": 0, "304": 0, "gzip": 0, "eventos": 0, "resincronizaciones": 0, "sse_total": 0}
+        self._loop = None
+        self._server = None
+        self._thread = None
+
+    # --- Lado del servicio (cualquier thread) ---
+    def publicar(self, ruta, data):
+        """Nueva versión del documento `ruta` (ej: "/curva_dlr.json")."""
+        self._en_loop(self._publicar, ruta, data)
+
+    def emitir(self, evento, data):
+        """Manda un evento SSE a todos los clientes conectados."""
+        self._en_loop(self._emitir, evento, data)
+
+    def _en_loop(self, fn, *args):
+        if self._loop is None:
+            fn(*args)  # todavía no arrancó: se aplica directo
+        else:
+            self._loop.call_soon_threadsafe(fn, *args)
+
+    # --- Loop de asyncio ---
+    def _publicar(self, ruta, data):
+        self.version += 1
+        self.documentos[ruta] = Documento(data, self.version)
+
+    def _emitir(self, evento, data):
+        self.version += 1
+        mensaje = f"id: {self.version}\nevent: {evento}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+        self.contadores["eventos"] += 1
+        for cliente in self.clientes:
+            if len(cliente.pendientes) >= MAXIMO_PENDIENTES:
+                cliente.pendientes.clear()
+                cliente.resincronizar = True
+            else:
+                cliente.pendientes.append(mensaje)
+            cliente.hay.set()
+
+    def _evento_curva(self):
+        doc = self.documentos.get(self.ruta_curva)
+        datos = doc.cuerpo if doc is not None else b"[]"
+        return b"id: " + str(self.version).encode() + b"\nevent: curva\ndata: " + datos + b"\n\n"
+
+    async def _atender(self, reader, writer):
+        try:
+            while True:
+                try:
+                    crudo = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    return
+                lineas = crudo.decode("latin-1").split("\r\n")
+                partes = lineas[0].split()
+                if len(partes) != 3:
+                    await self._responder(writer, 400, b"", cerrar=True)
+                    return
+                metodo, ruta, _ = partes
+                encabezados = {}
+                for linea in lineas[1:]:
+                    nombre, _, valor = linea.partition(":")
+                    if nombre:
+                        encabezados[nombre.strip().lower()] = valor.strip()
+                ruta = ruta.split("?", 1)[0]
+                cerrar = encabezados.get("connection", "").lower() == "close"
+                if metodo not in ("GET", "HEAD"):
+                    await self._responder(writer, 405, b"", cerrar=True)
+                    return
+                if ruta == "/eventos":
+                    await self._sse(writer)
+                    return
+                await self._documento(writer, metodo, ruta, encabezados, cerrar)
+                if cerrar:
+                    return
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _responder(self, writer, estado, cuerpo, extra=(), cerrar=False, head=False):
+        lineas = [f"HTTP/1.1 {estado} {_RAZONES[estado]}", f"Content-Length: {len(cuerpo)}",
+                  "Access-Control-Allow-Origin: *"]
+        lineas.extend(extra)
+        if cerrar:
+            lineas.append("Connection: close")
+        writer.write(("\r\n".join(lineas) + "\r\n\r\n").encode() + (b"" if head else cuerpo))
+        await writer.drain()
+
+    async def _documento(self, writer, metodo, ruta, encabezados, cerrar):
+        head = metodo == "HEAD"
+        if ruta == "/estado":
+            cuerpo = json.dumps(self.estadisticas()).encode()
+            await self._responder(writer, 200, cuerpo, ("Content-Type: application/json", "Cache-Control: no-store"),
+                                  cerrar, head)
+            return
+        doc = self.documentos.get(ruta)
+        if doc is None:
+            await self._responder(writer, 404, b"", cerrar=cerrar, head=head)
+            return
+        comprimir = doc.gzip is not None and "gzip" in encabezados.get("accept-encoding", "")
+        etag = doc.etag_gzip if comprimir else doc.etag
+        extra = [f"ETag: {etag}", "Cache-Control: no-cache", "Vary: Accept-Encoding"]
+        condicion = encabezados.get("if-none-match")
+        if condicion and (condicion.strip() == "*" or etag in (e.strip() for e in condicion.split(","))):
+            self.contadores["304"] += 1
+            lineas = ["HTTP/1.1 304 Not Modified", *extra, "Access-Control-Allow-Origin: *"]
+            if cerrar:
+                lineas.append("Connection: close")
+            writer.write(("\r\n".join(lineas) + "\r\n\r\n").encode())
+            await writer.drain()
+            return
+        self.contadores["200"] += 1
+        extra.append("Content-Type: application/json")
+        if comprimir:
+            self.contadores["gzip"] += 1
+            extra.append("Content-Encoding: gzip")
+        await self._responder(writer, 200, doc.gzip if comprimir else doc.cuerpo, extra, cerrar, head)
+
+    async def _sse(self, writer):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                     b"Connection: keep-alive\r\nX-Accel-Buffering: no\r\nAccess-Control-Allow-Origin: *\r\n\r\n"
+                     + self._evento_curva())
+        cliente = _ClienteSSE()
+        self.clientes.add(cliente)
+        self.contadores["sse_total"] += 1
+        try:
+            await writer.drain()
+            while True:
+                try:
+                    await asyncio.wait_for(cliente.hay.wait(), INTERVALO_PING)
+                except asyncio.TimeoutError:
+                    if writer.is_closing():
+                        break
+                    writer.write(b": ping\n\n")
+                    await writer.drain()
+                    continue
+                cliente.hay.clear()
+                if writer.is_closing():
+                    break  # el cliente se fue
+                if cliente.resincronizar:
+                    cliente.resincronizar = False
+                    self.contadores["resincronizaciones"] += 1
+                    writer.write(self._evento_curva())
+                while cliente.pendientes:
+                    writer.write(cliente.pendientes.popleft())
+                await writer.drain()  # si el cliente no lee, sólo espera este cliente
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.clientes.discard(cliente)
+
+    def estadisticas(self):
+        return {"version": self.version, "clientes_sse": len(self.clientes), **self.contadores}
+
+    # --- Ciclo de vida ---
+    def iniciar(self):
+        """Arranca el servidor en un thread daemon. Devuelve cuando ya escucha (con el puerto real en `puerto`)."""
+        listo = threading.Event()
+        errores = []
+
+        async def principal():
+            try:
+                self._server = await asyncio.start_server(self._atender, self.host, self.puerto,
+                                                          limit=MAXIMO_ENCABEZADOS, backlog=1024)
+            except OSError as e:
+                errores.append(e)
+                listo.set()
+                return
+            self._loop = asyncio.get_running_loop()
+            self.puerto = self._server.sockets[0].getsockname()[1]
+            listo.set()
+            async with self._server:
+                try:
+                    await self._server.serve_forever()
+                except asyncio.CancelledError:
+                    pass
+
+        self._thread = threading.Thread(target=asyncio.run, args=(principal(),), name="servidor-http", daemon=True)
+        self._thread.start()
+        listo.wait()
+        if errores:
+            raise errores[0]
+        return self
+
+    def detener(self, timeout=5):
+        loop = self._loop
+        if loop is None:
+            return
+        def cancelar():
+            for tarea in asyncio.all_tasks():
+                tarea.cancel()
+        loop.call_soon_threadsafe(cancelar)
+        self._thread.join(timeout)
+        self._loop = None
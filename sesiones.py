@@ -0,0 +1,215 @@
+"""Grabación y reproducción de sesiones de Market Data.
+
+Una sesión es un archivo JSONL comprimido con gzip: una línea de encabezado
+y luego una línea `[segundos_desde_el_inicio, mensaje]` por cada mensaje
+crudo que llegó al market_data_handler.
+
+Cualquier script que use pyRofex puede grabar o reproducir sin cambios en
+su lógica, con variables de entorno (ver `configurar_desde_entorno`):
+
+    GRABAR_SESION=sesion.jsonl.gz python servicio_dlr.py
+    REPRODUCIR_SESION=sesion.jsonl.gz REPRODUCIR_VELOCIDAD=10 python gui_app.py
+    REPRODUCIR_SESION=sesion.jsonl.gz REPRODUCIR_VELOCIDAD=0 python servicio_dlr.py  # máxima velocidad
+"""
+import os
+import gzip
+import atexit
+import json
+import time
+import threading
+
+from cotizaciones import LibroCotizaciones
+
+FORMATO = "sesion-md"
+VERSION = 1
+
+class GrabadorSesion:
+    """Graba los mensajes que recibe un handler (seguro entre threads)."""
+
+    def __init__(self, ruta):
+        self.ruta = ruta
+        self._archivo = gzip.open(ruta, "wt", encoding="utf-8")
+        self._inicio = time.monotonic()
+        self._lock = threading.Lock()
+        self.mensajes = 0
+        self._escribir({"formato": FORMATO, "version": VERSION, "inicio": time.time()})
+
+    def _escribir(self, obj):
+        self._archivo.write(json.dumps(obj, separators=(",", ":")))
+        self._archivo.write("\n")
+
+    def grabar(self, message):
+        with self._lock:
+            if self._archivo is None:
+                return
+            self._escribir([round(time.monotonic() - self._inicio, 6), message])
+            self.mensajes += 1
+
+    def envolver(self, handler):
+        """Devuelve un handler que graba cada mensaje y después llama a `handler`."""
+        def handler_grabado(message):
+            self.grabar(message)
+            if handler is not None:
+                handler(message)
+        return handler_grabado
+
+    def close(self):
+        with self._lock:
+            if self._archivo is not None:
+                self._archivo.close()
+                self._archivo = None
+
+def leer_sesion(ruta):
+    """Itera (segundos, mensaje) de una sesión grabada."""
+    with gzip.open(ruta, "rt", encoding="utf-8") as f:
+        encabezado = json.loads(f.readline())
+        if encabezado.get("formato") != FORMATO:
+            raise ValueError(f"{ruta} no es una sesión de Market Data")
+        try:
+            for linea in f:
+                if linea.strip():
+                    t, message = json.loads(linea)
+                    yield t, message
+        except (EOFError, ValueError):
+            # Grabación cortada (proceso terminado sin cerrar el archivo): se usa lo que haya
+            return
+
+def reproducir(ruta, handler, velocidad=1.0, detener=None):
+    """Entrega los mensajes de la sesión a `handler` respetando los tiempos.
+
+    velocidad: 1.0 = tiempo real, N = N veces más rápido, 0/None = sin esperas.
+    `detener` (threading.Event opcional) corta la reproducción. Devuelve la
+    cantidad de mensajes entregados.
+    """
+    inicio = time.monotonic()
+    n = 0
+    for t, message in leer_sesion(ruta):
+        if detener is not None and detener.is_set():
+            break
+        if velocidad:
+            espera = inicio + t / velocidad - time.monotonic()
+            if espera > 0:
+                time.sleep(espera)
+        handler(message)
+        n += 1
+    return n
+
+class FeedReproduccion:
+    """Reemplaza las funciones de pyRofex por una sesión grabada.
+
+    El reloj de la sesión arranca con la primera suscripción (o el primer
+    `get_market_data`, para scripts sólo REST): los scripts suscriben recién
+    después de cargar el catálogo, y lo reproducido antes se perdería. Al
+    handler del WebSocket sólo le llegan los tickers suscriptos (como con el
+    feed real), y `get_market_data` responde con el último estado reproducido
+    de cada ticker.
+    """
+
+    def __init__(self, ruta, velocidad=1.0):
+        self.ruta = ruta
+        self.velocidad = velocidad
+        self.estado = LibroCotizaciones()
+        self.handler = None
+        self.suscriptos = set()
+        self.terminado = threading.Event()
+        self._detener = threading.Event()
+        self._thread = None
+        self.simbolos = sorted({m["instrumentId"]["symbol"] for _, m in leer_sesion(ruta)})
+
+    def _entregar(self, message):
+        self.estado.actualizar(message)
+        handler = self.handler
+        if handler is not None and message["instrumentId"]["symbol"] in self.suscriptos:
+            handler(message)
+
+    def _correr(self):
+        try:
+            n = reproducir(self.ruta, self._entregar, self.velocidad, self._detener)
+            print(f"⏹️ Reproducción terminada ({n} mensajes).")
+        finally:
+            self.terminado.set()
+
+    def _arrancar(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._correr, daemon=True)
+            self._thread.start()
+
+    # --- API compatible con pyRofex ---
+    def initialize(self, *args, **kwargs):
+        pass  # no hay sesión real
+
+    def get_all_instruments(self, *args, **kwargs):
+        return {"status": "OK", "instruments": [
+            {"instrumentId": {"marketId": "ROFX", "symbol": s}} for s in self.simbolos]}
+
+    def init_websocket_connection(self, market_data_handler=None, *args, **kwargs):
+        self.handler = market_data_handler
+
+    def market_data_subscription(self, tickers, *args, **kwargs):
+        self.suscriptos.update(tickers)
+        self._arrancar()
+
+    def close_websocket_connection(self, *args, **kwargs):
+        self.suscriptos.clear()
+
+    def get_market_data(self, ticker, *args, **kwargs):
+        self._arrancar()
+        q = self.estado.get(ticker)
+        if q is None:
+            return {"status": "ERROR", "description": f"{ticker} sin datos en la sesión"}
+        md = {"BI": [{"price": q.bid, "size": q.bid_size}] if q.bid is not None else [],
+              "OF": [{"price": q.offer, "size": q.offer_size}] if q.offer is not None else [],
+              "LA": {"price": q.last, "size": q.last_size} if q.last is not None else None}
+        return {"status": "OK", "marketData": md}
+
+    def instalar(self, modulo):
+        for nombre in ("initialize", "get_all_instruments", "init_websocket_connection",
+                       "market_data_subscription", "close_websocket_connection", "get_market_data"):
+            setattr(modulo, nombre, getattr(self, nombre))
+        return self
+
+def instalar_grabacion(modulo, ruta):
+    """Graba todo lo que llegue a los handlers pasados a init_websocket_connection."""
+    grabador = GrabadorSesion(ruta)
+    original = modulo.init_websocket_connection
+    # Un envoltorio por handler original: pyRofex no vuelve a registrar un handler
+    # igual (==), así que reconectar con el mismo handler no lo duplica
+    envueltos = {}
+
+    def init_websocket_connection(market_data_handler=None, *args, **kwargs):
+        envuelto = envueltos.get(market_data_handler)
+        if envuelto is None:
+            envuelto = envueltos[market_data_handler] = grabador.envolver(market_data_handler)
+        return original(envuelto, *args, **kwargs)
+
+    modulo.init_websocket_connection = init_websocket_connection
+    atexit.register(grabador.close)
+    return grabador
+
+def configurar_desde_entorno():
+    """Activa grabación o reproducción según GRABAR_SESION / REPRODUCIR_SESION,
+    o el gateway local de Market Data según GATEWAY_MD (ver gateway.py).
+
+    Devuelve el GrabadorSesion, FeedReproduccion o FeedGateway activo, o None.
+    """
+    import pyRofex
+    import catalogo
+    gateway = os.getenv("GATEWAY_MD")
+    if gateway or os.getenv("REPRODUCIR_SESION"):
+        # El catálogo puede venir de una sesión grabada: que no pise el cache de las corridas reales
+        catalogo.desactivar_cache_disco()
+    if gateway:
+        from gateway import FeedGateway, direccion_desde_texto
+        direccion = direccion_desde_texto(gateway)
+        print(f"🛰️ Market Data vía gateway local {direccion}")
+        return FeedGateway(direccion).instalar(pyRofex)
+    reproducir_ruta = os.getenv("REPRODUCIR_SESION")
+    if reproducir_ruta:
+        velocidad = float(os.getenv("REPRODUCIR_VELOCIDAD", "1"))
+        print(f"▶️ Reproduciendo {reproducir_ruta} a {'máxima velocidad' if not velocidad else f'{velocidad:g}x'}")
+        return FeedReproduccion(reproducir_ruta, velocidad).instalar(pyRofex)
+    grabar_ruta = os.getenv("GRABAR_SESION")
+    if grabar_ruta:
+        print(f"⏺️ Grabando mensajes de Market Data en {grabar_ruta}")
+        return instalar_grabacion(pyRofex, grabar_ruta)
+    return None
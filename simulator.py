@@ -1,27 +1,55 @@
 import os
 import json
 import time
+import threading
 import pyRofex
 from dotenv import load_dotenv
+from cotizaciones import LibroCotizaciones, a_texto
+from sesiones import configurar_desde_entorno
+from publicador import escribir_json_atomico
+from diario import DiarioOperaciones
+from valuacion import MotorValuacion
+from profundidad import LibroProfundidad, PROFUNDIDAD
+from suscripciones import GestorSuscripciones
 
 # Cargar variables de entorno
 load_dotenv()
 
+ENTRIES_MD = [pyRofex.MarketDataEntry.BIDS, pyRofex.MarketDataEntry.OFFERS, pyRofex.MarketDataEntry.LAST]
+# Vigencia de una cotización que no mantiene el WebSocket (segundos)
+TTL_COTIZACION = 30
+# Espera del snapshot inicial al suscribir un ticker nuevo, antes de ir por REST
+ESPERA_SNAPSHOT = 0.5
+
 PORTFOLIO_FILE = "portfolio.json"
+JOURNAL_FILE = "portfolio.journal.jsonl"
+# Operaciones en el diario antes de reescribir el snapshot
+COMPACTAR_CADA = 500
 
 class Portfolio:
-    def __init__(self):
+    def __init__(self, journal=False, ruta=PORTFOLIO_FILE, ruta_journal=JOURNAL_FILE,
+                 fsync_cada=1, compactar_cada=COMPACTAR_CADA):
+        """Con `journal=True` cada operación se agrega al diario (ver diario.py) en
+        lugar de reescribir todo el archivo; el snapshot se compacta cada
+        `compactar_cada` operaciones."""
+        self.ruta = ruta
         self.cash = 0
         self.positions = {}
+        self.gen = 0
+        self.valuacion = MotorValuacion()
+        self.compactar_cada = compactar_cada
+        self.diario = DiarioOperaciones(ruta_journal, fsync_cada) if journal else None
         self.load()
 
     def load(self):
-        if os.path.exists(PORTFOLIO_FILE):
+        data = {}
+        if os.path.exists(self.ruta):
             try:
-                with open(PORTFOLIO_FILE, "r") as f:
+                with open(self.ruta, "r") as f:
                     data = json.load(f)
                     self.cash = data.get("cash", 0)
                     self.positions = data.get("positions", {})
+                    self.gen = data.get("gen", 0)
             except Exception as e:
                 print(f"⚠️ Error cargando portafolio: {e}")
                 self.cash = 0
@@ -31,49 +59,123 @@ class Portfolio:
             self.cash = 0
             self.positions = {}
 
+        self.valuacion = MotorValuacion()
+        self.valuacion.realizado = data.get("realizado", 0.0)
+        costos = data.get("costos", {})
+        for ticker, qty in self.positions.items():
+            self.valuacion.cargar(ticker, qty, costos.get(ticker))
+
+        if self.diario is not None:
+            self.diario.close()
+            for r in self.diario.abrir(self.gen):
+                self._aplicar(r["op"], r["ticker"], r["qty"], r["price"])
+
     def save(self):
-        with open(PORTFOLIO_FILE, "w") as f:
-            json.dump({
-                "cash": self.cash,
-                "positions": self.positions
-            }, f, indent=4)
+        """Snapshot completo (escritura atómica). Con diario, además lo compacta."""
+        gen = self.gen + 1 if self.diario is not None else self.gen
+        escribir_json_atomico(self.ruta, {
+            "cash": self.cash,
+            "positions": self.positions,
+            "costos": self.valuacion.costos(),
+            "realizado": self.valuacion.realizado,
+            "gen": gen,
+        }, indent=4)
+        if self.diario is not None:
+            self.diario.reiniciar(gen)
+        self.gen = gen
+
+    def close(self):
+        if self.diario is not None:
+            self.diario.close()
+
+    @property
+    def equity(self):
+        """Patrimonio: saldo + tenencias al último precio conocido."""
+        return self.cash + self.valuacion.total_valor
+
+    def valuar(self, ticker, price):
+        """Precio nuevo de un ticker; True si está en cartera."""
+        return self.valuacion.actualizar_precio(ticker, price)
+
+    def _aplicar(self, op, ticker, qty, price):
+        self.valuacion.operar(op, ticker, qty, price)
+        if op == "buy":
+            self.cash -= qty * price
+            self.positions[ticker] = self.positions.get(ticker, 0) + qty
+        else:
+            self.cash += qty * price
+            new_qty = self.positions.get(ticker, 0) - qty
+            if new_qty == 0:
+                del self.positions[ticker]
+            else:
+                self.positions[ticker] = new_qty
+
+    def _persistir(self, op, ticker, qty, price):
+        if self.diario is None:
+            self.save()
+            return
+        self.diario.registrar(op, ticker, qty, price)
+        if self.diario.seq >= self.compactar_cada:
+            self.save()
 
     def buy(self, ticker, qty, price):
         total_cost = qty * price
         if total_cost > self.cash:
             return False, "Saldo insuficiente"
-        
-        self.cash -= total_cost
-        
-        # Actualizar posiciones: guardar precio promedio ponderado (PPP) si se desea, 
-        # pero por simplicidad sumamos cantidad.
-        current_qty = self.positions.get(ticker, 0)
-        self.positions[ticker] = current_qty + qty
-        
-        self.save()
+
+        self._aplicar("buy", ticker, qty, price)
+        self._persistir("buy", ticker, qty, price)
         return True, f"Compra exitosa: {qty} x {ticker} @ ${price}"
 
     def sell(self, ticker, qty, price):
         current_qty = self.positions.get(ticker, 0)
         if qty > current_qty:
             return False, "Cantidad insuficiente en cartera"
-        
-        total_income = qty * price
-        self.cash += total_income
-        
-        new_qty = current_qty - qty
-        if new_qty == 0:
-            del self.positions[ticker]
-        else:
-            self.positions[ticker] = new_qty
-            
-        self.save()
+
+        self._aplicar("sell", ticker, qty, price)
+        self._persistir("sell", ticker, qty, price)
         return True, f"Venta exitosa: {qty} x {ticker} @ ${price}"
 
+def ejecutar_a_mercado(portfolio, libro, op, ticker, qty):
+    """Orden de mercado contra el libro L2: ejecuta al VWAP de los niveles que recorre.
+
+    Si el libro no informa cantidades por nivel, se ejecuta todo al mejor precio.
+    Devuelve (success, msg) como Portfolio.buy / sell.
+    """
+    ejecutado, vwap, slippage = libro.ejecutar(op, qty) if libro is not None else (0, None, None)
+    if not ejecutado:
+        return False, "Sin profundidad en el libro para ejecutar a mercado"
+    operar = portfolio.buy if op == "buy" else portfolio.sell
+    success, msg = operar(ticker, ejecutado, round(vwap, 6))
+    if success:
+        msg += f" (VWAP, slippage ${slippage:,.2f})"
+        if ejecutado < qty:
+            msg += f" - parcial: {qty - ejecutado} sin profundidad"
+    return success, msg
+
 class Market:
-    def __init__(self):
+    """Cotizaciones para el simulador de consola.
+
+    Mantiene un WebSocket en segundo plano suscripto a los tickers consultados
+    y a las tenencias (ver suscripciones.py): mientras la suscripción está
+    viva, la cotización en cache es la del mercado y se responde sin red. El
+    REST queda para lo que no está en cache o está vencido (más de `ttl`
+    segundos sin actualizarse y sin WebSocket que lo mantenga).
+    """
+
+    def __init__(self, profundidad=PROFUNDIDAD, ttl=TTL_COTIZACION, streaming=True):
         self.connected = False
+        self.streaming = False
+        self.ttl = ttl
+        self.cotizaciones = LibroCotizaciones()
+        self.profundidad = LibroProfundidad(profundidad)
+        self._actualizado = {}  # ticker -> (monotonic, por_websocket)
+        self._cambio = threading.Condition()
+        self.suscripciones = GestorSuscripciones(
+            self.cotizaciones, entries=ENTRIES_MD, depth=profundidad, libros=[self.profundidad, self._actualizado])
         self.connect()
+        if streaming and self.connected:
+            self.start_streaming()
 
     def connect(self):
         try:
@@ -88,32 +190,95 @@ class Market:
             print(f"❌ Error conectando a Mercado: {e}")
             self.connected = False
 
+    def start_streaming(self):
+        try:
+            self.suscripciones.conectar(market_data_handler=self._on_market_data,
+                                        error_handler=self._on_error, exception_handler=self._on_exception)
+            self.streaming = True
+        except Exception as e:
+            print(f"⚠️ Sin WebSocket, se usa sólo REST: {e}")
+            self.streaming = False
+
+    def _on_market_data(self, message):
+        # Thread del WebSocket
+        with self._cambio:
+            q = self.cotizaciones.actualizar(message)
+            self.profundidad.actualizar(message)
+            self._actualizado[q.symbol] = (time.monotonic(), True)
+            self._cambio.notify_all()
+
+    def _on_error(self, message):
+        # Errores de Primary sobre un pedido (ej: ticker mal escrito): el WebSocket sigue vivo
+        if "don't exist" not in str(message):
+            print(f"❌ Error de Market Data: {message}")
+
+    def _on_exception(self, e):
+        # Se cayó el WebSocket: hasta reconectar, las cotizaciones en cache vencen por TTL
+        self.streaming = False
+        threading.Thread(target=self._reconectar, daemon=True).start()
+
+    def _reconectar(self):
+        # GestorSuscripciones reintenta con backoff y serializa reconexiones simultáneas
+        if self.suscripciones.reconectar():
+            self.streaming = True
+        else:
+            print("⚠️ No se pudo reconectar el WebSocket, se usa sólo REST")
+
+    def follow(self, fuente, tickers):
+        """Mantiene suscriptos `tickers` para `fuente` (ej: "portafolio")."""
+        try:
+            self.suscripciones.fijar(fuente, list(tickers))
+        except Exception as e:
+            print(f"⚠️ Error de suscripción: {e}")
+
+    def _vigente(self, ticker):
+        entrada = self._actualizado.get(ticker)
+        if entrada is None:
+            return False
+        momento, por_ws = entrada
+        q = self.cotizaciones.get(ticker)
+        if q is None or (q.bid is None and q.offer is None and q.last is None):
+            return False  # ej: snapshot de WebSocket con mercado cerrado; el REST trae el último cierre
+        if por_ws and self.streaming and ticker in self.suscripciones:
+            return True
+        return time.monotonic() - momento < self.ttl
+
+    def cached(self, ticker):
+        """Cotización en cache si está vigente (sin red), o None."""
+        with self._cambio:
+            return self.cotizaciones.get(ticker) if self._vigente(ticker) else None
+
     def get_market_data(self, ticker):
+        """Cotización (Cotizacion) del ticker, o None si no hay conexión/datos.
+
+        Del cache si está vigente; si no, suscribe el ticker, espera un
+        momento el snapshot del WebSocket y, si no llega, va por REST.
+        """
         if not self.connected: 
             return None
+
+        if self.streaming:
+            self.follow("consulta", [ticker])
+            with self._cambio:
+                self._cambio.wait_for(lambda: self._vigente(ticker), timeout=ESPERA_SNAPSHOT)
+        q = self.cached(ticker)
+        if q is not None:
+            return q
         
         try:
             # Solicitamos BI (Bid), OF (Offer), LA (Last)
             # Nota: pyRofex.get_market_data returns a response with status and marketData
             md = pyRofex.get_market_data(
-                tickers=[ticker],
-                entries=[
-                    pyRofex.MarketDataEntry.BIDS,
-                    pyRofex.MarketDataEntry.OFFERS,
-                    pyRofex.MarketDataEntry.LAST
-                ]
+                ticker=ticker,
+                entries=ENTRIES_MD,
+                depth=self.profundidad.profundidad
             )
-            
-            if md["status"] == "OK":
-                data = md["marketData"][0] # Primer instrumento
-                
-                bid = data["BI"][0]["price"] if data.get("BI") else None
-                offer = data["OF"][0]["price"] if data.get("OF") else None
-                last = data["LA"]["price"] if data.get("LA") else None
-                
-                return {"symbol": ticker, "bid": bid, "offer": offer, "last": last}
-            else:
-                return None
+            with self._cambio:
+                self.profundidad.actualizar_rest(ticker, md)
+                q = self.cotizaciones.actualizar_rest(ticker, md)
+                if q is not None:
+                    self._actualizado[ticker] = (time.monotonic(), False)
+            return q
         except Exception as e:
             print(f"Error fetching data: {e}")
             return None
@@ -122,24 +287,36 @@ def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
 
 def main():
-    portfolio = Portfolio()
+    portfolio = Portfolio(journal=True)
     market = Market()
+    market.follow("portafolio", portfolio.positions)
 
     while True:
+        # Tenencias valorizadas con lo que ya hay en cache (sin pedidos REST)
+        for ticker in portfolio.positions:
+            q = market.cached(ticker)
+            if q is not None:
+                portfolio.valuar(ticker, q.last)
+
         clear_screen()
         print("="*40)
         print("   🏦  SIMULADOR DE TRADING - MENU   ")
         print("="*40)
+        v = portfolio.valuacion
         print(f"💰 Saldo Liquido: ${portfolio.cash:,.2f}")
+        print(f"📈 Patrimonio:    ${portfolio.equity:,.2f}")
+        print(f"   Resultado: ${v.total_no_realizado:,.2f} no realizado | ${v.realizado:,.2f} realizado")
         
-        # Valorizacion rapida (aprox con ultimo precio conocido o 0)
+        # Valorizacion con el ultimo precio consultado de cada tenencia
         print("-" * 40)
         print("📂 Tenencias:")
         if not portfolio.positions:
             print("   (Cartera Vacia)")
         else:
             for ticker, qty in portfolio.positions.items():
-                print(f"   - {ticker}: {qty} nominales")
+                _, costo, precio, valor, no_realizado = v.posicion(ticker)
+                print(f"   - {ticker}: {qty} nominales | PPP {a_texto(costo, '{:,.2f}')} | "
+                      f"Ultimo {a_texto(precio, '{:,.2f}')} | Resultado ${no_realizado:,.2f}")
         
         print("-" * 40)
         print("1. Consultar Precio (Cotizacion)")
@@ -155,10 +332,11 @@ def main():
             print("⏳ Obteniendo datos...")
             data = market.get_market_data(ticker)
             if data:
-                print(f"\n📊 {data['symbol']}")
-                print(f"   Compra (Bid): {data['bid'] if data['bid'] else 'S/D'}")
-                print(f"   Venta (Offer): {data['offer'] if data['offer'] else 'S/D'}")
-                print(f"   Ultimo:       {data['last'] if data['last'] else 'S/D'}")
+                portfolio.valuar(ticker, data.last)
+                print(f"\n📊 {data.symbol}")
+                print(f"   Compra (Bid): {a_texto(data.bid)}")
+                print(f"   Venta (Offer): {a_texto(data.offer)}")
+                print(f"   Ultimo:       {a_texto(data.last)}")
             else:
                 print("❌ No se pudo obtener datos o mercado cerrado.")
             input("\nPresiona ENTER para continuar...")
@@ -166,14 +344,18 @@ def main():
         elif opcion == "2":
             ticker = input("Ticker a COMPRAR: ").strip()
             data = market.get_market_data(ticker)
-            if not data or not data['offer']:
+            if data:
+                portfolio.valuar(ticker, data.last)
+            if not data or data.offer is None:
                 print("❌ No hay oferta activa para comprar a precio de mercado.")
             else:
-                price = data['offer']
+                price = data.offer
                 print(f"💲 Precio de Compra (Punta Vendedora): ${price}")
                 try:
                     qty = int(input("Cantidad a comprar: "))
-                    success, msg = portfolio.buy(ticker, qty, price)
+                    market.get_market_data(ticker)  # libro vigente al momento de ejecutar
+                    success, msg = ejecutar_a_mercado(portfolio, market.profundidad.get(ticker), "buy", ticker, qty)
+                    market.follow("portafolio", portfolio.positions)
                     print(msg)
                 except ValueError:
                     print("❌ Cantidad invalida")
@@ -185,14 +367,18 @@ def main():
                 print("❌ No tienes este activo.")
             else:
                 data = market.get_market_data(ticker)
-                if not data or not data['bid']:
+                if data:
+                    portfolio.valuar(ticker, data.last)
+                if not data or data.bid is None:
                     print("❌ No hay demanda activa para vender a precio de mercado.")
                 else:
-                    price = data['bid']
+                    price = data.bid
                     print(f"💲 Precio de Venta (Punta Compradora): ${price}")
                     try:
                         qty = int(input(f"Cantidad a vender (Max {portfolio.positions[ticker]}): "))
-                        success, msg = portfolio.sell(ticker, qty, price)
+                        market.get_market_data(ticker)
+                        success, msg = ejecutar_a_mercado(portfolio, market.profundidad.get(ticker), "sell", ticker, qty)
+                        market.follow("portafolio", portfolio.positions)
                         print(msg)
                     except ValueError:
                         print("❌ Cantidad invalida")
@@ -203,9 +389,11 @@ def main():
 
         elif opcion == "5":
             print("👋 Nos vemos!")
+            portfolio.close()
             break
 
 if __name__ == "__main__":
+    configurar_desde_entorno()  # GRABAR_SESION / REPRODUCIR_SESION
     if not os.getenv("PRIMARY_USER"):
         print("⚠️ ALERTA: No se detectaron credenciales en .env")
     main()
@@ -0,0 +1,192 @@
+"""Suscripciones de Market Data con conteo de referencias y tope de activas.
+
+Cada "fuente" de interés (la selección de la GUI, las tenencias del
+portafolio, ...) declara qué tickers necesita con `fijar`. Un ticker queda
+suscripto mientras alguna fuente lo use; cuando ninguna lo usa pasa a ser
+descartable y se mantiene sólo como cache (por si el usuario vuelve a él),
+hasta que las suscripciones activas superan `maximo`: ahí se dan de baja los
+menos usados recientemente y se borran sus cotizaciones del libro.
+
+pyRofex no tiene "unsubscribe": dar de baja implica cerrar el WebSocket,
+reconectar y suscribir el conjunto reducido. Para no reconectar a cada rato
+se baja de una vez hasta `bajo` (histéresis), en un thread aparte.
+
+La red (conectar, reconectar, suscribir) va siempre fuera del lock: `fijar`
+se llama desde el thread de Tk y no puede quedar esperando a un WebSocket.
+Una reconexión espera a que termine el thread del WebSocket anterior (si no,
+pyRofex no abre uno nuevo y la suscripción sale por el socket muerto) y
+reintenta con backoff exponencial.
+"""
+import time
+import threading
+from collections import OrderedDict
+
+import pyRofex
+
+MAXIMO_SUSCRIPCIONES = 50
+REINTENTOS = 5
+ESPERA_INICIAL = 1.0   # segundos antes del segundo intento; se duplica en cada uno
+ESPERA_MAXIMA = 30.0
+
+def cliente_websocket(api):
+    """WebSocketClient de pyRofex del entorno por defecto, o None (fakes, gateway, sin inicializar)."""
+    try:
+        g = api.components.globals
+        return g.environment_config[g.default_environment]["ws_client"]
+    except Exception:
+        return None
+
+def websocket_vivo(api):
+    """True/False según el thread del WebSocket de pyRofex; None si la API no lo expone."""
+    cliente = cliente_websocket(api)
+    if cliente is None:
+        return None
+    hilo = cliente.ws_thread
+    return hilo is not None and hilo.is_alive() and cliente.is_connected()
+
+def esperar_cierre(api, timeout=5.0):
+    """Espera a que termine el thread del WebSocket cerrado (pyRofex no reconecta mientras viva)."""
+    cliente = cliente_websocket(api)
+    hilo = cliente.ws_thread if cliente is not None else None
+    if hilo is not None and hilo is not threading.current_thread():
+        hilo.join(timeout)
+
+class GestorSuscripciones:
+    def __init__(self, libro, entries, maximo=MAXIMO_SUSCRIPCIONES, bajo=None, api=None, depth=1, libros=()):
+        """`libros`: otros {ticker: ...} (ej: libro L2) que se limpian junto con `libro` en cada baja."""
+        self.libro = libro
+        self.libros = (libro,) + tuple(libros)
+        self.entries = entries
+        self.depth = depth
+        self.maximo = maximo
+        self.bajo = int(maximo * 0.8) if bajo is None else bajo
+        self.api = api or pyRofex
+        self.fuentes = {}            # fuente -> set(tickers)
+        self.refs = {}               # ticker -> cantidad de fuentes que lo usan
+        self.activos = OrderedDict() # tickers suscriptos, del menos al más usado recientemente
+        self.conectado = False
+        self.reconexiones = 0
+        self._handlers = None
+        self._lock = threading.RLock()
+        self._reconexion = threading.Lock()  # una reconexión a la vez
+        self._reconectando = False           # mientras tanto `fijar` no suscribe (lo hace la reconexión)
+
+    def __contains__(self, ticker):
+        return ticker in self.activos
+
+    def __len__(self):
+        return len(self.activos)
+
+    # --- Conexión ---
+    def conectar(self, market_data_handler, **handlers):
+        """Abre el WebSocket y suscribe lo pedido hasta ahora.
+
+        Al handler sólo le llegan mensajes de tickers activos: lo que llegue
+        de uno ya dado de baja (antes de reconectar) se descarta sin parsear.
+        """
+        activos = self.activos
+
+        def handler(message):
+            if message["instrumentId"]["symbol"] in activos:
+                market_data_handler(message)
+
+        with self._lock:
+            self._handlers = dict(handlers, market_data_handler=handler)
+        self.api.init_websocket_connection(**self._handlers)
+        with self._lock:
+            self.conectado = True
+            tickers = list(self.activos)
+        if tickers:
+            self._suscribir(tickers)
+
+    def _suscribir(self, tickers):
+        self.api.market_data_subscription(tickers=tickers, entries=self.entries, depth=self.depth)
+
+    def reconectar(self, reintentos=REINTENTOS, espera=ESPERA_INICIAL):
+        """Cierra el WebSocket, abre otro y suscribe lo activo. True si quedó conectado.
+
+        Si ya hay una reconexión en curso espera a que termine y usa su
+        resultado. Cada intento fallido espera el doble que el anterior.
+        """
+        pedido = self.reconexiones
+        with self._reconexion:
+            if self.reconexiones != pedido:
+                return True  # otra reconexión terminó mientras esperábamos
+            try:
+                for intento in range(reintentos):
+                    with self._lock:
+                        self._reconectando = True
+                    try:
+                        self._reconectar_una_vez()
+                        self.reconexiones += 1
+                        return True
+                    except Exception as e:
+                        print(f"⚠️ Reconexión del WebSocket fallida ({intento + 1}/{reintentos}): {e}")
+                        if intento + 1 < reintentos:
+                            time.sleep(min(espera * 2 ** intento, ESPERA_MAXIMA))
+                return False
+            finally:
+                with self._lock:
+                    self._reconectando = False
+
+    def _reconectar_una_vez(self):
+        try:
+            self.api.close_websocket_connection()
+        except Exception:
+            pass  # ya estaba cerrado
+        esperar_cierre(self.api)
+        self.api.init_websocket_connection(**self._handlers)
+        if websocket_vivo(self.api) is False:
+            raise ConnectionError("el WebSocket no quedó conectado")
+        with self._lock:
+            # Lo que `fijar` agregó durante la reconexión también entra acá
+            self._reconectando = False
+            tickers = list(self.activos)
+        if tickers:
+            self._suscribir(tickers)
+
+    # --- Interés por fuente ---
+    def fijar(self, fuente, tickers):
+        """Declara el conjunto completo de tickers que usa `fuente`. Devuelve los que se dieron de baja."""
+        with self._lock:
+            nuevos = set(tickers)
+            anteriores = self.fuentes.get(fuente, set())
+            self.fuentes[fuente] = nuevos
+            for t in anteriores - nuevos:
+                self.refs[t] -= 1
+                if not self.refs[t]:
+                    del self.refs[t]
+            a_suscribir = []
+            for t in tickers:
+                if t not in anteriores:
+                    self.refs[t] = self.refs.get(t, 0) + 1
+                if t in self.activos:
+                    self.activos.move_to_end(t)
+                else:
+                    self.activos[t] = None
+                    a_suscribir.append(t)
+            enviar = a_suscribir and self.conectado and not self._reconectando
+            bajas = self._recortar()
+        if enviar:
+            try:
+                self._suscribir(a_suscribir)
+            except Exception as e:
+                # Quedan en `activos`: la próxima reconexión los suscribe
+                print(f"⚠️ No se pudo suscribir {', '.join(a_suscribir)}: {e}")
+        return bajas
+
+    def _recortar(self):
+        if len(self.activos) <= self.maximo:
+            return []
+        bajas = []
+        for t in list(self.activos):
+            if len(self.activos) <= self.bajo:
+                break
+            if t not in self.refs:
+                del self.activos[t]
+                for libro in self.libros:
+                    libro.pop(t, None)
+                bajas.append(t)
+        if bajas and self.conectado:
+            threading.Thread(target=self.reconectar, daemon=True).start()
+        return bajas
@@ -0,0 +1,142 @@
+"""Tasas implícitas de la curva de futuros DLR (vectorizado con NumPy).
+
+Para cada contrato, con F = precio del futuro, S = spot de referencia y
+d = días corridos al vencimiento:
+
+    TNA implícita = (F / S - 1) * 365 / d
+    TEA implícita = (F / S) ^ (365 / d) - 1
+
+y entre vencimientos consecutivos (i, i+1) la tasa forward-forward:
+
+    TNA fwd = (F[i+1] / F[i] - 1) * 365 / (d[i+1] - d[i])
+    TEA fwd = (F[i+1] / F[i]) ^ (365 / (d[i+1] - d[i])) - 1
+
+El vencimiento de cada contrato es el último día hábil del mes del ticker
+(sólo se saltean fines de semana; no se contemplan feriados).
+"""
+import datetime
+import calendar
+from functools import lru_cache
+
+import numpy as np
+
+from curvas import vencimiento_mes
+from publicador import escribir_json_atomico
+
+TASAS_FILE = "curva_dlr_tasas.json"
+
+@lru_cache(maxsize=None)
+def vencimiento(ticker):
+    """Fecha de vencimiento de un contrato mensual (ej: DLR/ENE27 -> 2027-01-29)."""
+    anio, mes = vencimiento_mes(ticker)
+    dia = datetime.date(anio, mes, calendar.monthrange(anio, mes)[1])
+    while dia.weekday() >= 5:
+        dia -= datetime.timedelta(days=1)
+    return dia
+
+def precio_referencia(bid, offer, last):
+    """Punto medio si hay ambas puntas; si no, último operado. None si no hay nada."""
+    if bid is not None and offer is not None:
+        return (bid + offer) / 2
+    return last
+
+def _redondear(valor):
+    return None if np.isnan(valor) else round(float(valor), 6)
+
+class MotorTasas:
+    """Mantiene las tasas de toda la curva en arrays y las recalcula por contrato."""
+
+    def __init__(self, tickers, spot=None, hoy=None):
+        self.tickers = list(tickers)
+        self.indice = {t: i for i, t in enumerate(self.tickers)}
+        n = len(self.tickers)
+        self.spot = np.nan if spot is None else float(spot)
+        self.precios = np.full(n, np.nan)
+        self.tna = np.full(n, np.nan)
+        self.tea = np.full(n, np.nan)
+        self.tna_fwd = np.full(max(n - 1, 0), np.nan)
+        self.tea_fwd = np.full(max(n - 1, 0), np.nan)
+        self.fijar_fecha(hoy or datetime.date.today())
+
+    def fijar_fecha(self, hoy):
+        self.hoy = hoy
+        self.dias = np.array([(vencimiento(t) - hoy).days for t in self.tickers], dtype=float)
+        # Contratos vencidos o que vencen hoy no tienen tasa
+        self.dias[self.dias <= 0] = np.nan
+        self.recalcular()
+
+    def _implicitas(self, sl):
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = self.precios[sl] / self.spot
+            anual = 365.0 / self.dias[sl]
+            self.tna[sl] = (ratio - 1.0) * anual
+            self.tea[sl] = np.power(ratio, anual) - 1.0
+
+    def _forwards(self, sl):
+        # sl indexa pares (i, i+1) sobre arrays de largo n-1
+        lejano = slice(sl.start + 1, sl.stop + 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            ratio = self.precios[lejano] / self.precios[sl]
+            dd = self.dias[lejano] - self.dias[sl]
+            dd[dd <= 0] = np.nan
+            anual = 365.0 / dd
+            self.tna_fwd[sl] = (ratio - 1.0) * anual
+            self.tea_fwd[sl] = np.power(ratio, anual) - 1.0
+
+    def recalcular(self):
+        n = len(self.tickers)
+        self._implicitas(slice(0, n))
+        if n > 1:
+            self._forwards(slice(0, n - 1))
+
+    def cargar(self, precios):
+        """Carga todos los precios {ticker: precio} de una vez y recalcula la curva."""
+        self.precios[:] = [np.nan if precios.get(t) is None else precios[t] for t in self.tickers]
+        self.recalcular()
+
+    def actualizar(self, ticker, precio, hoy=None):
+        """Nuevo precio de un contrato: recalcula sólo su tasa y los dos forwards vecinos."""
+        i = self.indice.get(ticker)
+        if i is None:
+            return False
+        hoy = hoy or datetime.date.today()
+        if hoy != self.hoy:
+            self.precios[i] = np.nan if precio is None else precio
+            self.fijar_fecha(hoy)
+            return True
+        self.precios[i] = np.nan if precio is None else precio
+        self._implicitas(slice(i, i + 1))
+        desde, hasta = max(i - 1, 0), min(i + 1, len(self.tickers) - 1)
+        if hasta > desde:
+            self._forwards(slice(desde, hasta))
+        return True
+
+    def actualizar_spot(self, spot):
+        self.spot = np.nan if spot is None else float(spot)
+        self._implicitas(slice(0, len(self.tickers)))
+
+    def a_json(self):
+        contratos = []
+        for i, t in enumerate(self.tickers):
+            contratos.append({
+                "ticker": t,
+                "vencimiento": vencimiento(t).isoformat(),
+                "dias": None if np.isnan(self.dias[i]) else int(self.dias[i]),
+                "precio": _redondear(self.precios[i]),
+                "tna": _redondear(self.tna[i]),
+                "tea": _redondear(self.tea[i]),
+            })
+        forwards = [{
+            "desde": self.tickers[i],
+            "hasta": self.tickers[i + 1],
+            "tna": _redondear(self.tna_fwd[i]),
+            "tea": _redondear(self.tea_fwd[i]),
+        } for i in range(len(self.tna_fwd))]
+        return {"spot": _redondear(self.spot), "fecha": self.hoy.isoformat(),
+                "contratos": contratos, "forwards": forwards}
+
+    def publicar(self, timestamp, ruta=TASAS_FILE):
+        data = self.a_json()
+        data["timestamp"] = timestamp
+        escribir_json_atomico(ruta, data, indent=4)
+        return data
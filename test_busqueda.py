@@ -0,0 +1,24 @@
+from busqueda import IndiceBusqueda
+
+categorias = {
+    "Futuros": ["DLR/ENE27", "DLR/FEB27", "ORO/ENE27", "RFX20/MAR27"],
+    "Bonos / TVPP": ["AL30", "GD30", "AL35", "TX26"],
+}
+indice = IndiceBusqueda(categorias)
+
+def lineal(consulta, cat):
+    return [t for t in categorias[cat] if consulta.upper() in t.upper()]
+
+for cat in categorias:
+    for consulta in ["", "d", "DL", "dlr", "DLR/", "ENE27", "/ENE27", "L3", "30", "XYZ", "A", "AL3", "AL35"]:
+        esperado = lineal(consulta, cat)
+        assert indice.buscar(consulta, cat) == esperado, (cat, consulta)
+
+# Incremental: escribir de a una letra da lo mismo que el recorrido lineal
+for consulta in ["E", "EN", "ENE", "ENE2", "ENE27", "ENE", ""]:
+    assert indice.buscar(consulta, "Futuros") == lineal(consulta, "Futuros")
+
+print(f"Búsqueda 'ene27': {indice.buscar('ene27', 'Futuros')}")
+assert indice.buscar("ene27", "Futuros") == ["DLR/ENE27", "ORO/ENE27"]
+assert indice.buscar("AL", "Inexistente") == []
+print("✅ Busqueda Verification Passed")
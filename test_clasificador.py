@@ -0,0 +1,52 @@
+import os
+import tempfile
+import clasificador
+from clasificador import categorizar, indice_categorias
+
+def inst(symbol, cfi=None):
+    # Como get_all_instruments: sólo instrumentId y cficode
+    d = {"instrumentId": {"marketId": "ROFX", "symbol": symbol}}
+    if cfi:
+        d["cficode"] = cfi
+    return d
+
+casos = [
+    (inst("DLR/ENE27", "FXXXSX"), "Dólar Futuro"),
+    (inst("DLR/ENE27 1500 C", "OCAFXS"), "Dólar Futuro"),
+    (inst("GGAL/FEB27 5000 C", "OCAFXS"), "Opciones"),
+    (inst("SOJ.ROS/MAY27", "FXXXSX"), "Commodities (Futuros)"),
+    (inst("ORO/ENE27", "FXXXSX"), "Commodities (Futuros)"),
+    (inst("RFX20/MAR27", "FXXXSX"), "Índices (Futuros)"),
+    (inst("GGAL/FEB27", "FXXXSX"), "Otros Futuros"),
+    (inst("MERV - XMEV - AAPL - 24hs", "EMXXXX"), "CEDEARs"),
+    (inst("MERV - XMEV - MSFT - 24hs", "EMXXXX"), "CEDEARs"),   # no hace falta una lista fija
+    (inst("MERV - XMEV - GGAL - 24hs", "ESXXXX"), "Acciones"),
+    (inst("MERV - XMEV - AL30 - 24hs", "DBXXXX"), "Bonos / TVPP"),
+    (inst("AL30", "DBXXXX"), "Bonos / TVPP"),
+    (inst("PESOS - 3D", "RPXXXX"), "Otros"),
+    # Sin código CFI: criterio por símbolo
+    (inst("GD30"), "Bonos / TVPP"),
+    (inst("MERV - XMEV - KO - CI"), "CEDEARs"),
+]
+for i, esperado in casos:
+    assert categorizar(i) == esperado, (i["instrumentId"]["symbol"], categorizar(i), esperado)
+
+# Índice en disco, por versión de catálogo
+ruta = os.path.join(tempfile.mkdtemp(), "clasificacion.json")
+instrumentos = [inst("DLR/FEB27", "FXXXSX"), inst("DLR/DIC26", "FXXXSX"), inst("DLR/ENE27", "FXXXSX"),
+                inst("TX26", "DBXXXX"), inst("AL30", "DBXXXX")]
+categorias = indice_categorias(instrumentos, "v1", ruta)
+print(f"Categorías: {categorias}")
+assert categorias["Dólar Futuro"] == ["DLR/DIC26", "DLR/ENE27", "DLR/FEB27"]  # por vencimiento, no alfabético
+assert categorias["Bonos / TVPP"] == ["AL30", "TX26"]
+assert os.path.exists(ruta)
+
+# Misma versión: se lee del disco sin reclasificar
+original = clasificador.clasificar
+clasificador.clasificar = lambda _: (_ for _ in ()).throw(AssertionError("no debería reclasificar"))
+assert indice_categorias(instrumentos, "v1", ruta) == categorias
+clasificador.clasificar = original
+# Versión nueva: se recalcula
+assert indice_categorias(instrumentos[:2], "v2", ruta) == {"Dólar Futuro": ["DLR/DIC26", "DLR/FEB27"]}
+
+print("✅ Clasificador Verification Passed")
@@ -0,0 +1,37 @@
+from cotizaciones import LibroCotizaciones, SIN_DATO, a_json
+
+libro = LibroCotizaciones()
+
+def msg(symbol, md, ts=1):
+    return {"type": "Md", "timestamp": ts, "instrumentId": {"marketId": "ROFX", "symbol": symbol}, "marketData": md}
+
+# Primer mensaje: crea la cotización
+q = libro.actualizar(msg("DLR/ENE27", {"BI": [{"price": 1500.5, "size": 10}], "OF": [{"price": 1501.0, "size": 3}], "LA": None}))
+print(f"Primer tick: {q}")
+assert q.bid == 1500.5 and q.bid_size == 10
+assert q.offer == 1501.0
+assert q.last is SIN_DATO
+assert libro["DLR/ENE27"] is q
+
+# Siguiente mensaje: actualiza en el lugar (mismo objeto)
+q2 = libro.actualizar(msg("DLR/ENE27", {"BI": [], "OF": [{"price": 1502.0, "size": 1}], "LA": {"price": 1501.5, "size": 2}}, ts=2))
+assert q2 is q
+assert q.bid is SIN_DATO and q.bid_size is SIN_DATO
+assert q.offer == 1502.0
+assert q.last == 1501.5
+assert q.timestamp == 2
+
+# Entradas ausentes del mensaje no se pisan
+libro.actualizar(msg("DLR/ENE27", {"LA": {"price": 1503.0, "size": 1}}))
+assert q.offer == 1502.0 and q.last == 1503.0
+
+# JSON público mantiene "S/D"
+assert q.a_dict() == {"bid": "S/D", "offer": 1502.0, "last": 1503.0}
+assert a_json(None) == "S/D" and a_json(0.0) == 0.0
+
+# Respuesta REST
+r = libro.actualizar_rest("GD30D/24hs", {"status": "OK", "marketData": {"LA": {"price": 70.1, "size": 5}, "BI": [], "OF": []}})
+assert r.last == 70.1 and r.bid is SIN_DATO
+assert libro.actualizar_rest("X", {"status": "ERROR"}) is None
+
+print("✅ Cotizaciones Verification Passed")
@@ -0,0 +1,53 @@
+from curvas import armar_curvas, subyacente, sort_key, vencimiento_mes, es_mensual, archivo_curva
+import os
+import types
+import tempfile
+import catalogo as modulo_catalogo
+from catalogo import Catalogo, es_dlr_mensual
+
+simbolos = [
+    "DLR/ENE27", "DLR/DIC26", "DLR/NOV26A", "DLR/NOV26M", "DLR/NOV26/DIC26", "DLR/SPOT", "DLR/NOV26 ",
+    "ORO/MAR27", "ORO/ENE27", "WTI/FEB27",
+    "SOJ.ROS/MAY27", "SOJ.ROS/NOV26", "MAI.ROS/JUL27", "TRI.ROS/ENE27",
+    "RFX20/MAR27", "RFX20/DIC26",
+    "AL30", "MERV - XMEV - GGAL - 24hs", "GGAL/DIC26",
+]
+
+curvas = armar_curvas(simbolos)
+print(f"Curvas: {curvas}")
+assert curvas["DLR"] == ["DLR/DIC26", "DLR/ENE27"]  # sin sufijos A/M, pases, spot ni espacios
+assert curvas["ORO"] == ["ORO/ENE27", "ORO/MAR27"]
+assert curvas["SOJ"] == ["SOJ.ROS/NOV26", "SOJ.ROS/MAY27"]
+assert curvas["MAI"] == ["MAI.ROS/JUL27"] and curvas["TRI"] == ["TRI.ROS/ENE27"]
+assert curvas["RFX20"] == ["RFX20/DIC26", "RFX20/MAR27"]
+assert armar_curvas(simbolos, ["WTI"]) == {"WTI": ["WTI/FEB27"]}
+assert "GGAL/DIC26" not in sum(curvas.values(), [])  # futuro de otro subyacente
+
+assert subyacente("SOJ.ROS/MAY27") == "SOJ" and subyacente("AL30") is None
+assert vencimiento_mes("RFX20/MAR27") == (2027, 3) and vencimiento_mes("DLR/NOV26/DIC26") == (2026, 11)
+assert sort_key("DLR/ENE27") == 2701 and sort_key("AL30") == 0
+assert es_mensual("ORO/ENE27", "ORO") and not es_mensual("ORO/ENE27")
+assert archivo_curva("RFX20") == "curva_rfx20.json"
+
+# El catálogo arma todas las curvas en la misma pasada
+catalogo = Catalogo([{"instrumentId": {"symbol": s}} for s in simbolos], 0)
+assert catalogo.dlr_mensuales == curvas["DLR"] and catalogo.curvas == curvas
+assert es_dlr_mensual("DLR/NOV26") and not es_dlr_mensual("DLR/NOV26A")
+
+# Con una sesión reproducida o un feed simulado el catálogo no toca el cache en disco
+api_real, cwd = modulo_catalogo.pyRofex, os.getcwd()
+os.chdir(tempfile.mkdtemp())
+try:
+    modulo_catalogo.pyRofex = types.SimpleNamespace(get_all_instruments=lambda: {
+        "status": "OK", "instruments": [{"instrumentId": {"symbol": "DLR/ENE27"}}]})
+    modulo_catalogo.desactivar_cache_disco()
+    assert modulo_catalogo.obtener_catalogo().simbolos == ["DLR/ENE27"]
+    assert not os.path.exists(modulo_catalogo.CATALOGO_FILE)
+    # Vencido: un script corto lo refresca en el momento (no en un thread que no llega a terminar)
+    modulo_catalogo._catalogo = Catalogo([{"instrumentId": {"symbol": "DLR/DIC26"}}], 0)
+    assert modulo_catalogo.obtener_catalogo().simbolos == ["DLR/ENE27"]
+finally:
+    modulo_catalogo.pyRofex = api_real
+    os.chdir(cwd)
+
+print("✅ Curvas Verification Passed")
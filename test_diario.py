@@ -0,0 +1,68 @@
+import os
+import json
+import tempfile
+from simulator import Portfolio
+
+tmp = tempfile.mkdtemp()
+ruta = os.path.join(tmp, "portfolio.json")
+ruta_journal = os.path.join(tmp, "portfolio.journal.jsonl")
+with open(ruta, "w") as f:
+    json.dump({"cash": 100000, "positions": {}}, f)
+
+def abrir(**kw):
+    return Portfolio(journal=True, ruta=ruta, ruta_journal=ruta_journal, **kw)
+
+p = abrir(compactar_cada=4)
+assert p.buy("AL30", 10, 100)[0]
+assert p.buy("GD30", 5, 200)[0]
+assert p.sell("AL30", 4, 110)[0]
+snapshot = open(ruta).read()
+# Sin cerrar (como si se cayera el proceso): el snapshot no se tocó, el estado sale del diario
+q = abrir(compactar_cada=4)
+print(f"Recuperado: cash={q.cash} positions={q.positions}")
+assert open(ruta).read() == snapshot
+assert q.cash == 100000 - 1000 - 1000 + 440
+assert q.positions == {"AL30": 6, "GD30": 5}
+q.close()
+
+# Línea a medio escribir al final: se descarta (y se trunca) sin perder las anteriores
+with open(ruta_journal, "ab") as f:
+    f.write(b'{"gen":0,"seq":4,"op":"buy","ticker":"AL30","qty":1')
+q = abrir(compactar_cada=4)
+assert q.positions == {"AL30": 6, "GD30": 5}
+assert q.diario.seq == 3 and not open(ruta_journal, "rb").read().endswith(b'"qty":1')
+
+# La 4ta operación compacta: snapshot nuevo (gen 1) y diario vacío
+assert q.sell("GD30", 5, 210)[0]
+data = json.load(open(ruta))
+assert data["gen"] == 1 and data["positions"] == {"AL30": 6}
+assert os.path.getsize(ruta_journal) == 0
+q.close()
+# El PPP y el resultado realizado también sobreviven a la compactación
+q = abrir()
+assert q.valuacion.posicion("AL30")[1] == 100 and q.valuacion.realizado == 4 * 10 + 5 * 10
+q.close()
+
+# CRC inválido: la operación no se aplica
+q = abrir()
+q.buy("TX26", 1, 50)
+q.close()
+lineas = open(ruta_journal).read().splitlines()
+lineas[0] = lineas[0].replace('"qty":1', '"qty":9')
+open(ruta_journal, "w").write("\n".join(lineas) + "\n")
+q = abrir()
+assert "TX26" not in q.positions and q.cash == data["cash"]
+q.close()
+
+# Líneas de una generación vieja (corte entre snapshot y vaciado del diario) se ignoran
+q = abrir()
+q.buy("TX26", 1, 50)
+q.close()
+data["gen"] = 2
+with open(ruta, "w") as f:
+    json.dump(data, f)
+q = abrir()
+assert "TX26" not in q.positions
+q.close()
+
+print("✅ Diario Verification Passed")
@@ -0,0 +1,124 @@
+import os
+import sys
+import time
+import tempfile
+import subprocess
+from multiprocessing import AuthenticationError
+from benchmarks.fake_pyrofex import FakePyRofex
+from gateway import Gateway, ClienteGateway, FeedGateway, MemoriaCotizaciones, clave_gateway, validar_direccion
+
+# Sin GATEWAY_CLAVE el gateway genera una clave aleatoria en un archivo que sólo lee su usuario
+os.environ.pop("GATEWAY_CLAVE", None)
+archivo = os.path.join(tempfile.mkdtemp(), "gateway.clave")
+try:
+    clave_gateway(archivo=archivo)
+    assert False, "un cliente sin clave no debería poder conectarse"
+except RuntimeError:
+    pass
+clave = clave_gateway(crear=True, archivo=archivo)
+assert len(clave) == 64 and clave_gateway(archivo=archivo) == clave
+assert os.stat(archivo).st_mode & 0o777 == 0o600
+assert clave_gateway(crear=True, archivo=archivo) != clave  # una nueva por arranque
+
+# Sólo loopback o socket Unix
+assert validar_direccion(("127.0.0.1", 6061)) and validar_direccion("/tmp/gateway.sock")
+for host in ("0.0.0.0", "192.168.0.10", "gateway.example.com"):
+    try:
+        Gateway(direccion=(host, 0), clave=clave)
+        assert False, f"escuchó en {host}"
+    except ValueError:
+        pass
+
+fake = FakePyRofex(instrumentos=20, contratos=4)
+nombre = f"test_gateway_{os.getpid()}"
+gateway = Gateway(api=fake, direccion=("127.0.0.1", 0), nombre_shm=nombre, capacidad=16, clave=clave).iniciar()
+dlr = fake.dlr
+
+# Dos clientes con tickers superpuestos: una sola suscripción por ticker en el feed
+a = ClienteGateway(gateway.direccion, clave)
+b = ClienteGateway(gateway.direccion, clave)
+a.suscribir(dlr[:2])
+b.suscribir(dlr[1:3])
+assert fake.suscriptos == dlr[:3]
+assert a.esperar(dlr[:2]) == [] and b.esperar(dlr[1:3]) == []
+
+fake.enviar(dlr[1], 1234.5)
+q = b.cotizacion(dlr[1])
+print(f"Cotización leída de memoria compartida: {q}")
+assert (q.bid, q.offer, q.last) == (1234.0, 1235.0, 1234.5)
+assert a.cotizacion(dlr[1]).last == 1234.5
+assert a.cotizacion("NO/EXISTE") is None
+
+# Otro proceso lee el mismo bloque sin pasar por el socket
+codigo = (f"from gateway import MemoriaCotizaciones; m = MemoriaCotizaciones.abrir({nombre!r}); "
+          f"print(m.cotizacion({dlr[1]!r}).last); m.close()")
+salida = subprocess.run([sys.executable, "-c", codigo], capture_output=True, text=True,
+                        cwd=os.path.dirname(os.path.abspath(__file__)))
+assert salida.stdout.strip() == "1234.5", salida.stderr
+
+# Un ticker inexistente no ocupa slot: se asignan con el primer dato
+usados = int(gateway.memoria.encabezado[2])
+a.suscribir(["NO/EXISTE", "DLR/TYPO"])
+assert int(gateway.memoria.encabezado[2]) == usados and a.suscriptos["NO/EXISTE"] is None
+assert a.esperar(["NO/EXISTE"], timeout=0.05) == ["NO/EXISTE"]
+
+# Seqlock: con una escritura a medias (seq impar) el lector no devuelve la fila
+m = gateway.memoria
+i = m.slot(dlr[0])
+m.seq[i] += 1
+try:
+    a.memoria.leer(i, intentos=10)
+    assert False, "leyó una fila a medio escribir"
+except RuntimeError:
+    pass
+m.seq[i] += 1
+
+# Una clave incorrecta no pasa la autenticación (antes de deserializar nada)
+try:
+    ClienteGateway(gateway.direccion, b"otra")
+    assert False, "se conectó con otra clave"
+except AuthenticationError:
+    pass
+
+# REST con la sesión del gateway; las no permitidas se rechazan
+assert a.rest("get_market_data", dlr[0])["status"] == "OK"
+try:
+    a.rest("send_order")
+    assert False
+except RuntimeError:
+    pass
+
+# Feed compatible con pyRofex: el handler recibe mensajes con el formato del WebSocket
+recibidos = []
+feed = FeedGateway(gateway.direccion, clave)
+
+feed.init_websocket_connection(market_data_handler=recibidos.append)
+feed.market_data_subscription(tickers=[dlr[3]], entries=None)
+fake.enviar(dlr[3], 999.0)
+limite = time.monotonic() + 2
+while not any(r["marketData"]["LA"]["price"] == 999.0 for r in recibidos) and time.monotonic() < limite:
+    time.sleep(0.01)
+assert recibidos and recibidos[-1]["instrumentId"]["symbol"] == dlr[3]
+assert recibidos[-1]["marketData"]["OF"][0]["price"] == 999.5
+feed.close_websocket_connection()
+feed.close()
+
+# Al desconectarse un cliente se liberan sus tickers (siguen los del otro)
+a.close()
+time.sleep(0.1)
+assert set(gateway.suscripciones.refs) == set(dlr[1:3])
+
+# Con el bloque lleno los instrumentos nuevos se descartan sin romper el thread del WebSocket
+for k in range(int(gateway.memoria.encabezado[2]), gateway.memoria.capacidad):
+    gateway.memoria.slot(f"RELLENO/{k}")
+gateway.on_market_data({"instrumentId": {"symbol": "DLR/NUEVO"}, "marketData": {"LA": {"price": 1.0, "size": 1}}})
+assert gateway.sin_lugar == 1
+
+b.close()
+gateway.close()
+try:
+    MemoriaCotizaciones.abrir(nombre)
+    assert False, "el bloque debería haberse borrado"
+except FileNotFoundError:
+    pass
+print("✅ Gateway Verification Passed")
@@ -0,0 +1,57 @@
+import os
+import tempfile
+from urllib.parse import quote
+from historial_ticks import HistorialTicks, LADO_BID, LADO_OFFER, LADO_LAST, dia_de
+from cotizaciones import LibroCotizaciones
+
+h = HistorialTicks(tempfile.mkdtemp())
+libro = LibroCotizaciones()
+base_ms = 1_790_000_000_000
+
+def tick(i, bid, offer, last=None):
+    md = {"BI": [{"price": bid, "size": 1}], "OF": [{"price": offer, "size": 1}],
+          "LA": {"price": last, "size": 1} if last else None}
+    return libro.actualizar({"timestamp": base_ms + i, "instrumentId": {"symbol": "DLR/ENE27"}, "marketData": md})
+
+h.registrar(tick(0, 1500.0, 1501.0))
+h.registrar(tick(1, 1500.0, 1501.0))          # sin cambios: no se agrega nada
+h.registrar(tick(2, 1500.5, 1501.0, 1500.5))  # cambian bid y last
+h.flush()
+
+dia = dia_de(base_ms * 1_000_000)
+assert h.indice() == {dia: ["DLR/ENE27"]}
+
+with h.leer("DLR/ENE27", dia) as serie:
+    registros = list(serie)
+    print(f"Registros: {registros}")
+    assert len(serie) == 4
+    assert [r[2] for r in registros] == [LADO_BID, LADO_OFFER, LADO_BID, LADO_LAST]
+    assert registros[2][1] == 1500.5
+
+# Rango de tiempo por bisección: [t2, fin)
+with h.leer("DLR/ENE27", dia, desde_ns=(base_ms + 2) * 1_000_000) as serie:
+    assert len(serie) == 2 and serie.ts[0] == (base_ms + 2) * 1_000_000
+
+# Ticker sin datos
+with h.leer("DLR/FEB27", dia) as serie:
+    assert len(serie) == 0
+
+h.close()
+
+# Corte sin flush: columnas de distinto largo. Al reabrir se realinean y lo nuevo queda bien
+carpeta = os.path.join(h.directorio, dia, quote("DLR/ENE27", safe=""))
+with open(os.path.join(carpeta, "ts.i64"), "ab") as f:
+    f.write(b"\0" * 8 * 3)
+with open(os.path.join(carpeta, "precio.f64"), "ab") as f:
+    f.write(b"\0" * 8 * 2 + b"\0" * 5)  # además un registro a medias
+h = HistorialTicks(h.directorio)
+ts_nuevo = (base_ms + 5) * 1_000_000
+h.agregar("DLR/ENE27", ts_nuevo, 9999.0, LADO_OFFER)
+h.close()
+with h.leer("DLR/ENE27", dia) as serie:
+    assert len(serie) == 5
+    assert list(serie)[-1] == (ts_nuevo, 9999.0, LADO_OFFER)
+assert os.path.getsize(os.path.join(carpeta, "ts.i64")) == 5 * 8
+assert os.path.getsize(os.path.join(carpeta, "precio.f64")) == 5 * 8
+assert os.path.getsize(os.path.join(carpeta, "lado.u8")) == 5
+print("✅ Historial de Ticks Verification Passed")
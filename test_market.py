@@ -0,0 +1,63 @@
+import time
+import threading
+from benchmarks.fake_pyrofex import FakePyRofex
+
+fake = FakePyRofex(instrumentos=20, contratos=4).instalar()
+import simulator
+
+pedidos_rest = []
+get_market_data = fake.get_market_data
+def contar(ticker, **kwargs):
+    pedidos_rest.append(ticker)
+    return get_market_data(ticker, **kwargs)
+fake.get_market_data = contar
+
+market = simulator.Market(ttl=0.2)
+assert market.streaming
+
+# Ticker nuevo: se suscribe y el snapshot del WebSocket alcanza, sin REST
+t = fake.dlr[0]
+q = market.get_market_data(t)
+assert q is not None and q.offer == fake.precios[t] + 0.5 and pedidos_rest == []
+
+# El WebSocket mantiene el cache: la consulta siguiente no usa la red y ve el precio nuevo
+fake.enviar(t, 1234.0)
+inicio = time.perf_counter()
+q = market.get_market_data(t)
+assert q.last == 1234.0 and pedidos_rest == [] and time.perf_counter() - inicio < 0.05
+assert market.profundidad[t].niveles("offer")[0][0] == 1234.5
+
+# Mercado cerrado: el snapshot viene vacío y se completa por REST (que vence por TTL)
+fake.mercado_abierto = False
+t2 = fake.dlr[1]
+q = market.get_market_data(t2)
+assert pedidos_rest == [t2] and q.last == fake.precios[t2]
+market.get_market_data(t2)
+assert pedidos_rest == [t2]
+time.sleep(0.25)
+market.get_market_data(t2)
+assert pedidos_rest == [t2, t2]
+
+# Un error de Primary sobre un ticker no corta el streaming
+market._on_error({"status": "ERROR", "description": "Instrument DLR/TYPO don't exist"})
+assert market.streaming
+
+# Sin WebSocket todo pasa a vencer por TTL, hasta que la reconexión lo restablece
+fake.mercado_abierto = True
+fake.enviar(t, 1235.0)
+liberar = threading.Event()
+reconectar = market.suscripciones.reconectar
+def reconexion_lenta():
+    liberar.wait(5)
+    return reconectar()
+market.suscripciones.reconectar = reconexion_lenta
+market._on_exception(Exception("desconectado"))
+assert not market.streaming and market.cached(t) is not None
+time.sleep(0.25)
+assert market.cached(t) is None
+liberar.set()
+limite = time.monotonic() + 2
+while not market.streaming and time.monotonic() < limite:
+    time.sleep(0.01)
+assert market.streaming and market.suscripciones.reconexiones == 1
+print("✅ Market Verification Passed")
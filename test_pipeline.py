@@ -0,0 +1,98 @@
+import time
+import asyncio
+import threading
+from pipeline import PipelineMarketData, TODOS, ULTIMO
+
+def mensaje(symbol, bid, ts):
+    return {"timestamp": ts, "instrumentId": {"symbol": symbol},
+            "marketData": {"BI": [{"price": bid, "size": 1}], "OF": [{"price": bid + 1, "size": 1}]}}
+
+todos, ultimos, async_vistos = [], {}, []
+lotes_lentos = []
+liberar = threading.Event()
+
+def historial(lote):
+    todos.extend((t.symbol, t.bid) for t in lote)
+
+def gui(lote):
+    # Consumidor lento (Tk, disco): se traba hasta que lo liberamos
+    liberar.wait(5)
+    lotes_lentos.append(len(lote))
+    ultimos.update((t.symbol, t.bid) for t in lote)
+
+async def estrategia(lote):
+    async_vistos.extend(t.bid for t in lote)
+
+p = PipelineMarketData()
+p.agregar("historial", historial, TODOS)
+p.agregar("gui", gui, ULTIMO)
+p.agregar("estrategia", estrategia, TODOS)
+p.iniciar()
+
+# El productor nunca espera al consumidor lento
+inicio = time.perf_counter()
+for i in range(3000):
+    p.publicar(mensaje(f"DLR/T{i % 3}", 1000.0 + i, i))
+publicar_s = time.perf_counter() - inicio
+print(f"Publicar 3000 mensajes: {publicar_s * 1000:.1f} ms")
+assert publicar_s < 1.0
+
+# Los consumidores rápidos avanzan aunque "gui" esté trabado
+limite = time.monotonic() + 5
+while len(todos) < 3000 and time.monotonic() < limite:
+    time.sleep(0.01)
+assert len(todos) == 3000 and len(async_vistos) == 3000
+assert [bid for _, bid in todos] == [1000.0 + i for i in range(3000)]  # en orden, cada uno con su foto
+assert not ultimos
+
+time.sleep(0.2)
+liberar.set()
+p.detener()
+# ULTIMO: la GUI ve el último precio de cada ticker, sin procesar cada tick
+assert ultimos == {"DLR/T0": 3997.0, "DLR/T1": 3998.0, "DLR/T2": 3999.0}
+assert sum(lotes_lentos) < 3000
+
+e = p.estadisticas()
+print(f"Estadísticas: {e}")
+assert e["entrada"]["parseados"] == 3000 and e["entrada"]["descartados"] == 0
+assert e["gui"]["agrupados"] + e["gui"]["procesados"] == 3000
+assert e["gui"]["lag_max_ms"] >= 200 > e["historial"]["lag_max_ms"]  # el lento acumula su propio lag
+assert p.libro["DLR/T2"].offer == 4000.0                      # el libro se parsea una sola vez
+
+# TODOS con cola acotada: se descartan los más viejos y se cuentan
+async def acotado():
+    vistos = []
+    bloqueo = asyncio.Event()
+
+    async def lento(lote):
+        await bloqueo.wait()
+        vistos.extend(t.bid for t in lote)
+
+    q = PipelineMarketData(maximo=100)
+    q.agregar("lento", lento, TODOS, maximo=10, lote=5)
+    for i in range(150):
+        q.publicar(mensaje("DLR/X", float(i), i))  # antes de arrancar: la entrada descarta 50
+    tarea = asyncio.ensure_future(q.correr())
+    await asyncio.sleep(0.05)
+    bloqueo.set()
+    await asyncio.sleep(0.05)
+    tarea.cancel()
+    return q.estadisticas(), vistos
+
+e, vistos = asyncio.run(acotado())
+assert e["entrada"]["descartados"] == 50
+assert e["lento"]["descartados"] > 0 and vistos[-1] == 149.0
+assert len(vistos) + e["lento"]["descartados"] == 100
+
+# Un mensaje mal formado se cuenta y se saltea: el parser sigue con los siguientes
+r = PipelineMarketData()
+r.agregar("historial", lambda lote: None, TODOS)
+r.iniciar()
+r.publicar({"instrumentId": {"symbol": "X"}, "marketData": None})
+r.publicar(mensaje("DLR/Y", 1500.0, 1))
+r.detener()
+e = r.estadisticas()["entrada"]
+assert e["errores"] == 1 and e["parseados"] == 1 and r.libro["DLR/Y"].bid == 1500.0
+
+print(p.resumen())
+print("✅ Pipeline Verification Passed")
@@ -0,0 +1,45 @@
+import os
+import json
+import tempfile
+from profundidad import LibroProfundidad
+from simulator import Portfolio, ejecutar_a_mercado
+
+libro = LibroProfundidad(profundidad=3)
+
+def mensaje(bids, offers):
+    return {"timestamp": 1, "instrumentId": {"symbol": "DLR/ENE27"}, "marketData": {
+        "BI": [{"price": p, "size": s} for p, s in bids],
+        "OF": [{"price": p, "size": s} for p, s in offers]}}
+
+b = libro.actualizar(mensaje([(1500, 10), (1499, 5)], [(1501, 4), (1502, 6), (1503, 10), (1504, 99)]))
+assert b.niveles("bid") == [(1500, 10), (1499, 5)]
+assert len(b.niveles("offer")) == 3  # se recorre hasta la profundidad configurada
+
+# Compra de 8: 4 @ 1501 + 4 @ 1502
+ejecutado, vwap, slippage = b.ejecutar("buy", 8)
+print(f"Compra 8: {ejecutado} @ {vwap} (slippage {slippage})")
+assert ejecutado == 8 and vwap == (4 * 1501 + 4 * 1502) / 8 and slippage == vwap - 1501
+
+# Más que la profundidad visible: parcial
+assert b.ejecutar("sell", 20)[0] == 15
+assert b.ejecutar("sell", 20)[1] == (10 * 1500 + 5 * 1499) / 15
+
+# Actualización en el lugar: mismo LibroTicker, otros niveles
+assert libro.actualizar(mensaje([(1498, 1)], [])) is b
+assert b.niveles("bid") == [(1498, 1)] and b.ejecutar("buy", 1) == (0, None, None)
+# Un lado ausente en el mensaje no se toca
+libro.actualizar({"timestamp": 2, "instrumentId": {"symbol": "DLR/ENE27"}, "marketData": {"OF": [{"price": 1505, "size": 2}]}})
+assert b.niveles("bid") == [(1498, 1)] and b.niveles("offer") == [(1505, 2)]
+
+# Portafolio: ejecuta al VWAP y la cantidad ejecutada
+tmp = tempfile.mkdtemp()
+ruta = os.path.join(tmp, "portfolio.json")
+with open(ruta, "w") as f:
+    json.dump({"cash": 100000, "positions": {}}, f)
+p = Portfolio(ruta=ruta)
+b = libro.actualizar(mensaje([(1500, 10)], [(1501, 4), (1502, 6)]))
+success, msg = ejecutar_a_mercado(p, b, "buy", "DLR/ENE27", 12)
+print(msg)
+assert success and p.positions["DLR/ENE27"] == 10 and p.cash == 100000 - (4 * 1501 + 6 * 1502)
+assert not ejecutar_a_mercado(p, None, "sell", "DLR/ENE27", 1)[0]
+print("✅ Profundidad Verification Passed")
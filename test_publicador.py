@@ -0,0 +1,49 @@
+import os
+import json
+import tempfile
+from publicador import PublicadorCurva
+
+tmp = tempfile.mkdtemp()
+ruta = os.path.join(tmp, "curva_dlr.json")
+
+filas = [
+    {"ticker": "DLR/NOV26", "bid": 1590.0, "offer": 1593.0, "last": "S/D"},
+    {"ticker": "DLR/DIC26", "bid": 1620.0, "offer": 1622.0, "last": 1621.0},
+]
+
+# Primera publicación: escribe completo + delta
+pub = PublicadorCurva(ruta)
+cambios = pub.publicar(filas, "T1")
+print(f"Publicación 1: {cambios}")
+assert cambios == ["DLR/NOV26", "DLR/DIC26"]
+with open(ruta) as f:
+    data = json.load(f)
+assert data[0] == {"ticker": "DLR/NOV26", "bid": 1590.0, "offer": 1593.0, "last": "S/D", "timestamp": "T1"}
+
+# Mismos precios (aunque cambie el timestamp): no se reescribe
+mtime = os.stat(ruta).st_mtime_ns
+assert PublicadorCurva(ruta).publicar(filas, "T2") == []
+assert os.stat(ruta).st_mtime_ns == mtime
+
+# Cambia un precio: delta con sólo ese contrato
+filas[1] = {"ticker": "DLR/DIC26", "bid": 1620.5, "offer": 1622.0, "last": 1621.0}
+assert pub.publicar(filas, "T3") == ["DLR/DIC26"]
+with open(os.path.join(tmp, "curva_dlr_delta.json")) as f:
+    delta = json.load(f)
+print(f"Delta: {delta}")
+assert delta["base"] == "T1" and delta["timestamp"] == "T3"
+assert [c["ticker"] for c in delta["cambios"]] == ["DLR/DIC26"]
+assert delta["eliminados"] == []
+
+# Vence un contrato
+assert pub.publicar(filas[1:], "T4") == ["DLR/NOV26"]
+
+# Sin archivos temporales sueltos
+assert sorted(os.listdir(tmp)) == ["curva_dlr.json", "curva_dlr_delta.json"]
+
+# Mismos permisos que un open() común (mkstemp crea con 0600)
+umask = os.umask(0)
+os.umask(umask)
+assert os.stat(os.path.join(tmp, "curva_dlr.json")).st_mode & 0o777 == 0o666 & ~umask
+
+print("✅ Publicador Verification Passed")
@@ -0,0 +1,93 @@
+import os
+import gzip
+import json
+import socket
+import asyncio
+import tempfile
+import urllib.request
+import urllib.error
+from publicador import PublicadorCurva
+from servidor_http import ServidorCurva, host_puerto, MAXIMO_PENDIENTES, _ClienteSSE
+
+assert host_puerto("") == ("127.0.0.1", 8080) and host_puerto("0.0.0.0:9000") == ("0.0.0.0", 9000)
+
+servidor = ServidorCurva(puerto=0).iniciar()
+base = f"http://127.0.0.1:{servidor.puerto}"
+publicador = PublicadorCurva(os.path.join(tempfile.mkdtemp(), "curva_dlr.json"), servidor=servidor)
+
+def fila(ticker, bid, offer):
+    return {"ticker": ticker, "bid": bid, "offer": offer, "last": "S/D"}
+
+def pedir(ruta, **encabezados):
+    try:
+        with urllib.request.urlopen(urllib.request.Request(base + ruta, headers=encabezados), timeout=5) as r:
+            return r.status, dict(r.headers), r.read()
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), e.read()
+
+assert pedir("/curva_dlr.json")[0] == 404  # todavía no se publicó nada
+
+# SSE: al conectarse llega la curva completa
+sse = socket.create_connection(("127.0.0.1", servidor.puerto), timeout=5)
+sse.sendall(b"GET /eventos HTTP/1.1\r\nHost: x\r\n\r\n")
+recibido = b""
+while b"event: curva" not in recibido:
+    recibido += sse.recv(65536)
+assert b"text/event-stream" in recibido
+
+filas = [fila(f"DLR/{m}27", 1500.0 + i, 1501.0 + i) for i, m in enumerate(["ENE", "FEB", "MAR", "ABR", "MAY"])]
+publicador.publicar(filas, "10:00:00")
+
+# ETag: el mismo documento otra vez cuesta un 304 sin cuerpo
+estado, encabezados, cuerpo = pedir("/curva_dlr.json")
+assert estado == 200 and json.loads(cuerpo)[0]["ticker"] == "DLR/ENE27"
+etag = encabezados["ETag"]
+estado, _, cuerpo = pedir("/curva_dlr.json", **{"If-None-Match": etag})
+assert estado == 304 and cuerpo == b""
+
+# gzip: misma curva, otra representación (y otro ETag)
+estado, encabezados, cuerpo = pedir("/curva_dlr.json", **{"Accept-Encoding": "gzip"})
+assert encabezados["Content-Encoding"] == "gzip" and encabezados["ETag"] != etag
+assert json.loads(gzip.decompress(cuerpo)) == json.loads(pedir("/curva_dlr.json")[2])
+
+# Un cambio: el ETag viejo ya no vale y por SSE llega sólo el contrato que cambió
+filas[2] = fila("DLR/MAR27", 1600.0, 1601.0)
+publicador.publicar(filas, "10:00:01")
+assert pedir("/curva_dlr.json", **{"If-None-Match": etag})[0] == 200
+while recibido.count(b"event: cambios") < 2:
+    recibido += sse.recv(65536)
+ultimo = recibido.split(b"event: cambios\ndata: ")[-1].split(b"\n\n")[0]
+delta = json.loads(ultimo)
+print(f"Evento SSE: {delta}")
+assert [c["ticker"] for c in delta["cambios"]] == ["DLR/MAR27"] and delta["base"] == "10:00:00"
+assert delta["curva"] == "/curva_dlr.json"
+
+# Otra curva (CURVAS=DLR,ORO): se sirve por GET, pero sus deltas no van por SSE, donde
+# un cliente sólo tiene la base de la curva DLR
+oro = PublicadorCurva(os.path.join(tempfile.mkdtemp(), "curva_oro.json"), servidor=servidor)
+oro.publicar([fila("ORO/ENE27", 2600.0, 2601.0)], "10:00:02")
+filas[0] = fila("DLR/ENE27", 1499.0, 1500.0)
+publicador.publicar(filas, "10:00:02")
+while recibido.count(b"event: cambios") < 3:
+    recibido += sse.recv(65536)
+assert b"/curva_oro.json" not in recibido and servidor.estadisticas()["eventos"] == 3
+assert json.loads(pedir("/curva_oro.json")[2])[0]["ticker"] == "ORO/ENE27"
+
+# Un cliente SSE atrasado recibe la curva completa en vez de los deltas perdidos
+servidor.detener()
+lento = ServidorCurva(puerto=0)
+lento._publicar("/curva_dlr.json", filas)
+async def atrasado():
+    cliente = _ClienteSSE()
+    lento.clientes.add(cliente)
+    for i in range(MAXIMO_PENDIENTES + 1):
+        lento._emitir("cambios", {"i": i})
+    return cliente
+cliente = asyncio.run(atrasado())
+assert cliente.resincronizar and not cliente.pendientes
+
+e = servidor.estadisticas()
+print(f"Estadísticas: {e}")
+assert e["304"] == 1 and e["gzip"] == 1 and e["sse_total"] == 1
+sse.close()
+print("✅ Servidor HTTP Verification Passed")
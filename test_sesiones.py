@@ -0,0 +1,91 @@
+import os
+import time
+import tempfile
+import types
+from sesiones import GrabadorSesion, FeedReproduccion, leer_sesion, reproducir, instalar_grabacion
+from cotizaciones import LibroCotizaciones
+
+ruta = os.path.join(tempfile.mkdtemp(), "sesion.jsonl.gz")
+
+def mensaje(symbol, bid, offer):
+    return {"type": "Md", "timestamp": 1_790_000_000_000, "instrumentId": {"marketId": "ROFX", "symbol": symbol},
+            "marketData": {"BI": [{"price": bid, "size": 1}], "OF": [{"price": offer, "size": 1}]}}
+
+recibidos = []
+grabador = GrabadorSesion(ruta)
+handler = grabador.envolver(recibidos.append)
+handler(mensaje("DLR/ENE27", 1500.0, 1501.0))
+time.sleep(0.05)
+handler(mensaje("DLR/FEB27", 1530.0, 1531.0))
+handler(mensaje("DLR/ENE27", 1500.5, 1501.0))
+grabador.close()
+assert len(recibidos) == 3 and grabador.mensajes == 3
+
+sesion = list(leer_sesion(ruta))
+print(f"Sesión: {[(t, m['instrumentId']['symbol']) for t, m in sesion]}")
+assert [m for _, m in sesion] == recibidos
+assert sesion[1][0] >= 0.05
+
+# Máxima velocidad: sin esperas
+libro = LibroCotizaciones()
+inicio = time.monotonic()
+assert reproducir(ruta, libro.actualizar, velocidad=0) == 3
+assert time.monotonic() - inicio < 0.05
+assert libro["DLR/ENE27"].bid == 1500.5 and libro["DLR/FEB27"].offer == 1531.0
+
+# Tiempo real respeta los intervalos grabados
+inicio = time.monotonic()
+reproducir(ruta, lambda m: None, velocidad=1.0)
+assert time.monotonic() - inicio >= 0.05
+
+# Feed: sólo entrega los tickers suscriptos; get_market_data responde con el estado
+feed = FeedReproduccion(ruta, velocidad=0)
+assert feed.simbolos == ["DLR/ENE27", "DLR/FEB27"]
+entregados = []
+feed.initialize()
+feed.init_websocket_connection(market_data_handler=entregados.append)
+time.sleep(0.1)  # el script carga el catálogo antes de suscribir: el reloj todavía no corre
+assert not entregados and not feed.terminado.is_set()
+feed.market_data_subscription(["DLR/FEB27"])
+assert feed.terminado.wait(timeout=5)
+assert [m["instrumentId"]["symbol"] for m in entregados] == ["DLR/FEB27"]
+assert feed.get_market_data("DLR/ENE27")["marketData"]["BI"][0]["price"] == 1500.5
+
+# A máxima velocidad, con suscripción tardía, no se pierde ningún mensaje
+muchos = ruta + ".muchos.gz"
+grabador = GrabadorSesion(muchos)
+for i in range(20000):
+    grabador.grabar(mensaje("DLR/ENE27", 1500.0 + i, 1501.0 + i))
+grabador.close()
+feed = FeedReproduccion(muchos, velocidad=0)
+entregados = []
+feed.initialize()
+feed.init_websocket_connection(market_data_handler=entregados.append)
+time.sleep(0.05)
+feed.market_data_subscription(["DLR/ENE27"])
+assert feed.terminado.wait(timeout=10) and len(entregados) == 20000
+
+# Reconectar con el mismo handler no lo registra dos veces (pyRofex compara con ==)
+handlers = []
+def init_websocket_connection(market_data_handler=None, **kwargs):
+    if market_data_handler not in handlers:
+        handlers.append(market_data_handler)
+modulo = types.SimpleNamespace(init_websocket_connection=init_websocket_connection)
+grabador = instalar_grabacion(modulo, ruta + ".reconexiones.gz")
+vistos = []
+for _ in range(3):
+    modulo.init_websocket_connection(market_data_handler=vistos.append)
+assert len(handlers) == 1
+handlers[0](mensaje("DLR/ENE27", 1500.0, 1501.0))
+assert len(vistos) == 1 and grabador.mensajes == 1
+grabador.close()
+
+# Grabación cortada (sin close): se lee lo que llegó a disco
+cortada = ruta + ".cortada.gz"
+with open(ruta, "rb") as f:
+    datos = f.read()
+with open(cortada, "wb") as f:
+    f.write(datos[:-10])
+assert len(list(leer_sesion(cortada))) <= 3
+
+print("✅ Sesiones Verification Passed")
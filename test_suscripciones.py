@@ -0,0 +1,92 @@
+import time
+import threading
+from benchmarks.fake_pyrofex import FakePyRofex
+from cotizaciones import LibroCotizaciones
+from suscripciones import GestorSuscripciones
+
+fake = FakePyRofex(instrumentos=40, contratos=0)
+libro = LibroCotizaciones()
+gestor = GestorSuscripciones(libro, entries=["BI", "OF", "LA"], maximo=5, bajo=3, api=fake)
+
+# Antes de conectar sólo se registra el interés
+gestor.fijar("portafolio", ["BONO0000", "BONO0001"])
+gestor.conectar(market_data_handler=libro.actualizar)
+assert fake.suscriptos == ["BONO0000", "BONO0001"]
+assert set(libro) == {"BONO0000", "BONO0001"}  # snapshot inicial
+
+# Navegar tickers: la selección anterior queda como cache hasta superar el máximo
+for i in range(2, 5):
+    assert gestor.fijar("seleccion", [f"BONO{i:04d}"]) == []
+assert len(gestor) == 5 and len(fake.suscriptos) == 5
+
+bajas = gestor.fijar("seleccion", ["BONO0006"])
+print(f"Bajas: {bajas}")
+assert bajas == ["BONO0002", "BONO0003", "BONO0004"]  # LRU sin referencias, hasta `bajo`
+assert list(gestor.activos) == ["BONO0000", "BONO0001", "BONO0006"]
+assert "BONO0002" not in libro                        # cotización descartada
+
+# La reconexión (en otro thread) suscribe sólo el conjunto reducido
+for _ in range(100):
+    if gestor.reconexiones:
+        break
+    time.sleep(0.01)
+assert gestor.reconexiones == 1
+assert sorted(fake.suscriptos) == ["BONO0000", "BONO0001", "BONO0006"]
+
+# Mensajes de tickers dados de baja no llegan al handler
+fake.suscriptos.append("BONO0003")
+fake.enviar("BONO0003")
+assert "BONO0003" not in libro
+
+# Vender una tenencia libera su referencia
+gestor.fijar("portafolio", ["BONO0000"])
+assert gestor.refs == {"BONO0000": 1, "BONO0006": 1}
+# Reconexión lenta (pyRofex espera hasta 5 s): `fijar` no se traba y lo nuevo entra igual
+original = fake.init_websocket_connection
+liberar = threading.Event()
+def init_lento(**kwargs):
+    liberar.wait(5)
+    original(**kwargs)
+fake.init_websocket_connection = init_lento
+reconexion = threading.Thread(target=gestor.reconectar)
+reconexion.start()
+time.sleep(0.05)
+inicio = time.monotonic()
+gestor.fijar("seleccion", ["BONO0007"])
+assert time.monotonic() - inicio < 0.5
+liberar.set()
+reconexion.join(5)
+assert gestor.reconexiones == 2 and "BONO0007" in fake.suscriptos
+
+# Si el WebSocket no abre, se reintenta con backoff
+fallas = [ConnectionError("sin red"), ConnectionError("sin red")]
+def init_que_falla(**kwargs):
+    if fallas:
+        raise fallas.pop()
+    original(**kwargs)
+fake.init_websocket_connection = init_que_falla
+assert gestor.reconectar(espera=0.01) and gestor.reconexiones == 3
+assert sorted(fake.suscriptos) == sorted(gestor.activos)
+def init_sin_red(**kwargs):
+    raise ConnectionError("sin red")
+fake.init_websocket_connection = init_sin_red
+assert not gestor.reconectar(reintentos=2, espera=0.01) and gestor.reconexiones == 3
+fake.init_websocket_connection = original
+
+# Estado del WebSocket de pyRofex: un cierre limpio (sin exception_handler) también se detecta
+import types
+from suscripciones import websocket_vivo
+cliente = types.SimpleNamespace(ws_thread=None, is_connected=lambda: True)
+globales = types.SimpleNamespace(default_environment="REMARKET", environment_config={"REMARKET": {"ws_client": cliente}})
+api = types.SimpleNamespace(components=types.SimpleNamespace(globals=globales))
+assert websocket_vivo(fake) is None  # la API no expone el thread: no se sabe
+assert websocket_vivo(api) is False
+bloqueo = threading.Event()
+cliente.ws_thread = threading.Thread(target=bloqueo.wait, daemon=True)
+cliente.ws_thread.start()
+assert websocket_vivo(api)
+cliente.is_connected = lambda: False  # on_close de pyRofex
+assert websocket_vivo(api) is False
+bloqueo.set()
+
+print("✅ Suscripciones Verification Passed")
@@ -0,0 +1,34 @@
+import datetime
+import numpy as np
+from tasas_dlr import MotorTasas, vencimiento, precio_referencia
+
+# Vencimiento: último día hábil del mes
+assert vencimiento("DLR/ENE27") == datetime.date(2027, 1, 29)  # 31/01/2027 es domingo
+assert vencimiento("DLR/DIC26") == datetime.date(2026, 12, 31)
+assert precio_referencia(1500.0, 1501.0, None) == 1500.5
+assert precio_referencia(None, 1501.0, 1499.0) == 1499.0
+
+hoy = datetime.date(2026, 11, 30)
+tickers = ["DLR/DIC26", "DLR/ENE27", "DLR/FEB27"]
+motor = MotorTasas(tickers, spot=1450.0, hoy=hoy)
+motor.cargar({"DLR/DIC26": 1480.0, "DLR/ENE27": 1510.0, "DLR/FEB27": 1540.0})
+
+d = (vencimiento("DLR/DIC26") - hoy).days
+print(f"TNA DIC26: {motor.tna[0]:.4%} ({d} días)")
+assert np.isclose(motor.tna[0], (1480.0 / 1450.0 - 1) * 365 / d)
+assert np.isclose(motor.tea[0], (1480.0 / 1450.0) ** (365 / d) - 1)
+dd = (vencimiento("DLR/ENE27") - vencimiento("DLR/DIC26")).days
+assert np.isclose(motor.tna_fwd[0], (1510.0 / 1480.0 - 1) * 365 / dd)
+
+# Actualización incremental == recálculo completo
+completo = MotorTasas(tickers, spot=1450.0, hoy=hoy)
+completo.cargar({"DLR/DIC26": 1480.0, "DLR/ENE27": 1515.0, "DLR/FEB27": 1540.0})
+assert motor.actualizar("DLR/ENE27", 1515.0, hoy=hoy)
+assert np.allclose(motor.tna, completo.tna) and np.allclose(motor.tna_fwd, completo.tna_fwd)
+
+# Sin precio => None en el JSON
+motor.cargar({"DLR/DIC26": 1480.0})
+data = motor.a_json()
+assert data["contratos"][1]["tna"] is None and data["forwards"][0]["tna"] is None
+
+print("✅ Tasas DLR Verification Passed")
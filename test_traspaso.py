@@ -0,0 +1,29 @@
+import threading
+from traspaso import BufferTraspaso
+
+b = BufferTraspaso(maximo=100)
+for i in range(10):
+    b.publicar(i)
+assert b.profundidad == 10
+assert b.drenar(4) == [0, 1, 2, 3]
+assert b.drenar() == list(range(4, 10))
+assert b.drenar() == []
+
+# Consumidor atrasado: se descartan los más viejos y se cuentan
+for i in range(250):
+    b.publicar(i)
+assert b.profundidad == 100 and b.descartados == 150
+assert b.drenar(1) == [150]
+
+# Productor en otro thread mientras se drena: no se pierde ni duplica nada
+b = BufferTraspaso(maximo=1_000_000)
+productor = threading.Thread(target=lambda: [b.publicar(i) for i in range(200_000)])
+productor.start()
+vistos = []
+while productor.is_alive() or b.profundidad:
+    vistos.extend(b.drenar(5000))
+productor.join()
+vistos.extend(b.drenar())
+assert vistos == list(range(200_000)) and b.descartados == 0
+print(f"Estadísticas: {b.estadisticas()}")
+print("✅ Traspaso Verification Passed")
@@ -0,0 +1,37 @@
+from valuacion import MotorValuacion
+
+v = MotorValuacion(capacidad=2)
+v.operar("buy", "AL30", 10, 100.0)
+v.operar("buy", "AL30", 10, 110.0)
+assert v.posicion("AL30")[:2] == (20.0, 105.0)  # PPP
+
+v.actualizar_precio("AL30", 120.0)
+assert v.total_valor == 2400.0 and v.total_no_realizado == 300.0
+
+v.operar("sell", "AL30", 5, 130.0)
+assert v.realizado == 125.0                      # 5 * (130 - 105)
+assert v.posicion("AL30")[1] == 105.0            # vender no cambia el PPP
+assert v.total_no_realizado == 15 * (120 - 105)
+
+# Crece más allá de la capacidad inicial y reusa filas liberadas
+for i in range(5):
+    v.operar("buy", f"BONO{i}", 1, 10.0)
+v.operar("sell", "BONO0", 1, 12.0)
+assert "BONO0" not in v.indice and v.realizado == 127.0
+v.operar("buy", "TX26", 2, 50.0)
+assert len(v.indice) == 6
+
+# Los totales incrementales coinciden con revalorizar todo
+esperado_valor = sum(v.posicion(t)[3] for t in v.indice)
+esperado_nr = sum(v.posicion(t)[4] for t in v.indice)
+print(f"Valor: {v.total_valor} No realizado: {v.total_no_realizado} Realizado: {v.realizado}")
+assert abs(v.total_valor - esperado_valor) < 1e-9 and abs(v.total_no_realizado - esperado_nr) < 1e-9
+
+# Posición cargada sin costo (portafolio viejo): el primer precio es el costo
+v.cargar("GD30", 3)
+assert v.posicion("GD30")[1] is None and v.posicion("GD30")[3] == 0.0
+assert v.actualizar_precio("GD30", 70.0)
+assert v.posicion("GD30")[1:] == (70.0, 70.0, 210.0, 0.0)
+assert not v.actualizar_precio("GD30", 70.0)     # mismo precio: nada que recalcular
+assert not v.actualizar_precio("NOESTA", 1.0)
+print("✅ Valuacion Verification Passed")
@@ -0,0 +1,62 @@
+import os
+import json
+import tempfile
+from cotizaciones import Cotizacion
+from pipeline import Tick
+from velas import AgregadorVelas, SerieVelas, archivo_velas
+
+assert archivo_velas("/tmp/curva_dlr.json") == "/tmp/curva_dlr_velas.json"
+
+def tick(symbol, segundos, bid, offer, last=None):
+    return Tick(symbol, bid, offer, last, int(segundos * 1000), 0.0)
+
+# Velas de 1 minuto: apertura, máximo, mínimo, cierre y cantidad de ticks (precio = punto medio)
+velas = AgregadorVelas({60: ("1m", 3), 300: ("5m", 2)})
+base = 1_800_000_000  # múltiplo de 300
+velas.registrar_lote([
+    tick("DLR/ENE27", base + 1, 1500, 1502),   # 1501
+    tick("DLR/ENE27", base + 20, 1504, 1506),  # 1505
+    tick("DLR/ENE27", base + 40, 1496, 1498),  # 1497
+    tick("DLR/ENE27", base + 59, 1499, 1501),  # 1500
+    tick("DLR/ENE27", base + 61, None, None, 1510),  # sin puntas: último operado
+])
+data = velas.a_json()
+m1 = data["intervalos"]["1m"]["DLR/ENE27"]
+print(f"Velas 1m: {m1}")
+assert m1 == {"t": [base, base + 60], "o": [1501, 1510], "h": [1505, 1510], "l": [1497, 1510],
+              "c": [1500, 1510], "v": [4, 1]}
+m5 = data["intervalos"]["5m"]["DLR/ENE27"]
+assert m5["t"] == [base] and m5["o"] == [1501] and m5["h"] == [1510] and m5["c"] == [1510] and m5["v"] == [5]
+
+# Un tick anterior a la vela en curso (fuera de orden) se ignora; uno sin precio también
+velas.registrar_lote([tick("DLR/ENE27", base - 10, 1, 1), tick("DLR/ENE27", base + 62, None, None)])
+assert velas.a_json()["intervalos"]["1m"]["DLR/ENE27"]["v"] == [4, 1] and velas.ignorados == 2
+
+# Buffer circular: la memoria no crece, se pisan las velas más viejas
+serie = SerieVelas(60, 3)
+for i in range(10):
+    serie.agregar(base + 60 * i, 1500.0 + i)
+inicios, ohlcv = serie.arrays()
+assert len(serie) == 4 and inicios.tolist() == [base + 60 * i for i in range(6, 10)]
+assert ohlcv[:, 3].tolist() == [1506.0, 1507.0, 1508.0, 1509.0]
+assert serie.inicios.shape == (3,)
+
+# Cotizacion sin timestamp de mercado: usa la hora local
+q = Cotizacion("DLR/FEB27")
+q.bid, q.offer = 1520.0, 1522.0
+velas.registrar(q)
+assert velas.a_json(["DLR/FEB27"])["intervalos"]["1m"]["DLR/FEB27"]["c"] == [1521.0]
+
+# Publicación compacta, sólo si hubo ticks nuevos
+ruta = os.path.join(tempfile.mkdtemp(), "curva_dlr_velas.json")
+tickers = ["DLR/ENE27", "DLR/FEB27", "DLR/MAR27"]
+assert velas.publicar(ruta, tickers, "10:00:00") is not None
+with open(ruta) as f:
+    publicado = json.load(f)
+assert publicado["timestamp"] == "10:00:00" and sorted(publicado["intervalos"]["1m"]) == ["DLR/ENE27", "DLR/FEB27"]
+assert velas.publicar(ruta, tickers, "10:00:01") is None
+velas.registrar_lote([tick("DLR/ENE27", base + 65, 1511, 1513)])
+assert velas.publicar(ruta, tickers, "10:00:02", cada=60) is None  # todavía no pasó `cada`
+assert velas.publicar(ruta, tickers, "10:00:03")["intervalos"]["1m"]["DLR/ENE27"]["c"] == [1500, 1512]
+
+print("✅ Velas Verification Passed")
@@ -1,6 +1,8 @@
 import os
 import pyRofex
 from dotenv import load_dotenv
+from cotizaciones import LibroCotizaciones, a_texto
+from sesiones import configurar_desde_entorno
 
 load_dotenv()
 
@@ -19,22 +21,21 @@ def inicializar():
         return False
 
 # Procesador de datos en tiempo real
+cotizaciones = LibroCotizaciones()
+
 def market_data_handler(message):
-    instrumento = message["instrumentId"]["symbol"]
     market = message["instrumentId"]["marketId"]
     
     # Extraer puntas de forma segura
-    md = message["marketData"]
-    bid = md["BI"][0]["price"] if md.get("BI") else "S/D"
-    offer = md["OF"][0]["price"] if md.get("OF") else "S/D"
-    last = md["LA"]["price"] if md.get("LA") and isinstance(md["LA"], dict) else "S/D"
+    q = cotizaciones.actualizar(message)
 
-    print(f"⚡ [{market}] {instrumento.ljust(12)} | Compra: {str(bid).ljust(8)} | Venta: {str(offer).ljust(8)} | Último: {last}")
+    print(f"⚡ [{market}] {q.symbol.ljust(12)} | Compra: {a_texto(q.bid).ljust(8)} | Venta: {a_texto(q.offer).ljust(8)} | Último: {a_texto(q.last)}")
 
 def error_handler(message):
     print(f"❌ Error en el flujo de datos: {message}")
 
 if __name__ == "__main__":
+    configurar_desde_entorno()  # GRABAR_SESION / REPRODUCIR_SESION / GATEWAY_MD
     if inicializar():
         # Definimos los tickers EXACTOS que vimos en tu captura de pantalla
         # Nota: En Remarket usamos estos, en LIVE usaremos los de BYMA real
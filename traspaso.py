@@ -0,0 +1,42 @@
+"""Traspaso de mensajes entre el thread del WebSocket y el loop de Tk.
+
+El thread productor sólo hace `deque.append` (atómico en CPython, sin locks)
+sobre una cola acotada: si el consumidor se atrasa, se descartan los mensajes
+más viejos en vez de crecer sin límite. El consumidor drena en lotes desde su
+propio thread, así que el estado que lee la GUI lo escribe un único thread.
+"""
+from collections import deque
+
+class BufferTraspaso:
+    def __init__(self, maximo=10000):
+        """`maximo=None`: cola sin límite (para lo que no se puede descartar)."""
+        self._cola = deque(maxlen=maximo)
+        self.maximo = maximo
+        self.recibidos = 0    # sólo lo incrementa el productor
+        self.procesados = 0   # sólo lo incrementa el consumidor
+        self.agrupados = 0    # mensajes absorbidos por otro del mismo ticker en el mismo lote
+
+    def publicar(self, item):
+        """Lado productor (cualquier thread)."""
+        self._cola.append(item)
+        self.recibidos += 1
+
+    def drenar(self, maximo=None):
+        """Lado consumidor: saca hasta `maximo` items, del más viejo al más nuevo."""
+        cola = self._cola
+        n = len(cola) if maximo is None else min(len(cola), maximo)
+        lote = [cola.popleft() for _ in range(n)]
+        self.procesados += n
+        return lote
+
+    @property
+    def profundidad(self):
+        return len(self._cola)
+
+    @property
+    def descartados(self):
+        return max(self.recibidos - self.procesados - len(self._cola), 0)
+
+    def estadisticas(self):
+        return {"profundidad": self.profundidad, "recibidos": self.recibidos, "procesados": self.procesados,
+                "descartados": self.descartados, "agrupados": self.agrupados}
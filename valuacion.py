@@ -0,0 +1,119 @@
+"""Valuación incremental del portafolio (mark-to-market y resultados).
+
+Las posiciones viven en arrays de NumPy (una fila por ticker, con lista de
+filas libres para reusar). Cada operación o precio nuevo toca sólo la fila
+del ticker y ajusta los totales por diferencia, así que leer el patrimonio o
+el resultado no revaloriza toda la cartera.
+
+    costo promedio (PPP) = costo total de las compras / cantidad
+    resultado realizado  = Σ ventas: cantidad * (precio de venta - PPP)
+    no realizado         = cantidad * (último precio - PPP)
+
+Una posición sin costo conocido (portafolios anteriores al PPP) toma como
+costo el primer precio con el que se la valoriza.
+"""
+import numpy as np
+
+class MotorValuacion:
+    def __init__(self, capacidad=64):
+        self.indice = {}  # ticker -> fila
+        self._libres = []
+        self.cantidad = np.zeros(capacidad)
+        self.costo = np.full(capacidad, np.nan)
+        self.precio = np.full(capacidad, np.nan)
+        self.valor = np.zeros(capacidad)         # cantidad * precio (0 sin precio)
+        self.no_realizado = np.zeros(capacidad)  # 0 sin precio
+        self.realizado = 0.0
+        self.total_valor = 0.0
+        self.total_no_realizado = 0.0
+
+    def _fila(self, ticker):
+        i = self.indice.get(ticker)
+        if i is not None:
+            return i
+        if self._libres:
+            i = self._libres.pop()
+        else:
+            i = len(self.indice)
+            if i == len(self.cantidad):
+                self._crecer()
+        self.indice[ticker] = i
+        return i
+
+    def _crecer(self):
+        n = len(self.cantidad)
+        self.cantidad = np.concatenate([self.cantidad, np.zeros(n)])
+        self.costo = np.concatenate([self.costo, np.full(n, np.nan)])
+        self.precio = np.concatenate([self.precio, np.full(n, np.nan)])
+        self.valor = np.concatenate([self.valor, np.zeros(n)])
+        self.no_realizado = np.concatenate([self.no_realizado, np.zeros(n)])
+
+    def _revaluar(self, i):
+        """Recalcula valor y no realizado de la fila i y ajusta los totales por diferencia."""
+        q, p, c = self.cantidad[i], self.precio[i], self.costo[i]
+        valor = 0.0 if np.isnan(p) else float(q * p)
+        no_realizado = 0.0 if np.isnan(p) or np.isnan(c) else float(q * (p - c))
+        self.total_valor += valor - self.valor[i]
+        self.total_no_realizado += no_realizado - self.no_realizado[i]
+        self.valor[i] = valor
+        self.no_realizado[i] = no_realizado
+
+    def cargar(self, ticker, cantidad, costo=None, precio=None):
+        """Posición existente (al levantar el portafolio)."""
+        i = self._fila(ticker)
+        self.cantidad[i] = cantidad
+        self.costo[i] = np.nan if costo is None else costo
+        if precio is not None:
+            self.precio[i] = precio
+        self._revaluar(i)
+
+    def operar(self, op, ticker, qty, price):
+        i = self._fila(ticker)
+        q = self.cantidad[i]
+        if op == "buy":
+            c = self.costo[i]
+            self.costo[i] = price if q == 0 or np.isnan(c) else (q * c + qty * price) / (q + qty)
+            self.cantidad[i] = q + qty
+        else:
+            c = self.costo[i]
+            if not np.isnan(c):
+                self.realizado += float(qty * (price - c))
+            self.cantidad[i] = q - qty
+        if np.isnan(self.precio[i]):
+            self.precio[i] = price
+        self._revaluar(i)
+        if self.cantidad[i] == 0:
+            self._liberar(ticker, i)
+
+    def _liberar(self, ticker, i):
+        self.total_valor -= self.valor[i]
+        self.total_no_realizado -= self.no_realizado[i]
+        self.cantidad[i] = 0
+        self.costo[i] = self.precio[i] = np.nan
+        self.valor[i] = self.no_realizado[i] = 0
+        del self.indice[ticker]
+        self._libres.append(i)
+
+    def actualizar_precio(self, ticker, precio):
+        """Precio nuevo de un ticker. Devuelve True si está en cartera (y cambió su valuación)."""
+        i = self.indice.get(ticker)
+        if i is None or precio is None or precio == self.precio[i]:
+            return False
+        self.precio[i] = precio
+        if np.isnan(self.costo[i]):
+            self.costo[i] = precio
+        self._revaluar(i)
+        return True
+
+    def posicion(self, ticker):
+        """(cantidad, costo, precio, valor, no_realizado) con None donde no hay dato."""
+        i = self.indice.get(ticker)
+        if i is None:
+            return None
+        def dato(x):
+            return None if np.isnan(x) else float(x)
+        return (float(self.cantidad[i]), dato(self.costo[i]), dato(self.precio[i]),
+                float(self.valor[i]), float(self.no_realizado[i]))
+
+    def costos(self):
+        return {t: float(self.costo[i]) for t, i in self.indice.items() if not np.isnan(self.costo[i])}
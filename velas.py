@@ -0,0 +1,173 @@
+"""Velas OHLCV (1m, 5m, 1h) por contrato, armadas en vivo a partir de los ticks.
+
+Cada (ticker, intervalo) tiene un buffer circular de tamaño fijo: la memoria
+no crece por más que el servicio corra días. Actualizar una vela es O(1): la
+vela en curso vive en escalares y sólo se vuelca al array cuando el tick cae
+en un intervalo nuevo (se pisa la más vieja). Los ticks fuera de orden,
+anteriores a la vela en curso, se ignoran.
+
+El precio de cada tick es el mismo que usan las tasas (punto medio, o último
+operado si falta una punta). Los mensajes de top-of-book no identifican cada
+operación, así que el volumen de una vela es la cantidad de ticks.
+
+En `servicio_dlr.py` el agregador es un consumidor más del pipeline: el cierre
+de velas corre en su thread y nunca frena al WebSocket. Se publica junto a
+cada curva como `curva_<subyacente>_velas.json`, en JSON compacto por columnas.
+"""
+import os
+import time
+import threading
+
+import numpy as np
+
+from publicador import escribir_json_atomico
+from tasas_dlr import precio_referencia
+
+# Intervalo (segundos) -> (nombre, velas que se conservan)
+INTERVALOS = {
+    60: ("1m", 600),     # 10 horas
+    300: ("5m", 288),    # 24 horas
+    3600: ("1h", 168),   # 1 semana
+}
+
+def archivo_velas(archivo_curva):
+    """curva_dlr.json -> curva_dlr_velas.json (en el mismo directorio)."""
+    return os.path.splitext(archivo_curva)[0] + "_velas.json"
+
+class SerieVelas:
+    """Buffer circular de velas de un intervalo para un ticker."""
+
+    __slots__ = ("intervalo", "capacidad", "inicios", "ohlcv", "cerradas", "_i",
+                 "inicio", "o", "h", "l", "c", "v")
+
+    def __init__(self, intervalo, capacidad):
+        self.intervalo = intervalo
+        self.capacidad = capacidad
+        self.inicios = np.zeros(capacidad, dtype=np.int64)
+        self.ohlcv = np.zeros((capacidad, 5))
+        self.cerradas = 0   # velas cerradas en el buffer (<= capacidad)
+        self._i = 0         # próxima posición a escribir
+        self.inicio = None  # vela en curso
+        self.o = self.h = self.l = self.c = 0.0
+        self.v = 0
+
+    def agregar(self, ts, precio):
+        """Suma un tick (ts en segundos epoch). False si es anterior a la vela en curso."""
+        inicio = int(ts) - int(ts) % self.intervalo
+        if inicio == self.inicio:
+            if precio > self.h:
+                self.h = precio
+            elif precio < self.l:
+                self.l = precio
+            self.c = precio
+            self.v += 1
+            return True
+        if self.inicio is not None:
+            if inicio < self.inicio:
+                return False
+            self._cerrar()
+        self.inicio = inicio
+        self.o = self.h = self.l = self.c = precio
+        self.v = 1
+        return True
+
+    def _cerrar(self):
+        i = self._i
+        self.inicios[i] = self.inicio
+        self.ohlcv[i] = (self.o, self.h, self.l, self.c, self.v)
+        self._i = (i + 1) % self.capacidad
+        self.cerradas = min(self.cerradas + 1, self.capacidad)
+
+    def __len__(self):
+        return self.cerradas + (self.inicio is not None)
+
+    def arrays(self):
+        """(inicios, ohlcv) en orden cronológico, con la vela en curso al final (copias)."""
+        orden = np.arange(self._i - self.cerradas, self._i) % self.capacidad
+        inicios, ohlcv = self.inicios[orden], self.ohlcv[orden]
+        if self.inicio is not None:
+            inicios = np.append(inicios, self.inicio)
+            ohlcv = np.vstack([ohlcv, (self.o, self.h, self.l, self.c, self.v)])
+        return inicios, ohlcv
+
+def _columnas(inicios, ohlcv):
+    return {"t": inicios.tolist(), "o": ohlcv[:, 0].tolist(), "h": ohlcv[:, 1].tolist(),
+            "l": ohlcv[:, 2].tolist(), "c": ohlcv[:, 3].tolist(), "v": ohlcv[:, 4].astype(int).tolist()}
+
+class AgregadorVelas:
+    """Velas de todos los intervalos para cada ticker que llega.
+
+    Lo alimenta un solo thread (`registrar` / `registrar_lote`); `publicar`
+    puede llamarse desde otro: el lock sólo cubre la copia de los arrays, la
+    serialización y la escritura van afuera.
+    """
+
+    def __init__(self, intervalos=None):
+        self.intervalos = dict(intervalos or INTERVALOS)
+        self.series = {}     # ticker -> [SerieVelas por intervalo]
+        self.versiones = {}  # ticker -> ticks sumados
+        self.ignorados = 0   # ticks fuera de orden o sin precio
+        self._publicado = {}  # ruta -> (versiones de sus tickers, time.monotonic()) de la última publicación
+        self._lock = threading.Lock()
+
+    def _series(self, ticker):
+        series = self.series.get(ticker)
+        if series is None:
+            series = self.series[ticker] = [SerieVelas(i, cap) for i, (_, cap) in self.intervalos.items()]
+            self.versiones[ticker] = 0
+        return series
+
+    def _registrar(self, q, ahora):
+        precio = precio_referencia(q.bid, q.offer, q.last)
+        if precio is None:
+            self.ignorados += 1
+            return
+        ts = q.timestamp / 1000 if q.timestamp else ahora
+        agregado = False
+        for serie in self._series(q.symbol):
+            agregado = serie.agregar(ts, precio) or agregado
+        if agregado:
+            self.versiones[q.symbol] += 1
+        else:
+            self.ignorados += 1
+
+    def registrar(self, q):
+        """Un tick (Cotizacion o pipeline.Tick). Sin timestamp de mercado usa la hora local."""
+        with self._lock:
+            self._registrar(q, time.time())
+
+    def registrar_lote(self, lote):
+        """Consumidor del pipeline (política TODOS): un lock por lote."""
+        ahora = time.time()
+        with self._lock:
+            for q in lote:
+                self._registrar(q, ahora)
+
+    def a_json(self, tickers=None):
+        """{"intervalos": {"1m": {ticker: {"t": [...], "o": [...], ...}}, ...}}."""
+        with self._lock:
+            tickers = [t for t in (self.series if tickers is None else tickers) if t in self.series]
+            copias = {t: [s.arrays() for s in self.series[t]] for t in tickers}
+        intervalos = {nombre: {} for nombre, _ in self.intervalos.values()}
+        for t, arrays in copias.items():
+            for (nombre, _), columnas in zip(self.intervalos.values(), arrays):
+                intervalos[nombre][t] = _columnas(*columnas)
+        return {"intervalos": intervalos}
+
+    def publicar(self, ruta, tickers, timestamp, servidor=None, cada=0.0):
+        """Escribe las velas de `tickers` en `ruta` si alguno recibió ticks desde la última vez.
+
+        `cada`: segundos mínimos entre escrituras de la misma ruta (el archivo
+        tiene todo el buffer, no conviene reescribirlo en cada ráfaga).
+        """
+        firma = tuple(self.versiones.get(t, 0) for t in tickers)
+        anterior, cuando = self._publicado.get(ruta, (None, None))
+        if anterior == firma or (cuando is not None and time.monotonic() - cuando < cada):
+            return None
+        data = self.a_json(tickers)
+        data["timestamp"] = timestamp
+        escribir_json_atomico(ruta, data)
+        self._publicado[ruta] = (firma, time.monotonic())
+        if servidor is not None:
+            servidor.publicar("/" + os.path.basename(ruta), data)
+        return data